@@ -0,0 +1,224 @@
+"""Versioned single-file model store (AEMS format) with memory-mapped loading.
+
+Layout (all offsets 64-byte aligned):
+
+    b'AEMS' | uint16 format version | uint32 header length | JSON header | arrays...
+
+The JSON header describes each array (dtype, shape, offset) plus free-form `meta`.
+Opening a store reads only the header and `np.memmap`s the arrays, so start-up cost
+does not grow with the number of parts. Part ids are indexed by an open-addressing
+hash table stored in the file itself, giving O(1) lookups without building a dict.
+
+A store named `models/x.store` is written as generations `models/x-000001.store`,
+`models/x-000002.store`, ...; readers open the newest. A new generation never
+overwrites a file that a running reader still has mapped (which Windows refuses),
+and older generations are deleted once nothing maps them.
+
+This package holds only the file format; the baseline service (ml/src/model_store.py)
+and the inventory service (ml-inventory-system/src/model_store.py) add their model
+families on top. Both install it from their requirements (`pip install -e ml/aems-store`).
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'AEMS'
+FORMAT_VERSION = 1
+ALIGN = 64
+_PREAMBLE = struct.Struct('<4sHI')
+EMPTY_SLOT = -1
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _hash(key: bytes) -> int:
+    return zlib.crc32(key)
+
+
+def encode_strings(values) -> np.ndarray:
+    """Fixed-width UTF-8 bytes (mmap-able, unlike object arrays)."""
+    encoded = np.asarray([str(v).encode('utf-8') for v in values], dtype=bytes)
+    return encoded if encoded.dtype.itemsize else encoded.astype('S1')
+
+
+def build_index(keys: np.ndarray) -> np.ndarray:
+    """Open-addressing (linear probing) table of row numbers, sized to a power of two >= 2n."""
+    size = 1
+    while size < max(2 * len(keys), 8):
+        size <<= 1
+    slots = np.full(size, EMPTY_SLOT, dtype=np.int64)
+    mask = size - 1
+    for row, key in enumerate(keys.tolist()):
+        slot = _hash(key) & mask
+        while slots[slot] != EMPTY_SLOT:
+            if keys[slots[slot]] == key:
+                raise ValueError(f"Duplicate part id in model store: {key!r}")
+            slot = (slot + 1) & mask
+        slots[slot] = row
+    return slots
+
+
+def generation_path(path: str | Path, generation: int) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.stem}-{generation:06d}{path.suffix}")
+
+
+def store_generations(path: str | Path) -> List[Tuple[int, Path]]:
+    """(generation, file) of every written generation of the store at `path`, oldest first."""
+    path = Path(path)
+    pattern = re.compile(re.escape(path.stem) + r'-(\d{6})' + re.escape(path.suffix) + '$')
+    found = []
+    for candidate in path.parent.glob(f"{path.stem}-*{path.suffix}"):
+        match = pattern.match(candidate.name)
+        if match:
+            found.append((int(match.group(1)), candidate))
+    return sorted(found)
+
+
+def current_store_path(path: str | Path) -> Optional[Path]:
+    """Newest generation of the store, the plain file for stores written before generations, or None."""
+    generations = store_generations(path)
+    if generations:
+        return generations[-1][1]
+    path = Path(path)
+    return path if path.exists() else None
+
+
+def store_exists(path: str | Path) -> bool:
+    return current_store_path(path) is not None
+
+
+def _remove_old_generations(path: Path, current: Path):
+    """Delete superseded generations; one still mapped by a reader (Windows) is left for a later write."""
+    stale = [p for _, p in store_generations(path) if p != current]
+    if path.exists():
+        stale.append(path)
+    for old in stale:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+
+def write_store(path: str | Path, part_ids, arrays: Dict[str, np.ndarray], meta: Optional[dict] = None) -> Path:
+    """Write `arrays` (one row per part id) as the next generation of the store at `path`.
+
+    Returns the generation file written; `open_store(path)` opens it from now on.
+    """
+    path = Path(path)
+    generations = store_generations(path)
+    target = generation_path(path, generations[-1][0] + 1 if generations else 1)
+    keys = encode_strings(part_ids)
+    payload = {'part_id': keys, 'index_slots': build_index(keys)}
+    for name, values in arrays.items():
+        values = np.ascontiguousarray(values)
+        if values.dtype == object:
+            raise TypeError(f"Array '{name}' has object dtype; use fixed-width bytes/str instead")
+        payload[name] = values
+
+    descriptors = {}
+    offset = 0
+    for name, values in payload.items():
+        descriptors[name] = {'dtype': values.dtype.str, 'shape': list(values.shape), 'offset': offset}
+        offset = _align(offset + values.nbytes)
+    header = json.dumps({'format_version': FORMAT_VERSION, 'count': int(len(keys)),
+                         'arrays': descriptors, 'meta': meta or {}}).encode('utf-8')
+    data_start = _align(_PREAMBLE.size + len(header))
+
+    tmp_path = target.with_name(target.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, values in payload.items():
+            f.seek(data_start + descriptors[name]['offset'])
+            f.write(values.tobytes())
+        f.truncate(data_start + offset)
+    # A fresh name: no reader can have it mapped, so the rename also succeeds on Windows
+    os.replace(tmp_path, target)
+    _remove_old_generations(path, target)
+    return target
+
+
+class ModelStore:
+    """Read-only, memory-mapped view of a store file."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a model store")
+            if version > FORMAT_VERSION:
+                raise ValueError(f"Model store format v{version} is newer than supported v{FORMAT_VERSION}")
+            header = json.loads(f.read(header_len))
+        self.format_version = version
+        self.meta = header['meta']
+        self._count = header['count']
+        data_start = _align(_PREAMBLE.size + header_len)
+        self._arrays = {}
+        for name, d in header['arrays'].items():
+            shape = tuple(d['shape'])
+            if int(np.prod(shape)) == 0:
+                self._arrays[name] = np.empty(shape, dtype=np.dtype(d['dtype']))
+            else:
+                self._arrays[name] = np.memmap(self.path, dtype=np.dtype(d['dtype']), mode='r',
+                                               offset=data_start + d['offset'], shape=shape)
+        self._keys = self._arrays.pop('part_id')
+        self._slots = self._arrays.pop('index_slots')
+        self._mask = len(self._slots) - 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, part_id) -> bool:
+        return self.row(part_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (k.decode('utf-8') for k in self._keys.tolist())
+
+    @property
+    def array_names(self):
+        return list(self._arrays)
+
+    def has_array(self, name: str) -> bool:
+        return name in self._arrays
+
+    def row(self, part_id) -> Optional[int]:
+        """Row number of `part_id`, or None (O(1) expected)."""
+        key = str(part_id).encode('utf-8')
+        slot = _hash(key) & self._mask
+        while True:
+            row = int(self._slots[slot])
+            if row == EMPTY_SLOT:
+                return None
+            if self._keys[row] == key:
+                return row
+            slot = (slot + 1) & self._mask
+
+    def array(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+    def part_ids(self) -> np.ndarray:
+        return self._keys.astype(str)
+
+
+def open_store(path: str | Path) -> ModelStore:
+    """Open the newest generation of the store at `path`."""
+    for _ in range(3):
+        current = current_store_path(path)
+        if current is None:
+            break
+        try:
+            return ModelStore(current)
+        except FileNotFoundError:
+            continue  # superseded and deleted between listing and opening; look again
+    raise FileNotFoundError(f"No model store at {path}")
@@ -0,0 +1 @@
+# Benchmark scripts (run from ml/: python -m benchmarks.<name>)
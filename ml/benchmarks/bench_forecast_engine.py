@@ -0,0 +1,104 @@
+"""Benchmark the vectorized forecast engine against the old per-part loop.
+
+Example:
+python -m benchmarks.bench_forecast_engine --parts 45 500 5000 50000 --days 120
+"""
+from __future__ import annotations
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.forecast_engine import compute_forecast_table
+from src.forecast_state import InventoryParams
+from src.inventory_calculations import safety_stock, reorder_point, eoq, next_reorder_date_projection
+
+
+def synthetic_history(parts: int, days: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2025-01-01', periods=days, freq='D')
+    part_ids = np.array([f"PRT-{i:06d}" for i in range(parts)])
+    n = parts * days
+    return pd.DataFrame({
+        'date': np.repeat(dates.values, parts),
+        'part_id': np.tile(part_ids, days),
+        'quantity_used': rng.integers(0, 16, n),
+        'stock_on_hand': rng.integers(50, 500, n),
+        'lead_time_days': np.tile(rng.choice([5, 7, 10], parts), days),
+        'unit_cost': np.tile(rng.choice([5.0, 7.5, 12.0, 20.0], parts), days),
+    })
+
+
+def synthetic_coefficients(part_ids: np.ndarray, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    linear = rng.random(len(part_ids)) > 0.1
+    return pd.DataFrame({
+        'part_id': part_ids,
+        'method': np.where(linear, 'linear', 'avg'),
+        'slope': np.where(linear, rng.normal(0, 5, len(part_ids)), np.nan),
+        'intercept': np.where(linear, rng.uniform(50, 300, len(part_ids)), np.nan),
+        'avg_usage': np.where(linear, np.nan, rng.uniform(50, 300, len(part_ids))),
+    })
+
+
+def reference_loop(coefficients: pd.DataFrame, raw: pd.DataFrame, params: InventoryParams) -> list:
+    """The pre-engine `/forecast` loop: filter and sort the history once per part."""
+    from src.data_prep import aggregate_daily_to_monthly, prepare_model_frame, compute_daily_stats, get_lead_time_map
+    monthly = prepare_model_frame(aggregate_daily_to_monthly(raw))
+    part_stats = compute_daily_stats(raw)
+    lead_time_map = get_lead_time_map(raw)
+    results = []
+    for m in coefficients.itertuples(index=False):
+        grp = monthly[monthly.part_id == m.part_id]
+        if grp.empty:
+            continue
+        t_next = grp['t'].max() + 1
+        pred = m.intercept + m.slope * t_next if m.method == 'linear' else m.avg_usage
+        stats_row = part_stats[part_stats.part_id == m.part_id].iloc[0].to_dict()
+        avg, std = stats_row['avg_daily_usage'], stats_row['std_daily_usage']
+        lead_time = lead_time_map.get(m.part_id, params.default_lead_time)
+        unit_cost = raw[raw.part_id == m.part_id].sort_values('date')['unit_cost'].ffill().iloc[-1]
+        holding = (unit_cost * params.holding_rate) if unit_cost else 1 * params.holding_rate
+        ss = safety_stock(std, lead_time, params.service_level_z)
+        rop = reorder_point(avg, lead_time, ss)
+        eoq_val = eoq(avg * 365, params.ordering_cost, holding) or pred
+        latest_stock = raw[raw.part_id == m.part_id].sort_values('date')['stock_on_hand'].iloc[-1]
+        days = next_reorder_date_projection(latest_stock, avg, rop)
+        results.append((m.part_id, round(pred, 2), round(ss, 2), round(rop, 2), round(eoq_val, 2), round(days, 1)))
+    return results
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--parts', type=int, nargs='+', default=[45, 500, 5000, 50000])
+    ap.add_argument('--days', type=int, default=120)
+    ap.add_argument('--loop-max-parts', type=int, default=500,
+                    help='Skip the quadratic reference loop above this many parts')
+    args = ap.parse_args()
+    params = InventoryParams()
+
+    print(f"{'parts':>8} {'rows':>10} {'engine_s':>10} {'loop_s':>10} {'speedup':>9}")
+    for parts in args.parts:
+        raw = synthetic_history(parts, args.days)
+        coefficients = synthetic_coefficients(np.sort(raw['part_id'].unique()))
+        table, engine_s = _timed(compute_forecast_table, coefficients, raw, params)
+        loop_s = None
+        if parts <= args.loop_max_parts:
+            expected, loop_s = _timed(reference_loop, coefficients, raw.copy(), params)
+            got = table[['part_id', 'predicted_monthly_usage', 'safety_stock', 'reorder_point',
+                         'recommended_order_qty', 'days_until_reorder_threshold']]
+            assert np.allclose(got.iloc[:, 1:].to_numpy(float), np.array([r[1:] for r in expected], float), atol=0.011)
+        loop_txt = f"{loop_s:10.3f}" if loop_s is not None else f"{'-':>10}"
+        speed_txt = f"{loop_s / engine_s:8.1f}x" if loop_s is not None else f"{'-':>9}"
+        print(f"{parts:>8} {len(raw):>10} {engine_s:10.3f} {loop_txt} {speed_txt}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Check the array inventory calculations against the scalar ones and time both.
+
+Parity runs on random inputs mixed with the edge values the scalar branches
+treat specially (0, negatives, NaN, inf); `eoq`'s None is compared as NaN.
+
+Example:
+python -m benchmarks.bench_inventory_calculations --parts 1000 10000 100000
+"""
+from __future__ import annotations
+import argparse
+import time
+
+import numpy as np
+
+from src.inventory_calculations import (safety_stock, reorder_point, eoq, next_reorder_date_projection,
+                                        safety_stock_array, reorder_point_array, eoq_array, eoq_invalid_mask,
+                                        next_reorder_date_projection_array)
+
+EDGE_VALUES = np.array([0.0, -0.0, -1.0, -1e-9, 1e-9, 1.0, np.nan, np.inf, -np.inf])
+
+
+def random_inputs(n: int, edge_share: float, rng: np.random.Generator) -> np.ndarray:
+    """n values spread around zero, with `edge_share` of them replaced by EDGE_VALUES."""
+    values = rng.normal(5, 10, n)
+    edges = rng.random(n) < edge_share
+    values[edges] = rng.choice(EDGE_VALUES, edges.sum())
+    return values
+
+
+def _same(got: np.ndarray, expected) -> bool:
+    return np.allclose(got, np.array(expected, dtype=float), rtol=1e-12, atol=0, equal_nan=True)
+
+
+def check_parity(n: int, seed: int = 7, edge_share: float = 0.3):
+    rng = np.random.default_rng(seed)
+    std, lead, avg, ss, stock = (random_inputs(n, edge_share, rng) for _ in range(5))
+    demand, ordering, holding = (random_inputs(n, edge_share, rng) for _ in range(3))
+    with np.errstate(all='ignore'):
+        scalar_ss = [safety_stock(s, l, 1.65) for s, l in zip(std, lead)]
+        scalar_rop = [reorder_point(a, l, s) for a, l, s in zip(avg, lead, ss)]
+        scalar_eoq = [eoq(d, o, h) for d, o, h in zip(demand, ordering, holding)]
+        scalar_days = [next_reorder_date_projection(s, a, r) for s, a, r in zip(stock, avg, ss)]
+        scalar_eoq_catalog = [eoq(d, 50.0, h) for d, h in zip(demand, holding)]
+
+    assert _same(safety_stock_array(std, lead, 1.65), scalar_ss), 'safety_stock'
+    assert _same(reorder_point_array(avg, lead, ss), scalar_rop), 'reorder_point'
+    assert _same(eoq_array(demand, ordering, holding), [np.nan if v is None else v for v in scalar_eoq]), 'eoq'
+    assert (eoq_invalid_mask(demand, ordering, holding) == np.array([v is None for v in scalar_eoq])).all(), \
+        'eoq_invalid_mask'
+    assert _same(next_reorder_date_projection_array(stock, avg, ss), scalar_days), 'next_reorder_date_projection'
+    # Scalars broadcast like the scalar signature (e.g. one ordering cost for the catalog)
+    assert _same(eoq_array(demand, 50.0, holding), [np.nan if v is None else v for v in scalar_eoq_catalog])
+
+
+def scalar_catalog(std, lead, avg, stock, unit_cost):
+    out = []
+    for s, l, a, c, u in zip(std, lead, avg, stock, unit_cost):
+        ss = safety_stock(s, l)
+        rop = reorder_point(a, l, ss)
+        out.append((ss, rop, eoq(a * 365, 50.0, u * 0.2), next_reorder_date_projection(c, a, rop)))
+    return out
+
+
+def array_catalog(std, lead, avg, stock, unit_cost):
+    ss = safety_stock_array(std, lead)
+    rop = reorder_point_array(avg, lead, ss)
+    return ss, rop, eoq_array(avg * 365, 50.0, unit_cost * 0.2), next_reorder_date_projection_array(stock, avg, rop)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--parts', type=int, nargs='+', default=[1000, 10000, 100000])
+    ap.add_argument('--parity-samples', type=int, default=200000)
+    args = ap.parse_args()
+
+    check_parity(args.parity_samples)
+    print(f"parity: {args.parity_samples} random/edge-case inputs match the scalar functions")
+
+    print(f"{'parts':>8} {'arrays_s':>10} {'scalar_s':>10} {'speedup':>9}")
+    rng = np.random.default_rng(11)
+    for parts in args.parts:
+        catalog = (rng.uniform(0, 5, parts), rng.choice([5.0, 7.0, 10.0], parts), rng.uniform(0, 15, parts),
+                   rng.integers(0, 500, parts).astype(float), rng.choice([5.0, 7.5, 12.0, 20.0], parts))
+        got, array_s = _timed(array_catalog, *catalog)
+        expected, scalar_s = _timed(scalar_catalog, *catalog)
+        expected = np.array(expected, dtype=float).T
+        assert all(_same(g, e) for g, e in zip(got, expected))
+        print(f"{parts:>8} {array_s:10.4f} {scalar_s:10.4f} {scalar_s / array_s:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""Benchmark closed-form baseline training at catalog scale.
+
+Example:
+python -m benchmarks.bench_train_baseline --parts 1000 10000 100000 --days 120
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src.train_baseline import train_from_frame
+from .bench_forecast_engine import synthetic_history
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--parts', type=int, nargs='+', default=[1000, 10000, 100000])
+    ap.add_argument('--days', type=int, default=120)
+    args = ap.parse_args()
+
+    print(f"{'parts':>8} {'rows':>10} {'train_s':>9}")
+    for parts in args.parts:
+        raw = synthetic_history(parts, args.days)
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            train_from_frame(raw, models_dir=Path(tmp))
+            elapsed = time.perf_counter() - start
+        print(f"{parts:>8} {len(raw):>10} {elapsed:9.2f}")
+
+
+if __name__ == '__main__':
+    main()
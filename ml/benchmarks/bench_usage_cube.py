@@ -0,0 +1,115 @@
+"""Benchmark the memory-mapped usage cube against the long-format pandas paths.
+
+Checks the cube's daily stats, monthly totals and rolling stats against data_prep and
+per-part pandas rolling windows, then times them plus part lookups and in-place appends.
+
+Example:
+python -m benchmarks.bench_usage_cube --parts 20000 --days 365
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_prep import aggregate_daily_to_monthly, compact_frame, compute_daily_stats
+from src.usage_cube import UsageCube
+from .bench_forecast_engine import synthetic_history
+
+
+def sparse_history(parts: int, days: int, seed: int = 7) -> pd.DataFrame:
+    """synthetic_history with about 30% of part-days missing, as sparse usage logs produce."""
+    raw = synthetic_history(parts, days, seed)
+    keep = np.random.default_rng(seed).random(len(raw)) > 0.3
+    return compact_frame(raw[keep].reset_index(drop=True))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def check_parity(cube: UsageCube, raw: pd.DataFrame, reference_parts: int):
+    stats = cube.daily_stats().sort_values('part_id', ignore_index=True)
+    expected = compute_daily_stats(raw.copy()).sort_values('part_id', ignore_index=True)
+    assert (stats['part_id'] == expected['part_id'].astype(str)).all()
+    for column in ('avg_daily_usage', 'std_daily_usage', 'days_observed'):
+        assert np.allclose(stats[column], expected[column].to_numpy(float)), column
+
+    monthly = cube.monthly_totals()
+    expected = aggregate_daily_to_monthly(raw.copy())
+    assert (monthly['part_id'] == expected['part_id'].astype(str).to_numpy()).all()
+    assert (monthly['month_start'].to_numpy() == expected['month_start'].to_numpy()).all()
+    assert (monthly['quantity_used'].to_numpy() == expected['quantity_used'].to_numpy()).all()
+
+    # Rolling: per-part time-based pandas windows, on the observed days of a subset of parts
+    part_ids = cube.part_ids[:reference_parts]
+    subset = raw[raw['part_id'].isin(part_ids)].sort_values(['part_id', 'date'])
+    for window in (7, 30):
+        rolled = cube.rolling(window, parts=part_ids, stats=('mean', 'std'))
+        grouped = subset.set_index('date').groupby('part_id', observed=True, sort=True)['quantity_used']
+        rolling = grouped.rolling(f'{window}D')
+        reference = {'mean': rolling.mean(), 'std': rolling.std()}
+        rows = cube.rows(subset['part_id'].astype(str))
+        columns = (subset['date'].to_numpy() - cube.dates[0].to_datetime64()).astype('timedelta64[D]').astype(int)
+        for stat, values in reference.items():
+            got = rolled[stat][rows, columns]
+            # pandas' online std can leave ~1e-7 where a constant window's std is exactly 0
+            assert np.allclose(got, values.to_numpy(), atol=1e-6, equal_nan=True), f"rolling {window}D {stat}"
+
+    # A date window reads history before its first day
+    tail = cube.rolling(7, start=cube.dates[-10], stats=('mean',))['mean']
+    assert np.allclose(tail, cube.rolling(7, stats=('mean',))['mean'][:, -10:], equal_nan=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--parts', type=int, default=20000)
+    ap.add_argument('--days', type=int, default=365)
+    ap.add_argument('--reference-parts', type=int, default=200, help='Parts checked against pandas rolling')
+    ap.add_argument('--lookups', type=int, default=200, help='Single-part reads to time')
+    args = ap.parse_args()
+
+    raw = sparse_history(args.parts, args.days)
+    last_day = raw['date'].max()
+    history, new_day = raw[raw['date'] < last_day], raw[raw['date'] == last_day]
+    with tempfile.TemporaryDirectory() as tmp:
+        cube, build_s = timed(lambda: UsageCube.build(tmp, history))
+        (added_days, _), append_s = timed(lambda: cube.append(new_day))
+        assert added_days == 1
+        # The last day re-sent with grown totals replaces its cells
+        grown = new_day.assign(quantity_used=new_day['quantity_used'] + 1)
+        _, resend_s = timed(lambda: cube.append(grown))
+        assert (cube.window(start=last_day)[cube.rows(grown['part_id'].astype(str)), 0]
+                == grown['quantity_used'].to_numpy()).all()
+        cube.append(new_day)
+        check_parity(cube, raw, args.reference_parts)
+
+        _, stats_pandas_s = timed(lambda: compute_daily_stats(raw.copy()))
+        _, stats_cube_s = timed(cube.daily_stats)
+        _, monthly_pandas_s = timed(lambda: aggregate_daily_to_monthly(raw.copy()))
+        _, monthly_cube_s = timed(cube.monthly_totals)
+        _, rolling_pandas_s = timed(lambda: raw.sort_values(['part_id', 'date']).set_index('date')
+                                    .groupby('part_id', observed=True)['quantity_used'].rolling('7D').mean())
+        _, rolling_cube_s = timed(lambda: cube.rolling(7, stats=('mean',)))
+
+        lookup_ids = cube.part_ids[np.random.default_rng(1).integers(0, args.parts, args.lookups)]
+        _, filter_s = timed(lambda: [raw[raw['part_id'] == part_id]['quantity_used'].to_numpy() for part_id in lookup_ids])
+        _, window_s = timed(lambda: [cube.window(parts=[part_id]) for part_id in lookup_ids])
+        file_mb = cube.info()['file_mb']
+
+    print(f"{args.parts} parts x {args.days} days, {len(raw):,} observed rows; cube file {file_mb} MB")
+    print(f"  {'operation':<28} {'pandas_s':>9} {'cube_s':>9} {'speedup':>8}")
+    for name, pandas_s, cube_s in (('daily stats', stats_pandas_s, stats_cube_s),
+                                   ('monthly totals', monthly_pandas_s, monthly_cube_s),
+                                   ('rolling 7-day mean', rolling_pandas_s, rolling_cube_s),
+                                   (f'{args.lookups} single-part reads', filter_s, window_s)):
+        print(f"  {name:<28} {pandas_s:9.3f} {cube_s:9.3f} {pandas_s / cube_s:7.1f}x")
+    print(f"  build {build_s:.2f}s, append one day {append_s * 1000:.1f} ms, re-send it {resend_s * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@ FastAPI ML Service for Inventory Forecasting
 Provides REST API endpoints for predictions and recommendations
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import pandas as pd
@@ -16,6 +16,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from linear_model import InventoryForecaster
 from data_generator import generate_sample_data
+from execution import ExecutionLayer, Saturated
+from reorder_table import PRIORITY_RANK, ReorderTable
 
 app = FastAPI(
     title="Automotive Parts Inventory ML Service",
@@ -26,20 +28,64 @@ app = FastAPI(
 # Global forecaster instance
 forecaster = InventoryForecaster()
 
+# Bumped whenever models are loaded or retrained; the reorder table re-plans when it moves
+models_version = 0
+
+# Live stock levels by part code, when MONGODB_URI points at the inventory database
+stock_monitor = None
+
+# Stock assumed for parts without a live level
+DEFAULT_STOCK = 100
+
+# Thread pool for model work: the linear models spend their time in NumPy, which releases the GIL
+execution = ExecutionLayer(process_workers=0)
+
+async def offload(endpoint: str, fn, *args):
+    """Run fn(*args) on the execution layer's thread pool, answering 429 when it is saturated"""
+    try:
+        return await execution.run(endpoint, fn, *args)
+    except Saturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the ML service"""
+    global models_version
     print("🚀 Starting ML Inventory Service...")
     
     # Try to load existing models
     try:
         forecaster.load_models()
+        models_version += 1
         print(f"✅ Loaded {len(forecaster.models)} trained models")
     except:
         print("⚠️  No existing models found. Please train models first.")
     
+    # Follow stock changes so recommendations re-rank only the parts whose stock moved
+    global stock_monitor
+    if os.getenv('MONGODB_URI'):
+        try:
+            from async_mongodb_connector import AsyncMongoDBConnector
+            from stock_monitor import StockMonitor
+            
+            # Sample-data models are keyed by part code rather than the document _id
+            stock_monitor = StockMonitor(AsyncMongoDBConnector().db.parts, key_field='partCode')
+            stock_monitor.subscribe(reorder_table.update_stock)
+            await stock_monitor.start()
+            print(f"📦 Tracking live stock for {len(stock_monitor.levels)} parts")
+        except Exception as e:
+            print(f"⚠️  Live stock unavailable, assuming {DEFAULT_STOCK} units per part: {e}")
+            stock_monitor = None
+    
     print("🎉 ML Service ready!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the worker pools and the stock feed"""
+    if stock_monitor:
+        await stock_monitor.stop()
+    execution.shutdown(wait=False)
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -58,6 +104,8 @@ async def health_check():
         "models_loaded": len(forecaster.models),
         "is_trained": forecaster.is_trained,
         "available_parts": list(forecaster.models.keys()) if forecaster.is_trained else [],
+        "execution": execution.stats(),
+        "stock": stock_monitor.stats() if stock_monitor else None,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -78,19 +126,20 @@ async def predict_usage(request: PredictionRequest):
     if not forecaster.is_trained:
         raise HTTPException(status_code=400, detail="Models not trained. Please train models first.")
     
-    # Get parts to predict (all if none specified)
+    return await offload("predict", _predict_usage, request)
+
+def _predict_usage(request: PredictionRequest) -> List[PredictionResponse]:
+    # Get parts to predict (all if none specified), skipping parts without a model
     parts_to_predict = request.part_ids if request.part_ids else list(forecaster.models.keys())
+    parts_to_predict = [part_id for part_id in parts_to_predict if part_id in forecaster.models]
+    
+    # One batched forecast for every requested part instead of per-day model calls
+    predictions_by_part = forecaster.predict_next_days_batch(parts_to_predict, request.days)
     
     results = []
     
     for part_id in parts_to_predict:
-        if part_id not in forecaster.models:
-            continue
-        
         try:
-            # Get predictions
-            predictions = forecaster.predict_next_days(part_id, request.days)
-            
             # Get reorder information
             reorder_info = forecaster.calculate_reorder_point(part_id)
             eoq_info = forecaster.calculate_eoq(part_id)
@@ -101,7 +150,7 @@ async def predict_usage(request: PredictionRequest):
             results.append(PredictionResponse(
                 part_id=part_id,
                 part_name=part_name,
-                predictions=predictions,
+                predictions=predictions_by_part[part_id],
                 reorder_info=reorder_info,
                 eoq_info=eoq_info
             ))
@@ -112,63 +161,118 @@ async def predict_usage(request: PredictionRequest):
     
     return results
 
-@app.get("/reorder-recommendations")
-async def get_reorder_recommendations():
-    """Get reorder recommendations for all parts"""
+class BatchPredictionRequest(BaseModel):
+    part_ids: Optional[List[str]] = None
+    days: int = 30
+    offsets: Optional[List[int]] = None
+
+@app.post("/predict/batch")
+async def predict_usage_batch(request: BatchPredictionRequest):
+    """Predict usage for many parts as one Arrow IPC stream (part_id, date, predicted_usage)"""
     if not forecaster.is_trained:
         raise HTTPException(status_code=400, detail="Models not trained. Please train models first.")
     
-    recommendations = []
+    try:
+        content = await offload("predict", _predict_usage_batch, request)
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     
-    for part_id in forecaster.models.keys():
-        try:
-            # Get current stock (simulated - in real app, get from database)
-            current_stock = 100  # This would come from your MongoDB
-            
-            # Get reorder info
-            reorder_info = forecaster.calculate_reorder_point(part_id)
-            eoq_info = forecaster.calculate_eoq(part_id)
-            
-            # Determine if reorder is needed
-            needs_reorder = current_stock <= reorder_info['reorder_point']
-            
-            # Calculate days until reorder
-            avg_daily_usage = reorder_info['avg_daily_usage']
-            days_until_reorder = (current_stock - reorder_info['reorder_point']) / avg_daily_usage if avg_daily_usage > 0 else 0
-            
-            recommendations.append({
-                "part_id": part_id,
-                "part_name": forecaster.part_stats[part_id].get('part_name', part_id),
-                "current_stock": current_stock,
-                "reorder_point": reorder_info['reorder_point'],
-                "safety_stock": reorder_info['safety_stock'],
-                "recommended_order_quantity": eoq_info['eoq'],
-                "needs_reorder": needs_reorder,
-                "days_until_reorder": round(days_until_reorder, 1),
-                "unit_cost": forecaster.part_stats[part_id]['unit_cost'],
-                "lead_time_days": reorder_info['lead_time_days'],
-                "priority": "HIGH" if needs_reorder else "MEDIUM" if days_until_reorder < 7 else "LOW"
-            })
-            
-        except Exception as e:
-            print(f"Error getting recommendation for {part_id}: {str(e)}")
-            continue
+    return Response(content=content, media_type="application/vnd.apache.arrow.stream")
+
+def _predict_usage_batch(request: BatchPredictionRequest) -> bytes:
+    import pyarrow as pa
+    batch = forecaster.predict_record_batch(request.part_ids, request.days, request.offsets)
+    
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+def stock_priority(part_id: str, plan: Dict[str, Any], current_stock: int):
+    """Priority rule of this service: HIGH at or below the reorder point, MEDIUM within a week of it"""
+    needs_reorder = current_stock <= plan['reorder_point']
     
-    # Sort by priority
-    priority_order = {"HIGH": 0, "MEDIUM": 1, "LOW": 2}
-    recommendations.sort(key=lambda x: priority_order[x["priority"]])
+    # Calculate days until reorder
+    avg_daily_usage = plan['avg_daily_usage']
+    days_until_reorder = (current_stock - plan['reorder_point']) / avg_daily_usage if avg_daily_usage > 0 else 0
+    priority = "HIGH" if needs_reorder else "MEDIUM" if days_until_reorder < 7 else "LOW"
     
+    return PRIORITY_RANK[priority], days_until_reorder, {
+        "part_id": part_id,
+        "part_name": plan['part_name'],
+        "current_stock": current_stock,
+        "reorder_point": plan['reorder_point'],
+        "safety_stock": plan['safety_stock'],
+        "recommended_order_quantity": plan['eoq'],
+        "needs_reorder": bool(needs_reorder),
+        "days_until_reorder": round(float(days_until_reorder), 1),
+        "unit_cost": plan['unit_cost'],
+        "lead_time_days": plan['lead_time_days'],
+        "priority": priority
+    }
+
+# Recommendations re-planned only for parts whose statistics changed; stock changes
+# arrive from the stock monitor and re-rank just the affected parts
+reorder_table = ReorderTable(priority_rule=stock_priority)
+planned_models_version = None
+
+@app.get("/reorder-recommendations")
+async def get_reorder_recommendations(
+    priority: Optional[str] = Query(None, pattern="^(HIGH|MEDIUM|LOW)$", description="Only this priority"),
+    offset: int = Query(0, ge=0, description="Recommendations to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Most recommendations to return")
+):
+    """Get reorder recommendations for all parts, most urgent first (optionally filtered and paged)"""
+    if not forecaster.is_trained:
+        raise HTTPException(status_code=400, detail="Models not trained. Please train models first.")
+    
+    return await offload("reorder-recommendations", _reorder_recommendations, priority, offset, limit)
+
+def _reorder_plan(part_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        reorder_info = forecaster.calculate_reorder_point(part_id)
+        eoq_info = forecaster.calculate_eoq(part_id)
+        return {
+            "part_name": forecaster.part_stats[part_id].get('part_name', part_id),
+            "reorder_point": float(reorder_info['reorder_point']),
+            "safety_stock": float(reorder_info['safety_stock']),
+            "avg_daily_usage": float(reorder_info['avg_daily_usage']),
+            "lead_time_days": int(reorder_info['lead_time_days']),
+            "eoq": float(eoq_info['eoq']),
+            "unit_cost": float(forecaster.part_stats[part_id]['unit_cost'])
+        }
+    except Exception as e:
+        print(f"Error getting recommendation for {part_id}: {str(e)}")
+        return None
+
+def _reorder_recommendations(priority: Optional[str], offset: int, limit: Optional[int]) -> Dict[str, Any]:
+    global planned_models_version
+    
+    # Plans are checked against the models only after a (re)load; stock is kept current by the monitor
+    if planned_models_version != models_version:
+        levels = stock_monitor.levels if stock_monitor else {}
+        current_stock = {part_id: levels.get(part_id, DEFAULT_STOCK) for part_id in forecaster.models.keys()}
+        
+        # A part's plan is rebuilt when its training statistics change
+        versions = {part_id: tuple(forecaster.part_stats[part_id].values()) for part_id in current_stock}
+        reorder_table.refresh(current_stock, versions, _reorder_plan)
+        planned_models_version = models_version
+    
+    counts = reorder_table.counts()
     return {
-        "recommendations": recommendations,
-        "total_parts": len(recommendations),
-        "high_priority": len([r for r in recommendations if r["priority"] == "HIGH"]),
+        "recommendations": reorder_table.query(priority, offset, limit),
+        "total_parts": len(reorder_table),
+        "high_priority": counts["HIGH"],
         "timestamp": datetime.now().isoformat()
     }
 
 @app.post("/train")
-async def train_models(background_tasks: BackgroundTasks):
+async def train_models():
     """Train models with sample data"""
     def train_task():
+        global models_version
         try:
             # Generate sample data
             print("🔄 Generating sample data...")
@@ -177,6 +281,7 @@ async def train_models(background_tasks: BackgroundTasks):
             # Train models
             print("🔄 Training models...")
             forecaster.train_model(df)
+            models_version += 1
             
             # Save models
             print("💾 Saving models...")
@@ -187,8 +292,11 @@ async def train_models(background_tasks: BackgroundTasks):
         except Exception as e:
             print(f"❌ Training failed: {str(e)}")
     
-    # Run training in background
-    background_tasks.add_task(train_task)
+    # Run training in the background on the thread pool (one training run at a time)
+    try:
+        execution.submit("train", train_task)
+    except Saturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     
     return {
         "message": "Training started in background",
@@ -202,6 +310,9 @@ async def get_model_stats():
     if not forecaster.is_trained:
         raise HTTPException(status_code=400, detail="Models not trained. Please train models first.")
     
+    return await offload("model-stats", _model_stats)
+
+def _model_stats() -> Dict[str, Any]:
     stats = []
     for part_id, part_stats in forecaster.part_stats.items():
         stats.append({
@@ -227,6 +338,9 @@ async def get_inventory_optimization():
     if not forecaster.is_trained:
         raise HTTPException(status_code=400, detail="Models not trained. Please train models first.")
     
+    return await offload("inventory-optimization", _inventory_optimization)
+
+def _inventory_optimization() -> Dict[str, Any]:
     total_value = 0
     total_holding_cost = 0
     optimization_insights = []
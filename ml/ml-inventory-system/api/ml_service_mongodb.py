@@ -13,15 +13,21 @@ from contextlib import asynccontextmanager
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from pydantic import BaseModel
+from pydantic_core import to_json
 import uvicorn
 
 # Import our ML components
 from data_pipeline import MLDataPipeline
 from mongodb_connector import MongoDBConnector
-from prophet_forecaster import ProphetInventoryForecaster
+from async_mongodb_connector import AsyncMongoDBConnector
+from execution import ExecutionLayer, Saturated, process_workers_from_env
+from single_flight import SingleFlightCache
+from stock_monitor import StockMonitor
+from prophet_forecaster import ProphetInventoryForecaster, predict_parts, reorder_recommendations
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,10 +36,29 @@ logger = logging.getLogger(__name__)
 # Global ML pipeline
 ml_pipeline = None
 
+# Async MongoDB access for request handlers (the pipeline's pymongo connector blocks the event loop)
+mongo = None
+
+# Live stock levels by part id, followed through change streams (or polling)
+stock_monitor = None
+
+# Thread/process pools for CPU-bound handler work, so /health stays responsive under load
+execution = None
+
+# Polling dashboards share one /dashboard-data computation and a short-lived result
+dashboard_cache = SingleFlightCache(ttl_seconds=float(os.getenv('DASHBOARD_CACHE_TTL', '5')),
+                                    stale_seconds=float(os.getenv('DASHBOARD_STALE_TTL', '30')))
+
+# Parts whose stock the cached dashboard result was built from
+dashboard_parts = frozenset()
+
+# Accept header value (or ?format=columnar) selecting parallel-array predictions
+COLUMNAR_MEDIA_TYPE = "application/vnd.inventory.columnar+json"
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan"""
-    global ml_pipeline
+    global ml_pipeline, mongo, execution, stock_monitor
     
     # Startup
     logger.info("Starting ML service with MongoDB integration...")
@@ -42,6 +67,14 @@ async def lifespan(app: FastAPI):
         # Initialize ML pipeline
         mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
         ml_pipeline = MLDataPipeline(mongodb_uri=mongodb_uri)
+        mongo = AsyncMongoDBConnector(mongodb_uri)
+        # Each process worker reloads every Prophet model: a few workers, never one per core
+        execution = ExecutionLayer(process_workers=process_workers_from_env())
+        
+        # A stock change to a part on the dashboard marks the shared result stale
+        stock_monitor = StockMonitor(mongo.db.parts)
+        stock_monitor.subscribe(invalidate_dashboard)
+        await stock_monitor.start()
         
         # Try to load existing models
         if not ml_pipeline.load_models():
@@ -56,8 +89,14 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    if stock_monitor:
+        await stock_monitor.stop()
     if ml_pipeline:
         ml_pipeline.close()
+    if mongo:
+        mongo.close()
+    if execution:
+        execution.shutdown(wait=False)
     logger.info("ML service stopped")
 
 # Create FastAPI app
@@ -83,7 +122,7 @@ class PredictionRequest(BaseModel):
     days: int = 30
 
 class ReorderRequest(BaseModel):
-    currentStock: Dict[str, int]
+    currentStock: Optional[Dict[str, int]] = None  # None = live stock levels
 
 class HealthResponse(BaseModel):
     status: str
@@ -93,6 +132,10 @@ class HealthResponse(BaseModel):
     linear_models: int
     last_update: Optional[str]
     available_parts: List[str]
+    forecast_cache: Optional[Dict] = None
+    execution: Optional[Dict] = None
+    dashboard_cache: Optional[Dict] = None
+    stock: Optional[Dict] = None
 
 class PredictionResponse(BaseModel):
     part_id: str
@@ -120,6 +163,54 @@ class DashboardData(BaseModel):
     modelStats: Dict
     optimization: Dict
 
+async def pipeline_health() -> Dict:
+    """Pipeline health, with MongoDB checked by an async ping instead of a blocking one"""
+    mongodb_status = 'connected' if mongo and await mongo.ping() else 'disconnected'
+    health = ml_pipeline.get_health_status(mongodb_status=mongodb_status)
+    health['execution'] = execution.stats()
+    health['dashboard_cache'] = dashboard_cache.stats()
+    health['stock'] = stock_monitor.stats()
+    return health
+
+def too_busy(e: Saturated) -> HTTPException:
+    """429 for work the execution layer turned away"""
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def run_predictions(endpoint: str, part_ids: List[str], days: int, columnar: bool) -> List[Dict]:
+    """
+    Predictions in request order: Prophet in the process pool, then the
+    remaining parts through the pipeline's Linear Regression fallback in a thread
+    """
+    predictions = []
+    if ml_pipeline.prophet_forecaster.is_trained:
+        predictions = await execution.run(endpoint, predict_parts, ml_pipeline.models_dir,
+                                          part_ids, days, columnar, process=True)
+    
+    served = {prediction['part_id'] for prediction in predictions}
+    remaining = [part_id for part_id in part_ids if part_id not in served]
+    if remaining:
+        predictions += await execution.run(endpoint, ml_pipeline.get_predictions, remaining, days, columnar,
+                                           use_prophet=False)
+    
+    order = {part_id: i for i, part_id in enumerate(part_ids)}
+    return sorted(predictions, key=lambda prediction: order.get(prediction['part_id'], len(order)))
+
+async def run_reorder_recommendations(endpoint: str, current_stock: Dict[str, int], priority: Optional[str] = None,
+                                      offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Reorder recommendations, computed like MLDataPipeline.get_reorder_recommendations but off the event loop
+    
+    An empty Prophet page is a valid answer; only an empty unfiltered list falls back to Linear Regression.
+    """
+    if ml_pipeline.prophet_forecaster.is_trained:
+        recommendations = await execution.run(endpoint, reorder_recommendations, ml_pipeline.models_dir,
+                                              current_stock, priority, offset, limit, process=True)
+        if recommendations or priority or offset or limit:
+            return recommendations
+    
+    return await execution.run(endpoint, ml_pipeline.get_reorder_recommendations, current_stock, use_prophet=False,
+                               priority=priority, offset=offset, limit=limit)
+
 # API Endpoints
 
 @app.get("/")
@@ -144,7 +235,7 @@ async def health_check():
         if not ml_pipeline:
             raise HTTPException(status_code=503, detail="ML pipeline not initialized")
         
-        health_data = ml_pipeline.get_health_status()
+        health_data = await pipeline_health()
         return HealthResponse(**health_data)
         
     except Exception as e:
@@ -152,36 +243,64 @@ async def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/predict", response_model=List[PredictionResponse])
-async def predict_usage(request: PredictionRequest):
-    """Get usage predictions for specific parts"""
+async def predict_usage(
+    request: PredictionRequest,
+    format: Optional[str] = Query(None, description="'columnar' for parallel arrays per part"),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Get usage predictions for specific parts
+    
+    Columnar mode (`?format=columnar` or `Accept: application/vnd.inventory.columnar+json`)
+    returns each part's predictions as parallel arrays (date, predicted_usage,
+    lower_bound, upper_bound, confidence) and skips per-row model validation.
+    """
     try:
         if not ml_pipeline:
             raise HTTPException(status_code=503, detail="ML pipeline not initialized")
         
-        predictions = ml_pipeline.get_predictions(request.partIds, request.days)
+        columnar = format == "columnar" or COLUMNAR_MEDIA_TYPE in (accept or "")
+        predictions = await run_predictions("predict", request.partIds, request.days, columnar)
         
         if not predictions:
             raise HTTPException(status_code=404, detail="No predictions available")
         
+        if columnar:
+            # Plain lists/floats: serialize in one native pass, no per-row validation
+            return Response(content=to_json(predictions), media_type=COLUMNAR_MEDIA_TYPE)
+        
         return [PredictionResponse(**pred) for pred in predictions]
         
     except HTTPException:
         raise
+    except Saturated as e:
+        raise too_busy(e)
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/reorder-recommendations", response_model=List[ReorderRecommendation])
-async def get_reorder_recommendations(request: ReorderRequest):
-    """Get reorder recommendations for all parts"""
+async def get_reorder_recommendations(
+    request: ReorderRequest,
+    priority: Optional[str] = Query(None, pattern="^(HIGH|MEDIUM|LOW)$", description="Only this priority"),
+    offset: int = Query(0, ge=0, description="Recommendations to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Most recommendations to return")
+):
+    """Get reorder recommendations, most urgent first (optionally filtered and paged; live stock unless currentStock is given)"""
     try:
         if not ml_pipeline:
             raise HTTPException(status_code=503, detail="ML pipeline not initialized")
         
-        recommendations = ml_pipeline.get_reorder_recommendations(request.currentStock)
+        current_stock = request.currentStock if request.currentStock is not None else dict(stock_monitor.levels)
+        recommendations = await run_reorder_recommendations("reorder-recommendations", current_stock,
+                                                            priority, offset, limit)
         
         return [ReorderRecommendation(**rec) for rec in recommendations]
         
+    except HTTPException:
+        raise
+    except Saturated as e:
+        raise too_busy(e)
     except Exception as e:
         logger.error(f"Reorder recommendations error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -193,89 +312,120 @@ async def get_model_statistics():
         if not ml_pipeline:
             raise HTTPException(status_code=503, detail="ML pipeline not initialized")
         
-        stats = ml_pipeline.get_model_statistics()
+        stats = await execution.run("model-stats", ml_pipeline.get_model_statistics)
         return stats
         
+    except HTTPException:
+        raise
+    except Saturated as e:
+        raise too_busy(e)
     except Exception as e:
         logger.error(f"Model stats error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/retrain")
-async def retrain_models(background_tasks: BackgroundTasks):
+async def retrain_models():
     """Retrain models with latest data"""
     try:
         if not ml_pipeline:
             raise HTTPException(status_code=503, detail="ML pipeline not initialized")
         
-        # Run training in background
-        background_tasks.add_task(ml_pipeline.update_models, force_retrain=True)
+        # Run training in the background on the thread pool (one retrain at a time)
+        execution.submit("retrain", ml_pipeline.update_models, force_retrain=True)
         
         return {"message": "Model retraining started in background"}
         
+    except HTTPException:
+        raise
+    except Saturated as e:
+        raise too_busy(e)
     except Exception as e:
         logger.error(f"Retrain error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/dashboard-data", response_model=DashboardData)
 async def get_dashboard_data():
-    """Get comprehensive dashboard data"""
+    """
+    Get comprehensive dashboard data
+    
+    Concurrent requests share one computation, and the result is reused for
+    DASHBOARD_CACHE_TTL seconds (then served stale for up to DASHBOARD_STALE_TTL
+    more while a single refresh runs in the background).
+    """
     try:
         if not ml_pipeline:
             raise HTTPException(status_code=503, detail="ML pipeline not initialized")
         
-        # Get health status
-        health = ml_pipeline.get_health_status()
-        
-        # Get model statistics
-        model_stats = ml_pipeline.get_model_statistics()
-        
-        # Get reorder recommendations (with dummy current stock)
-        current_stock = {part_id: 10 for part_id in health.get('available_parts', [])}
-        recommendations = ml_pipeline.get_reorder_recommendations(current_stock)
-        
-        # Calculate summary statistics
-        total_parts = len(health.get('available_parts', []))
-        high_priority = len([r for r in recommendations if r.get('priority') == 'HIGH'])
-        
-        # Create optimization insights
-        optimization_insights = []
-        for rec in recommendations[:5]:  # Top 5 recommendations
-            optimization_insights.append({
-                'part_id': rec['part_id'],
-                'part_name': rec['part_name'],
-                'inventory_value': rec['current_stock'] * rec['unit_cost'],
-                'holding_cost_annual': rec['current_stock'] * rec['unit_cost'] * 0.2,  # 20% holding cost
-                'ordering_cost_annual': 50,  # Assume $50 ordering cost
-                'insights': [
-                    f"Reorder {rec['recommended_order_quantity']} units when stock reaches {rec['reorder_point']}",
-                    f"Lead time: {rec['lead_time_days']} days",
-                    f"Priority: {rec['priority']}"
-                ]
-            })
-        
-        dashboard_data = {
-            'health': health,
-            'recommendations': {
-                'total_parts': total_parts,
-                'high_priority': high_priority,
-                'medium_priority': len([r for r in recommendations if r.get('priority') == 'MEDIUM']),
-                'low_priority': len([r for r in recommendations if r.get('priority') == 'LOW']),
-                'recommendations': recommendations
-            },
-            'modelStats': model_stats,
-            'optimization': {
-                'total_inventory_value': sum(rec['current_stock'] * rec['unit_cost'] for rec in recommendations),
-                'total_holding_cost_annual': sum(rec['current_stock'] * rec['unit_cost'] * 0.2 for rec in recommendations),
-                'optimization_insights': optimization_insights
-            }
-        }
-        
-        return DashboardData(**dashboard_data)
+        return await dashboard_cache.get("dashboard-data", build_dashboard_data)
         
+    except HTTPException:
+        raise
+    except Saturated as e:
+        raise too_busy(e)
     except Exception as e:
         logger.error(f"Dashboard data error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def invalidate_dashboard(changes: Dict[str, Optional[int]]):
+    """Stock listener: mark the dashboard result stale when a part it shows changed"""
+    if not dashboard_parts.isdisjoint(changes):
+        dashboard_cache.invalidate("dashboard-data")
+
+async def build_dashboard_data() -> DashboardData:
+    """Compute the dashboard payload (health, model statistics, recommendations, insights)"""
+    global dashboard_parts
+    
+    # Get health status
+    health = await pipeline_health()
+    
+    # Get model statistics
+    model_stats = await execution.run("dashboard-data", ml_pipeline.get_model_statistics)
+    
+    # Get reorder recommendations for the parts with a live stock level
+    levels = stock_monitor.levels
+    dashboard_parts = frozenset(health.get('available_parts', []))
+    current_stock = {part_id: levels[part_id] for part_id in dashboard_parts if part_id in levels}
+    recommendations = await run_reorder_recommendations("dashboard-data", current_stock)
+    
+    # Calculate summary statistics
+    total_parts = len(health.get('available_parts', []))
+    high_priority = len([r for r in recommendations if r.get('priority') == 'HIGH'])
+    
+    # Create optimization insights
+    optimization_insights = []
+    for rec in recommendations[:5]:  # Top 5 recommendations
+        optimization_insights.append({
+            'part_id': rec['part_id'],
+            'part_name': rec['part_name'],
+            'inventory_value': rec['current_stock'] * rec['unit_cost'],
+            'holding_cost_annual': rec['current_stock'] * rec['unit_cost'] * 0.2,  # 20% holding cost
+            'ordering_cost_annual': 50,  # Assume $50 ordering cost
+            'insights': [
+                f"Reorder {rec['recommended_order_quantity']} units when stock reaches {rec['reorder_point']}",
+                f"Lead time: {rec['lead_time_days']} days",
+                f"Priority: {rec['priority']}"
+            ]
+        })
+    
+    dashboard_data = {
+        'health': health,
+        'recommendations': {
+            'total_parts': total_parts,
+            'high_priority': high_priority,
+            'medium_priority': len([r for r in recommendations if r.get('priority') == 'MEDIUM']),
+            'low_priority': len([r for r in recommendations if r.get('priority') == 'LOW']),
+            'recommendations': recommendations
+        },
+        'modelStats': model_stats,
+        'optimization': {
+            'total_inventory_value': sum(rec['current_stock'] * rec['unit_cost'] for rec in recommendations),
+            'total_holding_cost_annual': sum(rec['current_stock'] * rec['unit_cost'] * 0.2 for rec in recommendations),
+            'optimization_insights': optimization_insights
+        }
+    }
+    
+    return DashboardData(**dashboard_data)
+
 @app.get("/test")
 async def test_endpoint():
     """Test endpoint for basic functionality"""
@@ -283,7 +433,7 @@ async def test_endpoint():
         if not ml_pipeline:
             return {"status": "error", "message": "ML pipeline not initialized"}
         
-        health = ml_pipeline.get_health_status()
+        health = await pipeline_health()
         return {
             "status": "success",
             "message": "ML service is running",
@@ -0,0 +1,106 @@
+"""
+Benchmark dict-per-document vs streaming columnar ingestion of usage logs
+Usage: python benchmarks/bench_columnar_ingest.py --logs 1000000 --parts 2000 --batch-size 10000
+
+Documents come from a generator shaped like a populated partusagelogs cursor,
+so the numbers cover client-side ingestion only (no database in the loop).
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from columnar_reader import iter_record_batches, read_columnar
+from mongodb_connector import USAGE_LOG_COLUMNS, sum_daily_usage
+
+
+def usage_cursor(logs, parts, seed=5):
+    """Yield usage log documents one at a time, like a cursor"""
+    rng = np.random.default_rng(seed)
+    part_docs = [{'_id': f"{i:024x}", 'name': f"Part {i}", 'partCode': f"P-{i:05d}", 'unitCost': float(i % 300) + 0.5}
+                 for i in range(parts)]
+    user = {'_id': 'u' * 24, 'name': 'Technician'}
+    start = datetime(2024, 1, 1)
+    picks = rng.integers(0, parts, logs)
+    quantities = rng.integers(1, 10, logs)
+    for i in range(logs):
+        yield {
+            '_id': i,
+            'partId': part_docs[picks[i]],
+            'quantityUsed': int(quantities[i]),
+            'usedBy': user,
+            'usedAt': start + timedelta(seconds=i * 30),
+            'note': ''
+        }
+
+
+def legacy_dicts(cursor):
+    """Reference: the previous one-dict-per-document ingestion"""
+    data = []
+    for log in cursor:
+        data.append({
+            'date': log['usedAt'],
+            'part_id': log.get('partId', {}).get('_id', 'unknown'),
+            'part_name': log.get('partId', {}).get('name', 'Unknown Part'),
+            'part_code': log.get('partId', {}).get('partCode', ''),
+            'quantity_used': log.get('quantityUsed', 0),
+            'unit_cost': log.get('partId', {}).get('unitCost', 0),
+            'used_by': log.get('usedBy', {}).get('name', 'Unknown'),
+            'note': log.get('note', '')
+        })
+    df = pd.DataFrame(data)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def streaming_daily(cursor, batch_size):
+    """Daily totals reduced batch by batch, as MongoDBConnector.get_daily_usage_from_logs does"""
+    return sum_daily_usage(iter_record_batches(cursor, USAGE_LOG_COLUMNS, batch_size))
+
+
+def measure(fn):
+    """Wall time of fn(), then peak traced allocation (MB) from a second, traced run"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logs', type=int, default=1_000_000)
+    parser.add_argument('--parts', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{args.logs:,} usage logs, {args.parts:,} parts, batch size {args.batch_size:,}")
+
+    cursor = lambda: usage_cursor(args.logs, args.parts)
+    legacy, legacy_s, legacy_mb = measure(lambda: legacy_dicts(cursor()))
+    columnar, columnar_s, columnar_mb = measure(lambda: read_columnar(cursor(), USAGE_LOG_COLUMNS, args.batch_size))
+    daily, daily_s, daily_mb = measure(lambda: streaming_daily(cursor(), args.batch_size))
+
+    pd.testing.assert_frame_equal(legacy, columnar, check_dtype=False)
+    expected = legacy.assign(date=legacy['date'].dt.normalize()).groupby(
+        ['date', 'part_id', 'part_name'], sort=False)['quantity_used'].sum()
+    assert (daily.set_index(['date', 'part_id', 'part_name'])['quantity_used'].sort_index() == expected.sort_index()).all()
+
+    print(f"  list of dicts -> DataFrame   {legacy_s:7.2f}s  peak {legacy_mb:8.1f} MB")
+    print(f"  read_columnar                {columnar_s:7.2f}s  peak {columnar_mb:8.1f} MB")
+    print(f"  streaming daily totals       {daily_s:7.2f}s  peak {daily_mb:8.1f} MB  ({len(daily):,} rows)")
+
+
+if __name__ == "__main__":
+    main()
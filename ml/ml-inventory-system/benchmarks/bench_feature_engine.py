@@ -0,0 +1,99 @@
+"""
+Benchmark incremental feature updates against recomputing features over the full history
+(and keeping the training window in memory against reading it back from the store)
+Usage: python benchmarks/bench_feature_engine.py --parts 5000 --days 365 --new-days 5
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mongodb_connector import build_ml_training_dataset
+from feature_engine import (IncrementalFeatureEngine, add_seasonal_features, add_trend_features, clean_usage_rows,
+                            merge_feature_rows)
+from usage_schema import compact_usage_frame
+
+
+def usage_rows(parts, days, seed=3):
+    """Sparse daily usage (about 30% of part-days without usage), as get_daily_usage_data returns it"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2025-01-01', periods=days, freq='D')
+    usage = pd.DataFrame({'date': np.repeat(dates.values, parts),
+                          'part_id': np.tile([f"PART-{i:05d}" for i in range(parts)], days),
+                          'part_name': np.tile([f"Part {i}" for i in range(parts)], days),
+                          'quantity_used': rng.poisson(5, parts * days).astype(float),
+                          'unit_cost': 10.0})
+    inventory = pd.DataFrame({'part_id': usage['part_id'].unique(), 'current_stock': 50.0,
+                              'min_stock': 5.0, 'lead_time_days': 7.0})
+    return usage[rng.random(len(usage)) > 0.3], inventory, dates
+
+
+def full_recompute(dataset):
+    """Reference: MLDataPipeline._preprocess_data over the whole history, in the stored (compact) schema"""
+    return compact_usage_frame(add_seasonal_features(add_trend_features(clean_usage_rows(dataset))), label=None)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--parts', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--new-days', type=int, default=5)
+    args = parser.parse_args()
+
+    usage, inventory, dates = usage_rows(args.parts, args.days)
+    first_new = dates[-args.new_days]
+    root = tempfile.mkdtemp(prefix='feature_state_')
+    try:
+        engine = IncrementalFeatureEngine(root)
+        start = time.perf_counter()
+        window = engine.rebuild(build_ml_training_dataset(usage[usage['date'] < first_new].copy(), inventory))
+        rebuild_s = time.perf_counter() - start
+
+        update_s, merge_s = [], []
+        for day in dates[-args.new_days:]:
+            # Each run re-sends the last processed day (its totals may have grown) with the new one
+            rows = usage[(usage['date'] >= engine.through) & (usage['date'] <= day)]
+            dataset = build_ml_training_dataset(rows.copy(), inventory)
+            start = time.perf_counter()
+            new_rows = engine.update(dataset)
+            update_s.append(time.perf_counter() - start)
+            # As MLDataPipeline keeps its training window between runs
+            start = time.perf_counter()
+            window = merge_feature_rows(window, new_rows)
+            merge_s.append(time.perf_counter() - start)
+
+        dataset = build_ml_training_dataset(usage.copy(), inventory)
+        start = time.perf_counter()
+        expected = full_recompute(dataset).sort_values(['date', 'part_id'], ignore_index=True)
+        full_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = IncrementalFeatureEngine(root).features()
+        read_s = time.perf_counter() - start
+        pd.testing.assert_frame_equal(window, got, check_categorical=False)
+        for column in expected.columns:
+            if expected[column].dtype.kind in 'fiu':
+                assert np.allclose(expected[column].to_numpy(float), got[column].to_numpy(float),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True), f"{column} diverges from a full recompute"
+        assert len(got) == len(expected)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(f"{args.parts} parts x {args.days} days = {len(expected):,} rows")
+    print(f"  first rebuild (incl. write):  {rebuild_s:8.3f}s")
+    print(f"  full recompute (in memory):   {full_s:8.3f}s")
+    print(f"  update, one new day:          {np.median(update_s):8.3f}s  (median of {len(update_s)})")
+    print(f"  window: merge new rows:       {np.median(merge_s):8.3f}s")
+    print(f"  window: read from the store:  {read_s:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark the inventory enrichment stage of create_ml_training_dataset
+Usage: python benchmarks/bench_inventory_join.py --rows 10000000 --parts 5000
+
+The legacy per-row .loc loop is timed on --loop-rows rows and extrapolated
+linearly (running it on 10M rows would take hours).
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mongodb_connector import enrich_with_inventory
+
+
+def synthetic_daily_usage(rows, parts, seed=7):
+    rng = np.random.default_rng(seed)
+    part_ids = np.array([f"P{i:06d}" for i in range(parts)], dtype=object)
+    return pd.DataFrame({
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D'),
+        'part_id': part_ids[rng.integers(0, parts, rows)],
+        'part_name': 'Part',
+        'quantity_used': rng.poisson(5, rows),
+        'unit_cost': rng.uniform(1, 200, rows)
+    })
+
+
+def synthetic_inventory(parts, coverage=0.9, seed=11):
+    """Inventory for a fraction of the parts, so some rows fall back to defaults"""
+    rng = np.random.default_rng(seed)
+    known = rng.choice(parts, int(parts * coverage), replace=False)
+    return pd.DataFrame({
+        'part_id': [f"P{i:06d}" for i in known],
+        'current_stock': rng.integers(0, 500, len(known)),
+        'min_stock': rng.integers(0, 50, len(known)),
+        'lead_time_days': rng.integers(1, 30, len(known))
+    })
+
+
+def legacy_loop(daily_usage, inventory_df):
+    """Reference: the previous per-row enrichment loop"""
+    inventory_lookup = inventory_df.set_index('part_id')[['current_stock', 'min_stock', 'lead_time_days']].to_dict('index')
+    for idx, row in daily_usage.iterrows():
+        part_id = row['part_id']
+        if part_id in inventory_lookup:
+            daily_usage.loc[idx, 'current_stock'] = inventory_lookup[part_id]['current_stock']
+            daily_usage.loc[idx, 'min_stock'] = inventory_lookup[part_id]['min_stock']
+            daily_usage.loc[idx, 'lead_time_days'] = inventory_lookup[part_id]['lead_time_days']
+        else:
+            daily_usage.loc[idx, 'current_stock'] = 0
+            daily_usage.loc[idx, 'min_stock'] = 0
+            daily_usage.loc[idx, 'lead_time_days'] = 7
+    return daily_usage
+
+
+def measure(fn, *args):
+    """Wall time and peak traced allocation (MB) of fn(*args)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--parts', type=int, default=5000)
+    parser.add_argument('--loop-rows', type=int, default=20_000)
+    args = parser.parse_args()
+
+    inventory = synthetic_inventory(args.parts)
+    usage = synthetic_daily_usage(args.rows, args.parts)
+    print(f"{args.rows:,} usage rows, {args.parts:,} parts ({len(inventory):,} with inventory)")
+
+    sample = usage.head(args.loop_rows)
+    legacy, loop_s, loop_mb = measure(legacy_loop, sample.copy(), inventory)
+    expected = enrich_with_inventory(sample.copy(), inventory)
+    pd.testing.assert_frame_equal(legacy, expected)
+
+    _, merge_s, merge_mb = measure(enrich_with_inventory, usage, inventory)
+    loop_full_s = loop_s * args.rows / args.loop_rows
+
+    print(f"  legacy loop ({args.loop_rows:,} rows): {loop_s:8.2f}s  peak {loop_mb:8.1f} MB")
+    print(f"  legacy loop (extrapolated):   {loop_full_s:8.0f}s  (~{loop_full_s / 3600:.1f} h)")
+    print(f"  enrich_with_inventory:        {merge_s:8.2f}s  peak {merge_mb:8.1f} MB  ({loop_full_s / merge_s:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
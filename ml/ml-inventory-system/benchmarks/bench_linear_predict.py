@@ -0,0 +1,71 @@
+"""
+Benchmark batched linear predictions against the per-day DataFrame loop
+Usage: python benchmarks/bench_linear_predict.py --days 365
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from linear_model import InventoryForecaster
+from enhanced_data_generator import generate_all_parts_data
+
+
+def per_day_loop(forecaster, part_id, days):
+    """Reference: the previous predict_next_days (one DataFrame + model.predict per day)"""
+    model = forecaster.models[part_id]
+    avg = forecaster.part_stats[part_id]['avg_usage']
+    _, X = forecaster.horizon_features(days)
+    preds = []
+    for row in X:
+        features = dict(zip(forecaster.FEATURE_COLS, row))
+        features.update({name: avg for name in forecaster.PROXY_FEATURES})
+        preds.append(max(0, model.predict(pd.DataFrame([features]))[0]))
+    return np.array(preds)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    forecaster = InventoryForecaster()
+    forecaster.train_model(generate_all_parts_data())
+    part_ids = list(forecaster.models.keys())
+
+    start = time.perf_counter()
+    expected = np.vstack([per_day_loop(forecaster, p, args.days) for p in part_ids])
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        _, _, batched = forecaster.predict_many(part_ids, args.days)
+    batch_s = (time.perf_counter() - start) / args.repeat
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        forecaster.predict_next_days_batch(part_ids, args.days)
+    batch_dicts_s = (time.perf_counter() - start) / args.repeat
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        forecaster.predict_record_batch(part_ids, args.days)
+    record_batch_s = (time.perf_counter() - start) / args.repeat
+
+    assert np.allclose(expected, batched), "batched predictions diverge from the per-day loop"
+    print(f"{len(part_ids)} parts x {args.days} days")
+    print(f"  per-day loop:          {loop_s:8.3f}s")
+    print(f"  predict_many (array):  {batch_s:8.4f}s  ({loop_s / batch_s:,.0f}x)")
+    print(f"  batch incl. dicts:     {batch_dicts_s:8.4f}s  ({loop_s / batch_dicts_s:,.0f}x)")
+    print(f"  Arrow record batch:    {record_batch_s:8.4f}s  ({loop_s / record_batch_s:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
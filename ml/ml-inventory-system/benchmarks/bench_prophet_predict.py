@@ -0,0 +1,70 @@
+"""
+Benchmark full-history vs future-only Prophet prediction
+Usage: python benchmarks/bench_prophet_predict.py --days 30
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from prophet_forecaster import ProphetInventoryForecaster, future_dates_frame, predict_frame
+from enhanced_data_generator import generate_all_parts_data
+
+
+def history_plus_future(model, days):
+    """Reference: the previous predict path (score history + horizon, keep the tail)"""
+    future = model.make_future_dataframe(periods=days)
+    future['is_business_day'] = (future['ds'].dt.weekday < 5).astype(int)
+    return model.predict(future).tail(days)
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--parts', type=int, default=3)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+    df = generate_all_parts_data()
+    df = df[df['part_id'].isin(df['part_id'].unique()[:args.parts])]
+    forecaster = ProphetInventoryForecaster(tempfile.mkdtemp())
+    forecaster.train_model(df)
+
+    totals = np.zeros(3)
+    for part_id, model in forecaster.models.items():
+        full_s, full = timed(lambda: history_plus_future(model, args.days), args.repeat)
+        future_s, future = timed(lambda: predict_frame(model, future_dates_frame(model, args.days)), args.repeat)
+        point_s, point = timed(lambda: predict_frame(model, future_dates_frame(model, args.days), False), args.repeat)
+        totals += (full_s, future_s, point_s)
+
+        assert (full['ds'].values == future['ds'].values).all()
+        assert np.allclose(full['yhat'].values, future['yhat'].values)
+        assert np.allclose(full['yhat'].values, point['yhat'].values)
+
+    n = len(forecaster.models)
+    rows = len(model.history) + args.days
+    print(f"{n} parts, {args.days}-day horizon ({rows} rows scored per part before)")
+    print(f"  history + future:         {totals[0] / n * 1000:8.1f} ms/part")
+    print(f"  future only:              {totals[1] / n * 1000:8.1f} ms/part  ({totals[0] / totals[1]:4.1f}x)")
+    print(f"  future only, no intervals:{totals[2] / n * 1000:8.1f} ms/part  ({totals[0] / totals[2]:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
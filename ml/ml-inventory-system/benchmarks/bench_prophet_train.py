@@ -0,0 +1,47 @@
+"""
+Benchmark serial vs process-pool Prophet training
+Usage: python benchmarks/bench_prophet_train.py --parts 16 --jobs 1 4 8
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from prophet_forecaster import ProphetInventoryForecaster
+from enhanced_data_generator import generate_all_parts_data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--parts', type=int, default=16)
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--chunk-size', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+    df = generate_all_parts_data()
+    df = df[df['part_id'].isin(df['part_id'].unique()[:args.parts])]
+
+    print(f"{df['part_id'].nunique()} parts, {os.cpu_count()} cores")
+    baseline = None
+    for n_jobs in args.jobs:
+        forecaster = ProphetInventoryForecaster(tempfile.mkdtemp(), n_jobs=n_jobs)
+        start = time.perf_counter()
+        forecaster.train_model(df, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        fit_times = [r['seconds'] for r in forecaster.training_report.values()]
+        failed = sum(1 for r in forecaster.training_report.values() if r['error'])
+        print(f"  n_jobs={n_jobs:<3} {elapsed:7.2f}s  ({baseline / elapsed:4.1f}x)  "
+              f"sum of per-part fits {sum(fit_times):7.2f}s  failed={failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark closed-form trend features against the per-window pandas rolling/polyfit code
+Usage: python benchmarks/bench_trend_features.py --parts 5000 --days 365
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from trend_features import rolling_trend_features
+
+
+def usage_frame(parts, days, integer=True, seed=7):
+    """Date-major daily usage like create_ml_training_dataset returns (rows sorted by date, then part)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01', periods=days, freq='D')
+    part_ids = np.array([f"PART-{i:05d}" for i in range(parts)])
+    quantities = rng.poisson(rng.uniform(1, 20, parts), size=(days, parts)).ravel().astype(float)
+    if not integer:
+        quantities *= rng.uniform(0.5, 1.5, quantities.size)
+    return pd.DataFrame({'date': np.repeat(dates.values, parts), 'part_id': np.tile(part_ids, days),
+                         'quantity_used': quantities})
+
+
+def pandas_reference(df):
+    """Reference: the previous MLDataPipeline._add_trend_features"""
+    out = {}
+    for window in [7, 14, 30]:
+        out[f'usage_ma_{window}'] = df.groupby('part_id')['quantity_used'].transform(
+            lambda x: x.rolling(window=window, min_periods=1).mean()
+        )
+    out['usage_trend_7d'] = df.groupby('part_id')['quantity_used'].transform(
+        lambda x: x.rolling(window=7, min_periods=1).apply(
+            lambda y: np.polyfit(range(len(y)), y, 1)[0] if len(y) > 1 else 0
+        )
+    )
+    out['usage_volatility'] = df.groupby('part_id')['quantity_used'].transform(
+        lambda x: x.rolling(window=14, min_periods=1).std()
+    )
+    return out
+
+
+def check(expected, got):
+    for name, values in expected.items():
+        assert np.allclose(values.to_numpy(), got[name], rtol=1e-9, atol=1e-9, equal_nan=True), \
+            f"{name} diverges from the pandas reference"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--parts', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--reference-parts', type=int, default=200,
+                        help='Parts the pandas reference is timed on (its per-row cost is linear)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # Parity on non-integer usage and a shuffled row order as well
+    small = usage_frame(40, 60, integer=False).sample(frac=1, random_state=1).reset_index(drop=True)
+    check(pandas_reference(small), rolling_trend_features(small['part_id'], small['quantity_used']))
+
+    df = usage_frame(args.parts, args.days)
+    reference_parts = min(args.reference_parts, args.parts)
+    subset = df[df['part_id'].isin(df['part_id'].unique()[:reference_parts])]
+
+    start = time.perf_counter()
+    expected = pandas_reference(subset)
+    reference_s = time.perf_counter() - start
+    check(expected, rolling_trend_features(subset['part_id'], subset['quantity_used']))
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        rolling_trend_features(df['part_id'].to_numpy(), df['quantity_used'].to_numpy())
+    closed_form_s = (time.perf_counter() - start) / args.repeat
+
+    per_row_reference = reference_s / len(subset)
+    per_row_closed_form = closed_form_s / len(df)
+    print(f"{args.parts} parts x {args.days} days = {len(df):,} rows")
+    print(f"  pandas rolling/polyfit: {reference_s:8.2f}s for {len(subset):,} rows"
+          f"  ({per_row_reference * 1e6:.2f} us/row)")
+    print(f"  closed form:            {closed_form_s:8.3f}s for {len(df):,} rows"
+          f"  ({per_row_closed_form * 1e6:.3f} us/row)")
+    print(f"  speedup per row:        {per_row_reference / per_row_closed_form:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark raw vs server-side aggregated usage fetch in MongoDBConnector
+Usage: python benchmarks/bench_usage_fetch.py --logs 60000 --parts 10 --days 60
+
+Runs against an in-process mongomock database, so only returned documents and
+their BSON size (what a real server would send over the wire) are reported;
+mongomock's pipeline timings say nothing about a real server. Both fetch modes
+must build the same training dataset.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+
+import bson
+import mongomock
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mongodb_connector import MongoDBConnector, daily_usage_pipeline
+
+
+def seed(db, logs, parts, days, seed=3):
+    """Parts plus usage logs spread over the last `days` days"""
+    rng = np.random.default_rng(seed)
+    part_docs = [{
+        '_id': bson.ObjectId(),
+        'name': f"Part {i}",
+        'partCode': f"P-{i:04d}",
+        'unitCost': float(rng.uniform(5, 300)),
+        'currentStock': int(rng.integers(0, 500)),
+        'minStock': int(rng.integers(0, 50)),
+        'leadTimeDays': int(rng.integers(1, 30))
+    } for i in range(parts)]
+    db.parts.insert_many(part_docs)
+
+    now = datetime.now()
+    offsets = rng.uniform(0, days - 1, logs)
+    picks = rng.integers(0, parts, logs)
+    quantities = rng.integers(1, 10, logs)
+    user = {'_id': bson.ObjectId(), 'name': 'Technician'}
+    # The raw reader expects partId populated with the part document
+    db.partusagelogs.insert_many([{
+        'partId': {key: part_docs[p][key] for key in ('_id', 'name', 'partCode', 'unitCost')},
+        'quantityUsed': int(q),
+        'usedBy': user,
+        'usedAt': now - timedelta(days=float(o)),
+        'note': 'Used on service job'
+    } for p, q, o in zip(picks, quantities, offsets)])
+
+
+def bson_bytes(docs):
+    return sum(len(bson.encode(doc)) for doc in docs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logs', type=int, default=60_000)
+    parser.add_argument('--parts', type=int, default=10)
+    parser.add_argument('--days', type=int, default=60)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    client = mongomock.MongoClient()
+    connector = MongoDBConnector(client=client)
+    seed(connector.db, args.logs, args.parts, args.days)
+    print(f"{args.logs:,} usage logs, {args.parts} parts, {args.days} days")
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=args.days)
+    raw_docs = list(connector.db.partusagelogs.find({'usedAt': {'$gte': start_date, '$lte': end_date}}))
+    agg_docs = list(connector.db.partusagelogs.aggregate(daily_usage_pipeline(start_date, end_date)))
+    raw_bytes, agg_bytes = bson_bytes(raw_docs), bson_bytes(agg_docs)
+
+    results = {}
+    for mode in MongoDBConnector.USAGE_FETCH_MODES:
+        connector.usage_fetch_mode = mode
+        results[mode] = connector.create_ml_training_dataset(args.days)
+
+    key = ['date', 'part_id']
+    raw = results['raw'].sort_values(key).reset_index(drop=True)
+    agg = results['aggregate'].sort_values(key).reset_index(drop=True)
+    raw['part_id'] = raw['part_id'].astype(str)
+    pd.testing.assert_series_equal(raw['quantity_used'], agg['quantity_used'], check_dtype=False)
+    assert (raw['part_id'] == agg['part_id']).all() and (raw['date'] == agg['date']).all()
+
+    print(f"  raw        {len(raw_docs):>10,} docs  {raw_bytes / 1e6:8.1f} MB")
+    print(f"  aggregate  {len(agg_docs):>10,} docs  {agg_bytes / 1e6:8.1f} MB")
+    print(f"  {len(raw_docs) / len(agg_docs):.0f}x fewer documents, {raw_bytes / agg_bytes:.0f}x fewer bytes")
+    print(f"  aggregate rows with inventory stock: {(agg['current_stock'] > 0).mean():.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark the compact usage schema: memory per column before and after casting, and value parity
+Usage: python benchmarks/bench_usage_schema.py --parts 5000 --days 365
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mongodb_connector import build_ml_training_dataset
+from trend_features import rolling_trend_features
+from usage_schema import compact_usage_frame, join_part_dimension, memory_mb, split_part_dimension
+
+
+def wide_dataset(parts, days, seed=5):
+    """create_ml_training_dataset rows in the previous wide schema (object strings, int64, float64)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01', periods=days, freq='D')
+    part_ids = np.array([f"PART-{i:05d}" for i in range(parts)])
+    usage = pd.DataFrame({'date': np.repeat(dates.values, parts), 'part_id': np.tile(part_ids, days),
+                          'part_name': np.tile([f"Automotive part number {i}" for i in range(parts)], days),
+                          'quantity_used': rng.poisson(rng.uniform(1, 20, parts), size=(days, parts)).ravel(),
+                          'unit_cost': np.tile(rng.uniform(5, 400, parts).round(2), days)})
+    inventory = pd.DataFrame({'part_id': part_ids, 'current_stock': 50.0, 'min_stock': 5.0, 'lead_time_days': 7.0})
+    compact = build_ml_training_dataset(usage, inventory)
+
+    wide = {}
+    for column in compact.columns:
+        values = compact[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            wide[column] = values.astype(object)
+        elif values.dtype.kind in 'iu':
+            wide[column] = values.astype(np.int64)
+        elif values.dtype.kind == 'f':
+            wide[column] = values.astype(np.float64)
+        else:
+            wide[column] = values
+    return pd.DataFrame(wide)
+
+
+def column_mb(df):
+    return df.memory_usage(deep=True, index=False) / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--parts', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args()
+
+    wide = wide_dataset(args.parts, args.days)
+    start = time.perf_counter()
+    compact = compact_usage_frame(wide, label=None)
+    cast_s = time.perf_counter() - start
+    rows, parts = split_part_dimension(compact)
+
+    # Same values: identifiers and integers exactly, floats to float32 precision
+    for column in wide.columns:
+        if wide[column].dtype == object:
+            assert (compact[column].astype(object) == wide[column]).all(), column
+        elif wide[column].dtype.kind in 'iu':
+            assert (compact[column].to_numpy(np.int64) == wide[column].to_numpy()).all(), column
+        elif wide[column].dtype.kind == 'f':
+            assert np.allclose(compact[column].to_numpy(float), wide[column].to_numpy(), rtol=1e-6, atol=1e-6), column
+    joined = join_part_dimension(rows, parts)
+    assert (joined['part_name'].astype(object) == wide['part_name']).all()
+    expected = rolling_trend_features(wide['part_id'].to_numpy(), wide['quantity_used'].to_numpy())
+    got = rolling_trend_features(compact['part_id'].to_numpy(), compact['quantity_used'].to_numpy())
+    for name, values in expected.items():
+        assert np.array_equal(values, got[name], equal_nan=True), name
+
+    before, after = column_mb(wide), column_mb(compact)
+    print(f"{args.parts} parts x {args.days} days = {len(wide):,} rows (cast in {cast_s:.2f}s)")
+    print(f"  {'column':<18} {'before MB':>10} {'after MB':>10}  dtype")
+    for column in wide.columns:
+        print(f"  {column:<18} {before[column]:10.1f} {after[column]:10.1f}  {compact[column].dtype}")
+
+    total_before, total_after = memory_mb(wide), memory_mb(compact)
+    split_mb = memory_mb(rows) + memory_mb(parts)
+    totals = {'wide': total_before, 'compact': total_after, 'compact + part table': split_mb}
+    print(f"  {'total':<18} {total_before:10.1f} {total_after:10.1f}  ({total_before / total_after:.1f}x smaller)")
+    print(f"  rows + part table: {memory_mb(rows):.1f} MB + {memory_mb(parts):.2f} MB")
+    for name, mb in totals.items():
+        print(f"  100M rows, {name:<22} ~{mb / len(wide) * 1e8 / 1024:6.1f} GB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark re-reading the usage window vs incremental sync into the local usage store
+Usage: python benchmarks/bench_usage_sync.py --logs 100000 --parts 50 --new-logs 200
+
+Runs against an in-process mongomock database. A year of logs is loaded once,
+then --new-logs logs (about an hour of activity) arrive before the next refresh.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import bson
+import mongomock
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mongodb_connector import MongoDBConnector
+from usage_store import UsageStore
+
+
+def object_id(created, rng):
+    """ObjectId made at `created` (a log inserted when it was used), unique like a client-made one"""
+    return bson.ObjectId(int(created.timestamp()).to_bytes(4, 'big') + rng.bytes(8))
+
+
+def usage_logs(count, part_ids, newest, span, rng):
+    """Logs with ObjectId part references, inserted in usedAt order"""
+    offsets = np.sort(rng.uniform(0, span.total_seconds(), count))[::-1]
+    return [{
+        '_id': object_id(newest - timedelta(seconds=float(o)), rng),
+        'partId': part_ids[p],
+        'quantityUsed': int(q),
+        'usedBy': bson.ObjectId(),
+        'usedAt': newest - timedelta(seconds=float(o))
+    } for p, q, o in zip(rng.integers(0, len(part_ids), count), rng.integers(1, 10, count), offsets)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logs', type=int, default=100_000)
+    parser.add_argument('--parts', type=int, default=50)
+    parser.add_argument('--new-logs', type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    rng = np.random.default_rng(9)
+
+    connector = MongoDBConnector(client=mongomock.MongoClient(), usage_fetch_mode='raw')
+    part_ids = [bson.ObjectId() for _ in range(args.parts)]
+    now = datetime.now()
+    connector.db.partusagelogs.insert_many(usage_logs(args.logs, part_ids, now - timedelta(hours=1),
+                                                      timedelta(days=364), rng))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = UsageStore(os.path.join(tmp, 'usage_store'))
+        initial, initial_s = timed(lambda: store.sync(connector))
+
+        connector.db.partusagelogs.insert_many(usage_logs(args.new_logs, part_ids, now, timedelta(hours=1), rng))
+
+        _, reread_s = timed(lambda: connector.get_daily_usage_from_logs(365))
+        fetched, sync_s = timed(lambda: store.sync(connector))
+        daily, read_s = timed(lambda: store.daily_usage(365))
+        resynced, resync_s = timed(lambda: store.sync(connector, full=True))
+
+        expected = connector.get_daily_usage_from_logs(365)
+        key = ['date', 'part_id', 'part_name']
+        pd.testing.assert_frame_equal(daily.sort_values(key, ignore_index=True),
+                                      expected.sort_values(key, ignore_index=True), check_dtype=False)
+
+    total = args.logs + args.new_logs
+    print(f"{total:,} usage logs, {args.parts} parts; {args.new_logs} new since the last refresh")
+    print(f"  re-read 365 days from MongoDB       {total:>9,} logs  {reread_s:7.2f}s")
+    print(f"  incremental sync (past watermark)   {fetched:>9,} logs  {sync_s:7.2f}s")
+    print(f"  daily totals from the local store                    {read_s:7.2f}s")
+    print(f"  first sync / full resync            {initial:>9,} / {resynced:,} logs  {initial_s:.2f}s / {resync_s:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
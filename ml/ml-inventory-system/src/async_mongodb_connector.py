@@ -0,0 +1,234 @@
+"""
+Async MongoDB Connector for ML Inventory System
+motor-based counterpart of MongoDBConnector for the FastAPI services, so queries never block the event loop
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+import pandas as pd
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from columnar_reader import DEFAULT_BATCH_SIZE, aiter_record_batches, aread_columnar, projection
+from mongodb_connector import (DAILY_USAGE_COLUMNS, PART_COLUMNS, PURCHASE_ORDER_ITEM_COLUMNS, SUPPLIER_COLUMNS,
+                               USAGE_LOG_COLUMNS, MongoDBConnector, build_ml_training_dataset,
+                               combine_daily_usage, daily_usage_partial, daily_usage_pipeline, database_name,
+                               purchase_order_items_pipeline)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AsyncMongoDBConnector:
+    """
+    Async access to the inventory data, with the same methods and results as MongoDBConnector
+
+    Every fetch is a coroutine; create_ml_training_dataset runs its collection reads
+    concurrently and builds the features in a worker thread.
+    """
+
+    USAGE_FETCH_MODES = MongoDBConnector.USAGE_FETCH_MODES
+
+    def __init__(self, connection_string: str = None, usage_fetch_mode: str = None,
+                 client: Optional[AsyncIOMotorClient] = None, batch_size: int = None):
+        """
+        Create the client (motor connects lazily; await connect() to check the server)
+
+        Args:
+            connection_string: MongoDB connection string
+                              Default: Uses environment variable MONGODB_URI or localhost
+            usage_fetch_mode: 'aggregate' or 'raw', as for MongoDBConnector
+                              Default: USAGE_FETCH_MODE or 'aggregate'
+            client: Motor client to use instead of opening one
+            batch_size: Documents per cursor batch and per columnar record batch
+                        Default: MONGODB_BATCH_SIZE or 10000
+        """
+        self.connection_string = connection_string or os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+        self.usage_fetch_mode = usage_fetch_mode or os.getenv('USAGE_FETCH_MODE', 'aggregate')
+        if self.usage_fetch_mode not in self.USAGE_FETCH_MODES:
+            raise ValueError(f"usage_fetch_mode must be one of {self.USAGE_FETCH_MODES}, got {self.usage_fetch_mode!r}")
+        self.batch_size = batch_size or int(os.getenv('MONGODB_BATCH_SIZE', str(DEFAULT_BATCH_SIZE)))
+        self.client = client or AsyncIOMotorClient(self.connection_string, serverSelectionTimeoutMS=5000)
+        self.db = self.client[database_name(self.connection_string)]
+
+    async def connect(self):
+        """Check that the server is reachable (raises like MongoDBConnector.connect)"""
+        await self.client.admin.command('ping')
+        logger.info(f"Connected to MongoDB database: {self.db.name}")
+
+    async def ping(self) -> bool:
+        """True if the server answers a ping"""
+        try:
+            await self.client.admin.command('ping')
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _window(days_back: int):
+        end_date = datetime.now()
+        return end_date - timedelta(days=days_back), end_date
+
+    def iter_parts_usage_batches(self, days_back: int = 365, batch_size: int = None) -> AsyncIterator[pd.DataFrame]:
+        """Async iterator of raw usage log record batches (see MongoDBConnector.iter_parts_usage_batches)"""
+        batch_size = batch_size or self.batch_size
+        start_date, end_date = self._window(days_back)
+        usage_logs = self.db.partusagelogs.find(
+            {'usedAt': {'$gte': start_date, '$lte': end_date}},
+            projection(USAGE_LOG_COLUMNS)
+        ).sort('usedAt', 1).batch_size(batch_size)
+        return aiter_record_batches(usage_logs, USAGE_LOG_COLUMNS, batch_size)
+
+    async def get_parts_usage_data(self, days_back: int = 365) -> pd.DataFrame:
+        """Fetch raw parts usage logs (see MongoDBConnector.get_parts_usage_data)"""
+        try:
+            batches = [batch async for batch in self.iter_parts_usage_batches(days_back)]
+
+            if not batches:
+                logger.warning("No usage data found in MongoDB")
+                return pd.DataFrame()
+
+            df = pd.concat(batches, ignore_index=True)
+            logger.info(f"Fetched {len(df)} usage records from MongoDB")
+            return df
+
+        except Exception as e:
+            logger.error(f"Error fetching usage data: {e}")
+            return pd.DataFrame()
+
+    async def get_daily_usage_from_logs(self, days_back: int = 365) -> pd.DataFrame:
+        """Sum raw usage logs into daily totals batch by batch (see MongoDBConnector.get_daily_usage_from_logs)"""
+        try:
+            daily = combine_daily_usage([daily_usage_partial(batch)
+                                         async for batch in self.iter_parts_usage_batches(days_back)])
+
+            if daily.empty:
+                logger.warning("No usage data found in MongoDB")
+                return pd.DataFrame()
+
+            logger.info(f"Summed usage logs into {len(daily)} daily totals")
+            return daily
+
+        except Exception as e:
+            logger.error(f"Error fetching usage data: {e}")
+            return pd.DataFrame()
+
+    async def get_daily_usage_data(self, days_back: int = 365) -> pd.DataFrame:
+        """Fetch daily usage totals aggregated on the server (see MongoDBConnector.get_daily_usage_data)"""
+        try:
+            start_date, end_date = self._window(days_back)
+            totals = self.db.partusagelogs.aggregate(daily_usage_pipeline(start_date, end_date),
+                                                     batchSize=self.batch_size)
+            df = await aread_columnar(totals, DAILY_USAGE_COLUMNS, self.batch_size)
+
+            if df.empty:
+                logger.warning("No usage data found in MongoDB")
+                return pd.DataFrame()
+
+            df['date'] = pd.to_datetime(df[['year', 'month', 'day']])
+            df = df[['date', 'part_id', 'part_name', 'part_code', 'quantity_used', 'unit_cost', 'log_count']]
+
+            logger.info(f"Fetched {len(df)} daily usage totals ({df['log_count'].sum()} logs) from MongoDB")
+            return df
+
+        except Exception as e:
+            logger.error(f"Error fetching daily usage data: {e}")
+            return pd.DataFrame()
+
+    async def get_parts_inventory_data(self) -> pd.DataFrame:
+        """Fetch current parts inventory (see MongoDBConnector.get_parts_inventory_data)"""
+        try:
+            parts = self.db.parts.find({}, projection(PART_COLUMNS)).batch_size(self.batch_size)
+            df = await aread_columnar(parts, PART_COLUMNS, self.batch_size)
+
+            if df.empty:
+                logger.warning("No parts data found in MongoDB")
+                return pd.DataFrame()
+
+            logger.info(f"Fetched {len(df)} parts from MongoDB")
+            return df
+
+        except Exception as e:
+            logger.error(f"Error fetching parts data: {e}")
+            return pd.DataFrame()
+
+    async def get_purchase_orders_data(self, days_back: int = 365) -> pd.DataFrame:
+        """Fetch purchase order items (see MongoDBConnector.get_purchase_orders_data)"""
+        try:
+            start_date, end_date = self._window(days_back)
+            items = self.db.purchaseorders.aggregate(purchase_order_items_pipeline(start_date, end_date),
+                                                     batchSize=self.batch_size)
+            df = await aread_columnar(items, PURCHASE_ORDER_ITEM_COLUMNS, self.batch_size)
+
+            if df.empty:
+                logger.warning("No purchase orders data found in MongoDB")
+                return pd.DataFrame()
+
+            logger.info(f"Fetched {len(df)} purchase order items from MongoDB")
+            return df
+
+        except Exception as e:
+            logger.error(f"Error fetching purchase orders data: {e}")
+            return pd.DataFrame()
+
+    async def get_suppliers_data(self) -> pd.DataFrame:
+        """Fetch suppliers (see MongoDBConnector.get_suppliers_data)"""
+        try:
+            suppliers = self.db.suppliers.find({}, projection(SUPPLIER_COLUMNS)).batch_size(self.batch_size)
+            df = await aread_columnar(suppliers, SUPPLIER_COLUMNS, self.batch_size)
+
+            if df.empty:
+                logger.warning("No suppliers data found in MongoDB")
+                return pd.DataFrame()
+
+            logger.info(f"Fetched {len(df)} suppliers from MongoDB")
+            return df
+
+        except Exception as e:
+            logger.error(f"Error fetching suppliers data: {e}")
+            return pd.DataFrame()
+
+    async def create_ml_training_dataset(self, days_back: int = 365,
+                                         daily_usage: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Create the ML training dataset (see MongoDBConnector.create_ml_training_dataset)
+
+        Usage, inventory and purchase orders are fetched concurrently; feature
+        building runs in a worker thread.
+        """
+        try:
+            if daily_usage is not None:
+                usage = asyncio.sleep(0, result=daily_usage)
+            elif self.usage_fetch_mode == 'aggregate':
+                usage = self.get_daily_usage_data(days_back)
+            else:
+                usage = self.get_daily_usage_from_logs(days_back)
+
+            usage_df, inventory_df, po_df = await asyncio.gather(
+                usage,
+                self.get_parts_inventory_data(),
+                self.get_purchase_orders_data(days_back)
+            )
+
+            if usage_df.empty:
+                logger.warning("No usage data available for ML training")
+                return pd.DataFrame()
+
+            dataset = await asyncio.to_thread(build_ml_training_dataset, usage_df, inventory_df)
+
+            logger.info(f"Created ML training dataset with {len(dataset)} records")
+            return dataset
+
+        except Exception as e:
+            logger.error(f"Error creating ML training dataset: {e}")
+            return pd.DataFrame()
+
+    def close(self):
+        """Close MongoDB connection"""
+        if self.client:
+            self.client.close()
+            logger.info("MongoDB connection closed")
@@ -0,0 +1,206 @@
+"""
+Streaming Columnar Reader for MongoDB cursors
+Fills preallocated per-column buffers batch by batch (converted to NumPy arrays once per
+batch) instead of building one dict per document
+"""
+
+from typing import (Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List,
+                    NamedTuple, Optional)
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+class Column(NamedTuple):
+    """One output column: its name, how to read it from a document, and its dtype"""
+    name: str
+    getter: Callable[[Dict], Any]
+    dtype: Any = object
+    fields: tuple = ()  # top-level document fields the getter reads (for the projection)
+
+
+def field(name: str, *path: str, default: Any = None, dtype: Any = object,
+          convert: Optional[Callable[[Any], Any]] = None) -> Column:
+    """
+    Column read from a (possibly nested) document field
+
+    Missing keys, and intermediate values that are not documents, give `default`.
+
+    Args:
+        name: Output column name
+        path: Keys from the document root, e.g. ('partId', 'name')
+        default: Value for documents without the field
+        dtype: NumPy dtype of the column buffer
+        convert: Applied to values that are present (e.g. str for ObjectIds)
+    """
+    if len(path) == 1:
+        key = path[0]
+
+        def getter(doc):
+            value = doc.get(key, default)
+            return value if convert is None or value is default else convert(value)
+    elif len(path) == 2 and convert is None:
+        # Most fields sit one level down (e.g. partId.name)
+        outer, inner = path
+
+        def getter(doc):
+            value = doc.get(outer)
+            return value.get(inner, default) if isinstance(value, dict) else default
+    else:
+        def getter(doc):
+            value = doc
+            for key in path:
+                if not isinstance(value, dict) or key not in value:
+                    return default
+                value = value[key]
+            return value if convert is None else convert(value)
+    return Column(name, getter, dtype, (path[0],))
+
+
+def ref_id(name: str, *path: str, default: Any = 'unknown') -> Column:
+    """
+    String id of a reference field that is either an ObjectId or a populated document
+
+    Args:
+        name: Output column name
+        path: Keys from the document root to the reference, e.g. ('items', 'part')
+        default: Value when the reference is missing
+    """
+    def getter(doc):
+        value = doc
+        for key in path:
+            if not isinstance(value, dict):
+                return default
+            value = value.get(key)
+        if isinstance(value, dict):
+            value = value.get('_id')
+        return default if value is None else str(value)
+    return Column(name, getter, object, (path[0],))
+
+
+def projection(columns: List[Column]) -> Dict[str, int]:
+    """MongoDB projection covering every field the columns read"""
+    fields = {f for column in columns for f in column.fields}
+    spec = {f: 1 for f in sorted(fields)}
+    if '_id' not in fields:
+        spec['_id'] = 0
+    return spec
+
+
+def _is_datetime(column: Column) -> bool:
+    return column.dtype is not object and np.dtype(column.dtype).kind == 'M'
+
+
+def _allocate(columns: List[Column], size: int) -> List[list]:
+    # Fixed-size slot lists: storing a Python value in a list slot is far cheaper
+    # than a NumPy item assignment, and each column converts once per batch
+    return [[None] * size for _ in columns]
+
+
+def _frame(columns: List[Column], buffers: List[list], rows: int) -> pd.DataFrame:
+    data = {}
+    for column, buffer in zip(columns, buffers):
+        values = buffer if rows == len(buffer) else buffer[:rows]
+        if _is_datetime(column):
+            data[column.name] = pd.to_datetime(values).to_numpy().astype(column.dtype, copy=False)
+        elif column.dtype is object:
+            array = np.empty(rows, dtype=object)
+            array[:] = values
+            data[column.name] = array
+        else:
+            data[column.name] = np.array(values, dtype=column.dtype)
+    return pd.DataFrame(data, copy=False)
+
+
+class _BatchBuilder:
+    """Row-by-row fill of one batch's column buffers, shared by the sync and async readers"""
+
+    def __init__(self, columns: List[Column], batch_size: int):
+        self.columns = columns
+        self.batch_size = batch_size
+        self.getters = [column.getter for column in columns]
+        self.buffers = _allocate(columns, batch_size)
+        self.row = 0
+
+    def add(self, doc: Dict) -> Optional[pd.DataFrame]:
+        """Store one document; returns the finished batch when the buffers are full"""
+        row = self.row
+        for getter, buffer in zip(self.getters, self.buffers):
+            buffer[row] = getter(doc)
+        self.row = row + 1
+        if self.row == self.batch_size:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[pd.DataFrame]:
+        """Finish the current (possibly partial) batch and start fresh buffers"""
+        if not self.row:
+            return None
+        frame = _frame(self.columns, self.buffers, self.row)
+        self.buffers = _allocate(self.columns, self.batch_size)
+        self.row = 0
+        return frame
+
+
+def iter_record_batches(cursor: Iterable[Dict], columns: List[Column],
+                        batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read a cursor into DataFrames of at most `batch_size` rows
+
+    Each batch gets freshly allocated buffers, so callers may keep the frames;
+    only one batch of documents is alive at a time.
+
+    Args:
+        cursor: Documents (a pymongo cursor or any iterable of dicts)
+        columns: Output columns
+        batch_size: Rows per yielded batch
+
+    Yields:
+        DataFrame per batch with one column per `columns` entry
+    """
+    builder = _BatchBuilder(columns, batch_size)
+    for doc in cursor:
+        batch = builder.add(doc)
+        if batch is not None:
+            yield batch
+    batch = builder.flush()
+    if batch is not None:
+        yield batch
+
+
+async def aiter_record_batches(cursor: AsyncIterable[Dict], columns: List[Column],
+                               batch_size: int = DEFAULT_BATCH_SIZE) -> AsyncIterator[pd.DataFrame]:
+    """`iter_record_batches` for async cursors (e.g. motor)"""
+    builder = _BatchBuilder(columns, batch_size)
+    async for doc in cursor:
+        batch = builder.add(doc)
+        if batch is not None:
+            yield batch
+    batch = builder.flush()
+    if batch is not None:
+        yield batch
+
+
+def _concat_batches(batches: List[pd.DataFrame]) -> pd.DataFrame:
+    if not batches:
+        return pd.DataFrame()
+    return pd.concat(batches, ignore_index=True) if len(batches) > 1 else batches[0]
+
+
+def read_columnar(cursor: Iterable[Dict], columns: List[Column],
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> pd.DataFrame:
+    """
+    Read a whole cursor into one DataFrame through `iter_record_batches`
+
+    Returns:
+        DataFrame with the `columns` (empty, with no columns, if the cursor is empty)
+    """
+    return _concat_batches(list(iter_record_batches(cursor, columns, batch_size)))
+
+
+async def aread_columnar(cursor: AsyncIterable[Dict], columns: List[Column],
+                         batch_size: int = DEFAULT_BATCH_SIZE) -> pd.DataFrame:
+    """`read_columnar` for async cursors (e.g. motor)"""
+    return _concat_batches([batch async for batch in aiter_record_batches(cursor, columns, batch_size)])
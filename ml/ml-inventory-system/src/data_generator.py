@@ -8,6 +8,8 @@ import numpy as np
 from datetime import datetime, timedelta
 import random
 
+from usage_schema import compact_usage_frame
+
 def generate_sample_data():
     """Generate realistic automotive parts usage data"""
     
@@ -69,7 +71,7 @@ def generate_sample_data():
                 'weekly_factor': weekly_factor
             })
     
-    return pd.DataFrame(data)
+    return compact_usage_frame(pd.DataFrame(data), 'sample data')
 
 def save_sample_data():
     """Generate and save sample data to CSV"""
@@ -90,7 +92,7 @@ def save_sample_data():
     
     # Show summary by part
     print("\nUsage summary by part:")
-    summary = df.groupby(['part_id', 'part_name']).agg({
+    summary = df.groupby(['part_id', 'part_name'], observed=True).agg({
         'quantity_used': ['sum', 'mean', 'std'],
         'unit_cost': 'first'
     }).round(2)
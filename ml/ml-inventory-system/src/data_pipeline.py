@@ -10,9 +10,14 @@ from typing import Dict, List, Optional, Tuple
 import logging
 import os
 import json
-from mongodb_connector import MongoDBConnector
+from mongodb_connector import MongoDBConnector, enrich_with_inventory
+from usage_store import UsageStore
+from usage_schema import compact_usage_frame
 from prophet_forecaster import ProphetInventoryForecaster
 from linear_model import InventoryForecaster
+from reorder_table import select_recommendations
+from feature_engine import (IncrementalFeatureEngine, add_seasonal_features, add_trend_features,
+                            clean_usage_rows, merge_feature_rows)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,16 +29,29 @@ class MLDataPipeline:
     Handles data fetching, preprocessing, model training, and predictions
     """
     
-    def __init__(self, mongodb_uri: str = None, models_dir: str = "models"):
+    def __init__(self, mongodb_uri: str = None, models_dir: str = "models", usage_store_dir: str = None,
+                 feature_state_dir: str = None):
         """
         Initialize ML data pipeline
         
         Args:
             mongodb_uri: MongoDB connection string
             models_dir: Directory for ML models
+            usage_store_dir: Directory of the local usage store; when set, usage is synced
+                             incrementally into it instead of re-read from MongoDB.
+                             Default: USAGE_STORE_DIR (unset disables the store)
+            feature_state_dir: Directory of the incremental feature engine; when set, training
+                               features are computed only for new days and persisted there.
+                               Default: FEATURE_STATE_DIR (unset recomputes them every run)
         """
         self.mongodb_uri = mongodb_uri
         self.models_dir = models_dir
+        self.usage_store_dir = usage_store_dir or os.getenv('USAGE_STORE_DIR')
+        self.usage_store = None
+        self.feature_state_dir = feature_state_dir or os.getenv('FEATURE_STATE_DIR')
+        self.feature_engine = None
+        # Featured training window of the last incremental run and the store sequence it matches
+        self._training_features = None
         self.mongodb_connector = None
         self.prophet_forecaster = None
         self.linear_forecaster = None
@@ -49,6 +67,14 @@ class MLDataPipeline:
             self.mongodb_connector = MongoDBConnector(self.mongodb_uri)
             logger.info("MongoDB connector initialized")
             
+            if self.usage_store_dir:
+                self.usage_store = UsageStore(self.usage_store_dir)
+                logger.info(f"Usage store at {self.usage_store_dir}")
+            
+            if self.feature_state_dir:
+                self.feature_engine = IncrementalFeatureEngine(self.feature_state_dir)
+                logger.info(f"Feature state at {self.feature_state_dir}")
+            
             # Initialize Prophet forecaster
             self.prophet_forecaster = ProphetInventoryForecaster(self.models_dir)
             logger.info("Prophet forecaster initialized")
@@ -61,28 +87,31 @@ class MLDataPipeline:
             logger.error(f"Error initializing pipeline components: {e}")
             raise
     
-    def fetch_and_prepare_data(self, days_back: int = 365) -> pd.DataFrame:
+    def fetch_and_prepare_data(self, days_back: int = 365, rebuild_features: bool = False) -> pd.DataFrame:
         """
         Fetch data from MongoDB and prepare for ML training
         
         Args:
             days_back: Number of days to look back for data
+            rebuild_features: Recompute persisted features from the full history
+                              (only with the feature engine enabled)
             
         Returns:
             Prepared DataFrame for ML training
         """
         try:
-            logger.info(f"Fetching data from MongoDB for last {days_back} days")
+            if self.feature_engine is not None:
+                return self._prepare_incrementally(days_back, rebuild_features)
             
-            # Get comprehensive dataset from MongoDB
-            ml_dataset = self.mongodb_connector.create_ml_training_dataset(days_back)
+            logger.info(f"Fetching data from MongoDB for last {days_back} days")
+            ml_dataset = self._fetch_ml_dataset(days_back)
             
             if ml_dataset.empty:
                 logger.warning("No data available from MongoDB")
                 return pd.DataFrame()
             
             # Data preprocessing
-            ml_dataset = self._preprocess_data(ml_dataset)
+            ml_dataset = compact_usage_frame(self._preprocess_data(ml_dataset), 'training features')
             
             logger.info(f"Prepared dataset with {len(ml_dataset)} records")
             return ml_dataset
@@ -91,6 +120,103 @@ class MLDataPipeline:
             logger.error(f"Error fetching and preparing data: {e}")
             return pd.DataFrame()
     
+    def _fetch_ml_dataset(self, days_back: int, history_days: Optional[int] = None) -> pd.DataFrame:
+        """
+        Comprehensive dataset from MongoDB, with usage from the local store when enabled
+        
+        Args:
+            days_back: Number of days to look back for data
+            history_days: Days of usage the store loads on its first sync (default: days_back)
+        """
+        daily_usage = None
+        if self.usage_store is not None:
+            self.usage_store.sync(self.mongodb_connector, days_back=history_days or days_back)
+            daily_usage = self.usage_store.daily_usage(days_back)
+        return self.mongodb_connector.create_ml_training_dataset(days_back, daily_usage=daily_usage)
+    
+    def _prepare_incrementally(self, days_back: int, rebuild: bool = False) -> pd.DataFrame:
+        """
+        Training data from the feature engine, computing features only for new days
+        
+        The first run (or a rebuild, or state older than the window) processes the
+        full `days_back` history; later runs fetch from the last processed day on.
+        The featured window is kept in memory, so a later run in the same process
+        only merges the new rows into it instead of reading it back from the store.
+        
+        Args:
+            days_back: Number of days of features to return
+            rebuild: Recompute every feature from the full history
+            
+        Returns:
+            Prepared DataFrame for ML training
+        """
+        engine = self.feature_engine
+        now = datetime.now()
+        since = now - timedelta(days=days_back)
+        
+        if rebuild or engine.through is None or engine.through < since:
+            logger.info(f"Rebuilding features from the last {days_back} days of MongoDB data")
+            ml_dataset = self._fetch_ml_dataset(days_back)
+            if ml_dataset.empty:
+                logger.warning("No data available from MongoDB")
+                return pd.DataFrame()
+            featured = merge_feature_rows(engine.rebuild(ml_dataset), since=since)
+        else:
+            # Feature groups whose definition changed are recomputed from the stored rows
+            engine.recompute()
+            
+            # The cached window only holds if nothing else has written the store since
+            window = None
+            if self._training_features is not None and self._training_features[0] == engine.store.sequence:
+                window = self._training_features[1]
+            
+            # From the start of the last processed day, whose totals may have grown since
+            fetch_days = (now - engine.through).days + 1
+            logger.info(f"Fetching data from MongoDB for last {fetch_days} days")
+            ml_dataset = self._fetch_ml_dataset(fetch_days, history_days=days_back)
+            new_rows = engine.update(ml_dataset) if not ml_dataset.empty else None
+            
+            if window is None:
+                featured = engine.features(since=since)
+            else:
+                featured = merge_feature_rows(window, new_rows, since)
+        
+        self._training_features = (engine.store.sequence, featured)
+        if featured.empty:
+            return featured
+        
+        # Inventory fields as of now on every row, as a full recompute would have them
+        # (on a copy: enrichment adds columns in place and the cached window stays as stored)
+        ml_dataset = enrich_with_inventory(featured.copy(), self.mongodb_connector.get_parts_inventory_data())
+        ml_dataset = compact_usage_frame(ml_dataset, 'training features')
+        logger.info(f"Prepared dataset with {len(ml_dataset)} records ({engine.stats()})")
+        return ml_dataset
+    
+    def read_features(self, columns: Optional[List[str]] = None, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None, part_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Persisted feature rows without touching MongoDB (e.g. for backtests)
+        
+        Only the partitions of the date range and parts, and the columns asked for, are read.
+        
+        Args:
+            columns: Feature columns besides date and part_id (None = all)
+            start: First day (None = from the beginning)
+            end: Last day (None = to the end)
+            part_ids: Only these parts (None = all)
+            
+        Returns:
+            Feature rows in date order; empty without the feature engine
+        """
+        if self.feature_engine is None:
+            logger.warning("Feature engine not enabled (set FEATURE_STATE_DIR)")
+            return pd.DataFrame()
+        try:
+            return self.feature_engine.features(since=start, columns=columns, part_ids=part_ids, until=end)
+        except Exception as e:
+            logger.error(f"Error reading features: {e}")
+            return pd.DataFrame()
+    
     def _preprocess_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Preprocess data for ML training
@@ -102,20 +228,8 @@ class MLDataPipeline:
             Preprocessed DataFrame
         """
         try:
-            # Remove duplicates
-            df = df.drop_duplicates(subset=['date', 'part_id'])
-            
-            # Handle missing values
-            df['quantity_used'] = df['quantity_used'].fillna(0)
-            df['unit_cost'] = df['unit_cost'].fillna(0)
-            df['lead_time_days'] = df['lead_time_days'].fillna(7)
-            
-            # Ensure positive values
-            df['quantity_used'] = df['quantity_used'].clip(lower=0)
-            df['unit_cost'] = df['unit_cost'].clip(lower=0)
-            
-            # Add derived features
-            df['usage_value'] = df['quantity_used'] * df['unit_cost']
+            # Remove duplicates, fill/clip missing or negative values, add usage_value
+            df = clean_usage_rows(df)
             
             # Add trend features
             df = self._add_trend_features(df)
@@ -133,25 +247,9 @@ class MLDataPipeline:
     def _add_trend_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add trend-based features"""
         try:
-            # Calculate rolling averages
-            for window in [7, 14, 30]:
-                df[f'usage_ma_{window}'] = df.groupby('part_id')['quantity_used'].transform(
-                    lambda x: x.rolling(window=window, min_periods=1).mean()
-                )
-            
-            # Calculate usage trends
-            df['usage_trend_7d'] = df.groupby('part_id')['quantity_used'].transform(
-                lambda x: x.rolling(window=7, min_periods=1).apply(
-                    lambda y: np.polyfit(range(len(y)), y, 1)[0] if len(y) > 1 else 0
-                )
-            )
-            
-            # Calculate volatility
-            df['usage_volatility'] = df.groupby('part_id')['quantity_used'].transform(
-                lambda x: x.rolling(window=14, min_periods=1).std()
-            )
-            
-            return df
+            # Rolling averages (7/14/30 days), 7-day least-squares trend and 14-day
+            # volatility per part, all from rolling sums in a single pass
+            return add_trend_features(df)
             
         except Exception as e:
             logger.error(f"Error adding trend features: {e}")
@@ -160,32 +258,19 @@ class MLDataPipeline:
     def _add_seasonal_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add seasonal features"""
         try:
-            # Day of week patterns
-            df['is_monday'] = (df['day_of_week'] == 0).astype(int)
-            df['is_friday'] = (df['day_of_week'] == 4).astype(int)
-            df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
-            
-            # Month patterns
-            df['is_january'] = (df['month'] == 1).astype(int)
-            df['is_december'] = (df['month'] == 12).astype(int)
-            df['is_quarter_end'] = df['month'].isin([3, 6, 9, 12]).astype(int)
-            
-            # Business cycle features
-            df['is_month_start'] = (df['day_of_month'] <= 5).astype(int)
-            df['is_month_end'] = (df['day_of_month'] >= 25).astype(int)
-            
-            return df
+            return add_seasonal_features(df)
             
         except Exception as e:
             logger.error(f"Error adding seasonal features: {e}")
             return df
     
-    def train_models(self, use_prophet: bool = True) -> bool:
+    def train_models(self, use_prophet: bool = True, rebuild_features: bool = False) -> bool:
         """
         Train ML models with current data
         
         Args:
             use_prophet: Whether to use Prophet (True) or Linear Regression (False)
+            rebuild_features: Recompute persisted features from the full history
             
         Returns:
             True if training successful, False otherwise
@@ -194,7 +279,7 @@ class MLDataPipeline:
             logger.info("Starting model training...")
             
             # Fetch and prepare data
-            training_data = self.fetch_and_prepare_data()
+            training_data = self.fetch_and_prepare_data(rebuild_features=rebuild_features)
             
             if training_data.empty:
                 logger.error("No training data available")
@@ -256,13 +341,16 @@ class MLDataPipeline:
             logger.error(f"Error loading models: {e}")
             return False
     
-    def get_predictions(self, part_ids: List[str], days: int = 30) -> List[Dict]:
+    def get_predictions(self, part_ids: List[str], days: int = 30, columnar: bool = False,
+                        use_prophet: bool = True) -> List[Dict]:
         """
         Get predictions for specific parts
         
         Args:
             part_ids: List of part IDs to predict
             days: Number of days to predict ahead
+            columnar: Return each part's predictions as parallel arrays instead of per-day dicts
+            use_prophet: Try Prophet before Linear Regression (False when Prophet ran elsewhere)
             
         Returns:
             List of prediction dictionaries
@@ -273,8 +361,8 @@ class MLDataPipeline:
             for part_id in part_ids:
                 try:
                     # Try Prophet first
-                    if self.prophet_forecaster.is_trained:
-                        prediction = self.prophet_forecaster.predict(part_id, days)
+                    if use_prophet and self.prophet_forecaster.is_trained:
+                        prediction = self.prophet_forecaster.predict(part_id, days, columnar=columnar)
                         if prediction:
                             predictions.append(prediction)
                             continue
@@ -298,20 +386,27 @@ class MLDataPipeline:
             logger.error(f"Error getting predictions: {e}")
             return []
     
-    def get_reorder_recommendations(self, current_stock: Dict[str, int]) -> List[Dict]:
+    def get_reorder_recommendations(self, current_stock: Dict[str, int], use_prophet: bool = True,
+                                    priority: Optional[str] = None, offset: int = 0,
+                                    limit: Optional[int] = None) -> List[Dict]:
         """
         Get reorder recommendations for all parts
         
         Args:
             current_stock: Dictionary with part_id -> current_stock mapping
+            use_prophet: Try Prophet before Linear Regression (False when Prophet ran elsewhere)
+            priority: Only recommendations of this priority ('HIGH', 'MEDIUM', 'LOW')
+            offset: Recommendations to skip (paging)
+            limit: Most recommendations to return (None = all)
             
         Returns:
             List of reorder recommendations
         """
         try:
             # Try Prophet first
-            if self.prophet_forecaster.is_trained:
-                recommendations = self.prophet_forecaster.get_reorder_recommendations(current_stock)
+            if use_prophet and self.prophet_forecaster.is_trained:
+                recommendations = self.prophet_forecaster.get_reorder_recommendations(current_stock, priority,
+                                                                                      offset, limit)
                 if recommendations:
                     return recommendations
             
@@ -319,7 +414,7 @@ class MLDataPipeline:
             if self.linear_forecaster.is_trained:
                 recommendations = self.linear_forecaster.get_reorder_recommendations(current_stock)
                 if recommendations:
-                    return recommendations
+                    return select_recommendations(recommendations, priority, offset, limit)
             
             logger.warning("No reorder recommendations available")
             return []
@@ -350,20 +445,25 @@ class MLDataPipeline:
             logger.error(f"Error getting model statistics: {e}")
             return {'total_models': 0, 'models': []}
     
-    def get_health_status(self) -> Dict:
+    def get_health_status(self, mongodb_status: Optional[str] = None) -> Dict:
         """
         Get health status of the ML pipeline
         
+        Args:
+            mongodb_status: 'connected'/'disconnected' if already known (e.g. from an
+                            async ping); otherwise the sync connector is pinged
+        
         Returns:
             Dictionary with health information
         """
         try:
             # Check MongoDB connection
-            mongodb_status = "connected"
-            try:
-                self.mongodb_connector.client.admin.command('ping')
-            except:
-                mongodb_status = "disconnected"
+            if mongodb_status is None:
+                mongodb_status = "connected"
+                try:
+                    self.mongodb_connector.client.admin.command('ping')
+                except:
+                    mongodb_status = "disconnected"
             
             # Check model status
             prophet_models = len(self.prophet_forecaster.models) if self.prophet_forecaster.is_trained else 0
@@ -376,7 +476,8 @@ class MLDataPipeline:
                 'linear_models': linear_models,
                 'total_models': prophet_models + linear_models,
                 'last_update': self.last_update.isoformat() if self.last_update else None,
-                'available_parts': list(self.prophet_forecaster.models.keys()) if self.prophet_forecaster.is_trained else list(self.linear_forecaster.models.keys()) if self.linear_forecaster.is_trained else []
+                'available_parts': list(self.prophet_forecaster.models.keys()) if self.prophet_forecaster.is_trained else list(self.linear_forecaster.models.keys()) if self.linear_forecaster.is_trained else [],
+                'forecast_cache': self.prophet_forecaster.forecast_cache.stats()
             }
             
         except Exception as e:
@@ -406,8 +507,8 @@ class MLDataPipeline:
             
             logger.info("Updating models with latest data...")
             
-            # Retrain models
-            success = self.train_models(use_prophet=True)
+            # Retrain models (features only for new days; a forced update rebuilds them)
+            success = self.train_models(use_prophet=True, rebuild_features=force_retrain)
             
             if success:
                 logger.info("Models updated successfully")
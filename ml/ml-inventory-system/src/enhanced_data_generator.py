@@ -8,6 +8,8 @@ import numpy as np
 from datetime import datetime, timedelta
 import random
 
+from usage_schema import compact_usage_frame
+
 def generate_all_parts_data():
     """Generate realistic usage data for all 45 parts"""
     
@@ -111,7 +113,7 @@ def generate_all_parts_data():
                 'weekly_factor': weekly_factor
             })
     
-    return pd.DataFrame(data)
+    return compact_usage_frame(pd.DataFrame(data), 'generated parts data')
 
 def save_enhanced_data():
     """Generate and save enhanced data to CSV"""
@@ -132,7 +134,7 @@ def save_enhanced_data():
     
     # Show summary by part
     print("\nUsage summary by part:")
-    summary = df.groupby(['part_id', 'part_name']).agg({
+    summary = df.groupby(['part_id', 'part_name'], observed=True).agg({
         'quantity_used': ['sum', 'mean', 'std'],
         'unit_cost': 'first'
     }).round(2)
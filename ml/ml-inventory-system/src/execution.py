@@ -0,0 +1,231 @@
+"""
+Execution Layer for the ML Inventory Services
+Runs CPU-bound request work in bounded thread/process pools so async endpoints never stall the event loop
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Waiting tasks each pool accepts beyond one per worker before rejecting work
+DEFAULT_MAX_QUEUE = 32
+
+# Every process worker loads its own copy of the Prophet models, so the pool stays small
+DEFAULT_PROCESS_WORKERS = 2
+MAX_PROCESS_WORKERS = 8
+
+# Endpoint -> most requests queued or running at once (ML_ENDPOINT_LIMITS overrides)
+DEFAULT_ENDPOINT_LIMITS = {'dashboard-data': 2, 'train': 1, 'retrain': 1}
+
+
+class Saturated(Exception):
+    """Raised when a pool queue or an endpoint's concurrency limit is full"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_endpoint_limits(spec: Optional[str]) -> Dict[str, int]:
+    """
+    Parse "predict=8,dashboard-data=2" into {'predict': 8, 'dashboard-data': 2}
+
+    Raises:
+        ValueError: If an entry is not name=positive integer
+    """
+    limits = {}
+    for entry in (spec or '').split(','):
+        if not entry.strip():
+            continue
+        name, sep, value = entry.partition('=')
+        if not sep or not name.strip() or int(value) < 1:
+            raise ValueError(f"Invalid endpoint limit {entry!r}, expected name=positive integer")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+def process_workers_from_env(default: int = DEFAULT_PROCESS_WORKERS, cap: int = MAX_PROCESS_WORKERS) -> int:
+    """
+    Process worker count from ML_PROCESS_WORKERS (or `default`), capped
+
+    Args:
+        default: Workers when ML_PROCESS_WORKERS is not set
+        cap: Most workers ever started, whatever the setting or CPU count
+
+    Returns:
+        Worker count between 0 and min(cap, CPU count)
+    """
+    setting = os.getenv('ML_PROCESS_WORKERS')
+    requested = int(setting) if setting is not None else default
+    workers = max(0, min(requested, cap, os.cpu_count() or 1))
+    if setting is not None and workers != requested:
+        logger.warning(f"ML_PROCESS_WORKERS={requested} capped to {workers} process workers")
+    return workers
+
+
+class _Lane:
+    """One executor plus the admission counters bounding its queue"""
+
+    def __init__(self, name: str, executor, workers: int, max_queue: int):
+        self.name = name
+        self.executor = executor
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def stats(self) -> Dict:
+        return {'workers': self.workers, 'capacity': self.capacity, 'in_flight': self.in_flight,
+                'completed': self.completed, 'rejected': self.rejected}
+
+
+class ExecutionLayer:
+    """
+    Thread and process pools with bounded queues and per-endpoint concurrency limits
+
+    The thread pool takes work that spends its time in NumPy/pandas (which release
+    the GIL); the process pool takes Prophet work, which holds it. Admission is
+    decided on the event loop before anything is queued: a request is rejected with
+    `Saturated` when its pool already holds `workers + max_queue` tasks or its
+    endpoint is at its limit. A slot is released when the task finishes in its
+    worker, not when the caller stops waiting, so abandoned requests still count.
+    """
+
+    def __init__(self, thread_workers: Optional[int] = None, process_workers: Optional[int] = None,
+                 max_queue: Optional[int] = None, endpoint_limits: Optional[Dict[str, int]] = None):
+        """
+        Create the pools (process workers are started on first use)
+
+        Args:
+            thread_workers: Threads for NumPy-releasing work
+                            Default: ML_THREAD_WORKERS or the CPU count
+            process_workers: Processes for Prophet work; 0 runs it in the thread pool
+                             Default: process_workers_from_env()
+            max_queue: Tasks each pool may hold waiting beyond its workers
+                       Default: ML_MAX_QUEUE or 32
+            endpoint_limits: Endpoint -> most requests queued or running at once
+                             Default: DEFAULT_ENDPOINT_LIMITS updated with ML_ENDPOINT_LIMITS
+        """
+        cpus = os.cpu_count() or 1
+        thread_workers = thread_workers or int(os.getenv('ML_THREAD_WORKERS', str(cpus)))
+        if process_workers is None:
+            process_workers = process_workers_from_env()
+        max_queue = max_queue if max_queue is not None else int(os.getenv('ML_MAX_QUEUE', str(DEFAULT_MAX_QUEUE)))
+        if endpoint_limits is None:
+            endpoint_limits = {**DEFAULT_ENDPOINT_LIMITS, **parse_endpoint_limits(os.getenv('ML_ENDPOINT_LIMITS'))}
+
+        self.max_queue = max_queue
+        self.endpoint_limits = dict(endpoint_limits)
+        self._endpoint_in_flight = {}
+        self._endpoint_rejected = {}
+
+        self.threads = _Lane('thread', ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix='ml-worker'),
+                             thread_workers, max_queue)
+        self.processes = (_Lane('process', self._process_pool(process_workers), process_workers, max_queue)
+                          if process_workers > 0 else None)
+
+        logger.info(f"Execution layer: {thread_workers} threads, {process_workers} processes, "
+                    f"queue {max_queue}, endpoint limits {self.endpoint_limits}")
+
+    @staticmethod
+    def _process_pool(workers: int) -> ProcessPoolExecutor:
+        # Spawned, not forked: the service process already runs threads (event loop, thread pool, drivers)
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _admit(self, lane: _Lane, endpoint: str):
+        limit = self.endpoint_limits.get(endpoint)
+        in_flight = self._endpoint_in_flight.get(endpoint, 0)
+        if limit is not None and in_flight >= limit:
+            self._endpoint_rejected[endpoint] = self._endpoint_rejected.get(endpoint, 0) + 1
+            raise Saturated(f"Too many concurrent {endpoint} requests (limit {limit})")
+        if lane.in_flight >= lane.capacity:
+            lane.rejected += 1
+            self._endpoint_rejected[endpoint] = self._endpoint_rejected.get(endpoint, 0) + 1
+            raise Saturated(f"The {lane.name} pool is saturated ({lane.in_flight} tasks queued or running)")
+        lane.in_flight += 1
+        self._endpoint_in_flight[endpoint] = in_flight + 1
+
+    def _release(self, lane: _Lane, endpoint: str):
+        lane.in_flight -= 1
+        lane.completed += 1
+        self._endpoint_in_flight[endpoint] -= 1
+
+    def submit(self, endpoint: str, fn: Callable, *args, process: bool = False, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs) for `endpoint` without waiting for it
+
+        Must be called from the event loop thread, which owns the admission counters.
+
+        Args:
+            endpoint: Name the per-endpoint limit is looked up by
+            fn: Callable to run (module-level and picklable when process=True)
+            process: Run in the process pool (falls back to threads when it is disabled)
+
+        Returns:
+            concurrent.futures.Future of the result
+
+        Raises:
+            Saturated: If the pool queue or the endpoint limit is full
+        """
+        lane = self.processes if process and self.processes else self.threads
+        loop = asyncio.get_running_loop()
+        self._admit(lane, endpoint)
+        try:
+            future = lane.executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            self._release(lane, endpoint)
+            self._replace_process_pool()
+            raise
+        except BaseException:
+            self._release(lane, endpoint)
+            raise
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, lane, endpoint))
+        return future
+
+    async def run(self, endpoint: str, fn: Callable, *args, process: bool = False, **kwargs):
+        """
+        Run fn(*args, **kwargs) in a worker and await its result (see `submit`)
+
+        Raises:
+            Saturated: If the pool queue or the endpoint limit is full
+        """
+        try:
+            return await asyncio.wrap_future(self.submit(endpoint, fn, *args, process=process, **kwargs))
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next request
+            self._replace_process_pool()
+            raise
+
+    def _replace_process_pool(self):
+        lane = self.processes
+        if lane and getattr(lane.executor, '_broken', False):
+            logger.error("Process pool broken, starting a new one")
+            lane.executor.shutdown(wait=False, cancel_futures=True)
+            lane.executor = self._process_pool(lane.workers)
+
+    def stats(self) -> Dict:
+        """Pool occupancy and per-endpoint in-flight/rejected counts"""
+        endpoints = sorted(set(self.endpoint_limits) | set(self._endpoint_in_flight) | set(self._endpoint_rejected))
+        return {
+            'thread_pool': self.threads.stats(),
+            'process_pool': self.processes.stats() if self.processes else None,
+            'endpoints': {name: {'limit': self.endpoint_limits.get(name),
+                                 'in_flight': self._endpoint_in_flight.get(name, 0),
+                                 'rejected': self._endpoint_rejected.get(name, 0)} for name in endpoints}
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop both pools, dropping tasks that have not started"""
+        self.threads.executor.shutdown(wait=wait, cancel_futures=True)
+        if self.processes:
+            self.processes.executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info("Execution layer stopped")
@@ -0,0 +1,448 @@
+"""
+Incremental Feature Engine for the ML Inventory System
+Computes training features only for newly arrived daily usage, carrying each part's rolling-window state between runs
+"""
+
+import glob
+import logging
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from feature_store import DEFAULT_BUCKETS, KEY_COLUMNS, FeatureStore, definition_hash, partition_months
+from trend_features import MA_WINDOWS, TREND_WINDOW, VOLATILITY_WINDOW, rolling_trend_features
+from usage_schema import compact_usage_frame
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURE_DIR = os.path.join('data', 'feature_state')
+TAIL_PREFIX = '_tail-'
+
+USAGE_LAGS = (1, 7)
+
+# Rows of history a new row's features can reach back to (the longest window or lag)
+CONTEXT_ROWS = max(MA_WINDOWS + (TREND_WINDOW, VOLATILITY_WINDOW) + USAGE_LAGS)
+
+TAIL_COLUMNS = ['part_id', 'date', 'quantity_used', 'usage_rows']
+
+
+def clean_usage_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop duplicate (date, part) rows, fill and clip missing or negative values, add usage_value"""
+    # Remove duplicates
+    df = df.drop_duplicates(subset=['date', 'part_id'])
+
+    # Handle missing values
+    df['quantity_used'] = df['quantity_used'].fillna(0)
+    df['unit_cost'] = df['unit_cost'].fillna(0)
+    df['lead_time_days'] = df['lead_time_days'].fillna(7)
+
+    # Ensure positive values
+    df['quantity_used'] = df['quantity_used'].clip(lower=0)
+    df['unit_cost'] = df['unit_cost'].clip(lower=0)
+
+    # Add derived features
+    df['usage_value'] = df['quantity_used'] * df['unit_cost']
+    return df
+
+
+def add_trend_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Rolling averages (7/14/30 days), 7-day least-squares trend and 14-day volatility per part"""
+    features = rolling_trend_features(df['part_id'].to_numpy(), df['quantity_used'].to_numpy())
+    for name, values in features.items():
+        df[name] = values
+    return df
+
+
+def add_lag_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Previous days' usage and the running row count (usage_rows) per part
+
+    Rows of a part must be in date order. Rows that already carry usage_rows
+    (context from an earlier run) let the counts continue from them.
+    """
+    by_part = df.groupby('part_id', sort=False, observed=True)
+    for lag in USAGE_LAGS:
+        df[f'usage_lag_{lag}'] = by_part['quantity_used'].shift(lag)
+    known = df['usage_rows'] if 'usage_rows' in df.columns else pd.Series(np.nan, index=df.index)
+    offset = known.groupby(df['part_id'], sort=False, observed=True).transform('first').fillna(1) - 1
+    df['usage_rows'] = (by_part.cumcount() + 1 + offset).astype(np.int64)
+    return df
+
+
+def add_seasonal_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Day-of-week, month and business-cycle flags"""
+    # Day of week patterns
+    df['is_monday'] = (df['day_of_week'] == 0).astype(int)
+    df['is_friday'] = (df['day_of_week'] == 4).astype(int)
+    df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
+
+    # Month patterns
+    df['is_january'] = (df['month'] == 1).astype(int)
+    df['is_december'] = (df['month'] == 12).astype(int)
+    df['is_quarter_end'] = df['month'].isin([3, 6, 9, 12]).astype(int)
+
+    # Business cycle features
+    df['is_month_start'] = (df['day_of_month'] <= 5).astype(int)
+    df['is_month_end'] = (df['day_of_month'] >= 25).astype(int)
+    return df
+
+
+# Feature group -> how it is computed, the columns it writes and its definition: a version and
+# the parameters it uses. Bump a group's version when a change alters its values (edits that do
+# not, e.g. comments or refactoring, leave the stored features valid). A stored group whose
+# definition differs from the current one is recomputed on its own:
+#   'source'  - derived while cleaning source rows; a change needs a rebuild from MongoDB
+#   'history' - per-part windows over the stored history, recomputed one part bucket at a time
+#   'row'     - from each row alone, recomputed one partition at a time
+FEATURE_GROUPS = {
+    'base': {
+        'scope': 'source', 'apply': clean_usage_rows, 'columns': ['usage_value'],
+        'version': 1, 'parameters': {}
+    },
+    'trend': {
+        'scope': 'history', 'apply': add_trend_features,
+        'columns': [f'usage_ma_{window}' for window in MA_WINDOWS] +
+                   [f'usage_trend_{TREND_WINDOW}d', 'usage_volatility'],
+        'version': 1,
+        'parameters': {'ma_windows': MA_WINDOWS, 'trend_window': TREND_WINDOW, 'volatility_window': VOLATILITY_WINDOW}
+    },
+    'lags': {
+        'scope': 'history', 'apply': add_lag_features,
+        'columns': [f'usage_lag_{lag}' for lag in USAGE_LAGS] + ['usage_rows'],
+        'version': 1, 'parameters': {'lags': USAGE_LAGS}
+    },
+    'seasonal': {
+        'scope': 'row', 'apply': add_seasonal_features,
+        'columns': ['is_monday', 'is_friday', 'is_weekend', 'is_january', 'is_december',
+                    'is_quarter_end', 'is_month_start', 'is_month_end'],
+        'version': 1, 'parameters': {}
+    }
+}
+
+FEATURE_DEFINITIONS = {group: definition_hash(spec['version'], spec['parameters'])
+                       for group, spec in FEATURE_GROUPS.items()}
+FEATURE_COLUMNS = {group: spec['columns'] for group, spec in FEATURE_GROUPS.items()}
+
+
+def merge_feature_rows(window: pd.DataFrame, rows: Optional[pd.DataFrame] = None,
+                       since: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Feature window with rows returned by `IncrementalFeatureEngine.update` merged in
+
+    A row whose (date, part) is already in the window replaces it (a re-sent day).
+    New rows never predate the engine's last processed day, so only the window's
+    rows from their first day on are looked at; the rest is kept as it is.
+
+    Args:
+        window: Featured rows in (date, part) order, e.g. from `features(since)`
+        rows: Newly featured rows (None = none)
+        since: Drop rows dated before this day (None = keep all)
+
+    Returns:
+        One row per (date, part) in date order, as `features(since)` would read them
+    """
+    if since is not None:
+        window = window.iloc[window['date'].searchsorted(pd.Timestamp(since).normalize()):]
+    if rows is None or rows.empty:
+        return window.reset_index(drop=True)
+
+    split = window['date'].searchsorted(rows['date'].min())
+    head, recent = window.iloc[:split], window.iloc[split:]
+    replaced = pd.MultiIndex.from_frame(recent[KEY_COLUMNS]).isin(pd.MultiIndex.from_frame(rows[KEY_COLUMNS]))
+    recent = pd.concat([recent[~replaced], rows], ignore_index=True).sort_values(KEY_COLUMNS, kind='stable')
+    for column in head.columns.intersection(recent.columns):
+        # Shared categories, or the concat below falls back to object columns
+        if isinstance(head[column].dtype, pd.CategoricalDtype):
+            dtype = pd.CategoricalDtype(head[column].cat.categories.union(
+                pd.Index(recent[column].dropna().unique()), sort=False))
+            head = head.assign(**{column: head[column].astype(dtype)})
+            recent = recent.assign(**{column: recent[column].astype(dtype)})
+    return pd.concat([head, recent], ignore_index=True)
+
+
+def _apply_groups(rows: pd.DataFrame, groups: Iterable[str]) -> pd.DataFrame:
+    for group in groups:
+        rows = FEATURE_GROUPS[group]['apply'](rows)
+    return rows
+
+
+def _group_by_part(rows: pd.DataFrame) -> pd.DataFrame:
+    """Rows of each part together, keeping their order (date order if `rows` is)"""
+    order = np.argsort(pd.factorize(rows['part_id'])[0], kind='stable')
+    return rows.iloc[order].reset_index(drop=True)
+
+
+def _last_rows(rows: pd.DataFrame) -> pd.DataFrame:
+    rows = rows[TAIL_COLUMNS].sort_values(['part_id', 'date'], kind='stable')
+    return rows.groupby('part_id', sort=False, observed=True).tail(CONTEXT_ROWS).reset_index(drop=True)
+
+
+class IncrementalFeatureEngine:
+    """
+    Training features kept current by processing only new daily usage rows
+
+    After one full `rebuild`, each `update` computes features for the given rows
+    only: per-part rolling windows and lags continue from the last CONTEXT_ROWS
+    usage values of the part (the tail), which is persisted with the features.
+    The last processed day (`through`) may be passed again with grown totals and
+    replaces the earlier rows; older days are ignored (a rebuild picks up
+    back-dated corrections).
+
+    Features live in a FeatureStore (month x part-bucket Parquet partitions) whose
+    manifest records each feature group's definition hash (version and parameters).
+    When a definition changes, only that group's columns are recomputed from the stored rows;
+    a change to how source rows are cleaned requires a rebuild.
+    """
+
+    def __init__(self, root: str = DEFAULT_FEATURE_DIR, buckets: int = DEFAULT_BUCKETS):
+        """
+        Open (or create) the feature state directory
+
+        Args:
+            root: Directory of the feature store and tail
+            buckets: Part buckets per month when the store is (re)built
+        """
+        self.root = root
+        self.buckets = buckets
+        self.store = FeatureStore(root, buckets)
+        self._tail = None
+        self._discard_stray_tails()
+        stored = self.store.definitions.get('base')
+        if self.store.sequence and stored != FEATURE_DEFINITIONS['base']:
+            logger.warning("Source row cleaning changed since the features were built; they will be rebuilt")
+
+    def _discard_stray_tails(self):
+        current = self.store.metadata.get('tail')
+        for path in glob.glob(os.path.join(self.root, TAIL_PREFIX + '*.parquet')):
+            if os.path.basename(path) != current:
+                os.remove(path)
+
+    @property
+    def state(self) -> Optional[Dict]:
+        """Committed engine state (through, tail, parts), or None if the features need a rebuild"""
+        metadata = self.store.metadata
+        if 'through' not in metadata or self.store.definitions.get('base') != FEATURE_DEFINITIONS['base']:
+            return None
+        return metadata
+
+    @property
+    def through(self) -> Optional[pd.Timestamp]:
+        """Last day whose usage has been processed, or None before the first rebuild"""
+        return pd.Timestamp(self.state['through']) if self.state else None
+
+    @property
+    def tail(self) -> pd.DataFrame:
+        """Last CONTEXT_ROWS usage rows of every part (part_id, date, quantity_used, usage_rows)"""
+        if self._tail is None:
+            self._tail = pd.read_parquet(os.path.join(self.root, self.state['tail']))
+        return self._tail
+
+    def stale_groups(self) -> List[str]:
+        """Feature groups stored under an older definition"""
+        if self.state is None:
+            return []
+        return [group for group, definition in FEATURE_DEFINITIONS.items()
+                if self.store.definitions.get(group) != definition]
+
+    def rebuild(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute features for a complete dataset and replace all persisted state
+
+        The new store is built next to the live one and swapped in when complete.
+
+        Args:
+            dataset: Daily usage rows as built by create_ml_training_dataset
+
+        Returns:
+            Featured rows (as MLDataPipeline._preprocess_data, plus lags and usage_rows),
+            in (date, part) order and the compact schema
+        """
+        rows = self._prepare(dataset)
+        featured = _apply_groups(rows, ['trend', 'lags', 'seasonal'])
+        featured = compact_usage_frame(featured.sort_values(KEY_COLUMNS, kind='stable', ignore_index=True), label=None)
+
+        staging = self.root.rstrip(os.sep) + '.rebuild'
+        shutil.rmtree(staging, ignore_errors=True)
+        self._commit(FeatureStore(staging, self.buckets), featured, featured, featured['date'].max())
+
+        retired = self.root.rstrip(os.sep) + '.old'
+        shutil.rmtree(retired, ignore_errors=True)
+        if os.path.exists(self.root):
+            os.replace(self.root, retired)
+        os.replace(staging, self.root)
+        shutil.rmtree(retired, ignore_errors=True)
+        self.store = FeatureStore(self.root)
+
+        logger.info(f"Rebuilt features for {len(featured)} rows through {self.state['through']}")
+        return featured
+
+    def update(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute features for new daily usage rows only
+
+        Args:
+            dataset: Daily usage rows from the last processed day on (earlier days are ignored)
+
+        Returns:
+            Featured new rows
+
+        Raises:
+            RuntimeError: If there is no state yet (call `rebuild` first)
+        """
+        if self.state is None:
+            raise RuntimeError("No feature state yet; rebuild it from a full dataset first")
+        self.recompute()
+
+        rows = self._prepare(dataset)
+        stale = rows['date'] < self.through
+        if stale.any():
+            logger.debug(f"Ignoring {int(stale.sum())} usage rows before {self.through:%Y-%m-%d} "
+                         f"(a feature rebuild picks up back-dated usage)")
+            rows = rows[~stale]
+        if rows.empty:
+            return rows
+
+        # Context: each part's tail before its first new day (a re-sent last day replaces the stored one)
+        tail = self.tail
+        first_new = rows.groupby('part_id', sort=False, observed=True)['date'].min()
+        positions = first_new.index.get_indexer(tail['part_id'])
+        updated = positions >= 0
+        replaced = updated.copy()
+        replaced[updated] = tail['date'].to_numpy()[updated] >= first_new.to_numpy()[positions[updated]]
+        context = tail[updated & ~replaced]
+
+        block = pd.concat([context.assign(_context=True), rows.assign(_context=False)], ignore_index=True)
+        block = _apply_groups(_group_by_part(block), ['trend', 'lags'])
+        # Context rows lack the source columns, which the concat turned into floats with NaNs
+        new_rows = block[~block['_context']].drop(columns='_context').astype(rows.dtypes.to_dict())
+        featured = add_seasonal_features(new_rows)
+        featured = compact_usage_frame(featured.sort_values(KEY_COLUMNS, kind='stable', ignore_index=True), label=None)
+
+        through = max(self.through, featured['date'].max())
+        self._commit(self.store, featured, pd.concat([tail[~replaced], featured[TAIL_COLUMNS]]), through)
+        logger.info(f"Computed features for {len(featured)} new rows through {self.state['through']}")
+        return featured
+
+    def recompute(self, groups: Optional[Sequence[str]] = None) -> int:
+        """
+        Recompute feature groups from the stored rows, leaving other columns as they are
+
+        Args:
+            groups: Groups to recompute (None = those stored under an older definition)
+
+        Returns:
+            Number of rows recomputed
+
+        Raises:
+            ValueError: If 'base' is among the groups (it needs a rebuild from source data)
+        """
+        groups = self.stale_groups() if groups is None else list(groups)
+        if not groups:
+            return 0
+        if 'base' in groups:
+            raise ValueError("The 'base' features are derived from source rows; rebuild the features instead")
+        groups = [group for group in FEATURE_GROUPS if group in groups]
+        logger.info(f"Recomputing feature groups {groups}")
+
+        store = self.store
+        dropped = {column for group in groups for column in store.columns.get(group, FEATURE_COLUMNS[group])}
+        sequence = store.next_sequence()
+        obsolete, tails, recomputed = [], [], 0
+        by_history = any(FEATURE_GROUPS[group]['scope'] == 'history' for group in groups)
+
+        # History groups need each part's rows across all months: one bucket at a time
+        units = [[bucket] for bucket in range(store.buckets)] if by_history else store.partitions()
+        for unit in units:
+            if by_history:
+                rows = store.read(buckets=unit)
+            else:
+                month, bucket = unit
+                rows = store.read_partition(month, bucket).sort_values(KEY_COLUMNS, kind='stable')
+            if rows.empty:
+                continue
+            rows = rows.drop(columns=[column for column in dropped if column in rows.columns])
+            rows = _apply_groups(_group_by_part(rows), groups).sort_values(KEY_COLUMNS, kind='stable')
+            rows = compact_usage_frame(rows, label=None)
+            months = partition_months(rows['date'])
+            for month, partition in rows.groupby(months, sort=True):
+                bucket = unit[0] if by_history else unit[1]
+                obsolete += store.replace(month, bucket, partition, sequence)
+            if by_history:
+                tails.append(_last_rows(rows))
+            recomputed += len(rows)
+
+        metadata = dict(store.metadata)
+        if by_history:
+            # Row counts and windows may have changed, and with them the history a tail keeps
+            tail = pd.concat(tails, ignore_index=True) if tails else self.tail.iloc[:0]
+            metadata['tail'] = self._write_tail(store, tail, sequence)
+            obsolete.append(os.path.join(store.root, store.metadata['tail']))
+            self._tail = tail
+        store.commit(sequence, definitions=FEATURE_DEFINITIONS, columns=FEATURE_COLUMNS,
+                     metadata=metadata, obsolete=obsolete)
+        logger.info(f"Recomputed {groups} for {recomputed} rows")
+        return recomputed
+
+    def _prepare(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        """Clean rows and put each part's days in order"""
+        rows = clean_usage_rows(dataset.copy())
+        rows['date'] = pd.to_datetime(rows['date'])
+        return rows.sort_values('date', kind='stable', ignore_index=True)
+
+    @staticmethod
+    def _write_tail(store: FeatureStore, tail: pd.DataFrame, sequence: int) -> str:
+        name = f"{TAIL_PREFIX}{sequence:08d}.parquet"
+        tail.to_parquet(os.path.join(store.root, name), index=False)
+        return name
+
+    def _commit(self, store: FeatureStore, featured: pd.DataFrame, tail_rows: pd.DataFrame,
+                through: pd.Timestamp):
+        """Write new feature rows and the advanced tail, then the manifest that makes them visible"""
+        sequence = store.next_sequence()
+        written = store.write(featured, sequence)
+
+        tail = _last_rows(tail_rows)
+        previous = store.metadata.get('tail')
+        metadata = {
+            'through': pd.Timestamp(through).isoformat(),
+            'tail': self._write_tail(store, tail, sequence),
+            'parts': int(tail['part_id'].nunique()),
+            'updated_at': datetime.now().isoformat()
+        }
+        store.commit(sequence, definitions=FEATURE_DEFINITIONS, columns=FEATURE_COLUMNS, metadata=metadata,
+                     obsolete=[os.path.join(store.root, previous)] if previous else [])
+        self._tail = tail
+        store.compact(written)
+
+    def features(self, since: Optional[datetime] = None, columns: Optional[Sequence[str]] = None,
+                 part_ids: Optional[Iterable[str]] = None, until: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Persisted feature rows, one per (date, part), in date order
+
+        Only the month/bucket partitions and columns asked for are read.
+
+        Args:
+            since: Only rows dated on or after this day (None = all)
+            columns: Columns besides date and part_id (None = all)
+            part_ids: Only these parts (None = all)
+            until: Only rows dated on or before this day (None = all)
+
+        Returns:
+            Featured rows; empty before the first rebuild
+        """
+        if not self.state:
+            return pd.DataFrame()
+        return self.store.read(columns=columns, start=since, end=until, part_ids=part_ids)
+
+    def stats(self) -> Dict:
+        """Processed-through day, tracked parts, stored partitions and stale feature groups"""
+        if not self.state:
+            return {'through': None, 'parts': 0, 'partitions': 0}
+        return {'through': self.state['through'], 'parts': self.state['parts'],
+                'partitions': len(self.store.partitions()), 'stale_groups': self.stale_groups()}
@@ -0,0 +1,357 @@
+"""
+Feature Store for the ML Inventory System
+Versioned Parquet feature rows partitioned by month and part bucket, read back by column and partition
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = '_manifest.json'
+DEFAULT_BUCKETS = 16
+
+# Files a partition may collect from appends before it is compacted into one
+MAX_FILES_PER_PARTITION = 16
+
+KEY_COLUMNS = ['date', 'part_id']
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("pyarrow is required for the feature store: pip install pyarrow") from e
+
+
+def _dictionary_schema(schema):
+    """`schema` with every dictionary (category) field indexed by int32"""
+    import pyarrow as pa
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type) and field.type.index_type != pa.int32():
+            schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), field.type.value_type)))
+    return schema
+
+
+def _to_arrow(frame: pd.DataFrame):
+    """
+    Arrow table of `frame` with category columns indexed by int32
+
+    pandas picks the smallest code type that holds a frame's categories, so files
+    written before and after the part catalog grows past 127 parts would disagree.
+    """
+    import pyarrow as pa
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    return table.cast(_dictionary_schema(table.schema))
+
+
+def part_buckets(part_ids, buckets: int) -> np.ndarray:
+    """Bucket of each part id (CRC32 of the id, so stable across processes and runs)"""
+    codes, uniques = pd.factorize(np.asarray(part_ids, dtype=object))
+    by_part = np.array([zlib.crc32(str(part_id).encode()) % buckets for part_id in uniques], dtype=np.int64)
+    return by_part[codes]
+
+
+def partition_months(dates) -> np.ndarray:
+    """'YYYY-MM' month partition of each date (formatting each distinct month once)"""
+    dates = pd.DatetimeIndex(dates)
+    codes, months = pd.factorize(dates.year * 100 + dates.month)
+    labels = np.array([f"{month // 100:04d}-{month % 100:02d}" for month in months], dtype=object)
+    return labels[codes]
+
+
+def definition_hash(version: int, parameters: Optional[Dict] = None) -> str:
+    """Short hash of a feature group's definition: its version and the parameters it is computed with"""
+    text = json.dumps({'version': version, 'parameters': parameters or {}}, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class FeatureStore:
+    """
+    Feature rows on disk, partitioned for selective reads
+
+    Layout: <root>/month=YYYY-MM/bucket=NN/part-<sequence>.parquet plus a manifest.
+    Rows go to the month of their date and the bucket of their part, so a date
+    range or a set of parts reads only its partitions, and `columns` reads only
+    those columns. Each write gets a sequence number; the manifest, written last,
+    records the committed one along with the definition hash and columns of every
+    feature group, so readers know which version of a feature they see. Files of
+    an interrupted write are removed when the store is opened. Within a partition
+    later files replace rows of the same (date, part_id).
+    """
+
+    def __init__(self, root: str, buckets: int = DEFAULT_BUCKETS):
+        """
+        Open (or create) a store
+
+        Args:
+            root: Store directory
+            buckets: Part buckets per month for a new store (an existing store keeps its own)
+        """
+        _require_pyarrow()
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.manifest = self._load_manifest() or {
+            'format_version': FORMAT_VERSION, 'buckets': buckets, 'sequence': 0,
+            'definitions': {}, 'columns': {}, 'metadata': {}
+        }
+        self._next = self.sequence
+        self._discard_uncommitted()
+
+    def _load_manifest(self) -> Optional[Dict]:
+        path = os.path.join(self.root, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            logger.warning(f"Ignoring feature store manifest with format {manifest.get('format_version')}")
+            return None
+        return manifest
+
+    @property
+    def sequence(self) -> int:
+        """Last committed write"""
+        return self.manifest['sequence']
+
+    @property
+    def buckets(self) -> int:
+        return self.manifest['buckets']
+
+    @property
+    def definitions(self) -> Dict[str, str]:
+        """Feature group -> definition hash of the stored columns"""
+        return self.manifest['definitions']
+
+    @property
+    def columns(self) -> Dict[str, List[str]]:
+        """Feature group -> columns it wrote"""
+        return self.manifest['columns']
+
+    @property
+    def metadata(self) -> Dict:
+        """Caller state committed with the features (e.g. the last processed day)"""
+        return self.manifest['metadata']
+
+    def next_sequence(self) -> int:
+        """Sequence number for the next write (committed by `commit`)"""
+        self._next += 1
+        return self._next
+
+    @staticmethod
+    def _file_sequence(path: str) -> int:
+        return int(os.path.basename(path)[len('part-'):-len('.parquet')])
+
+    def _all_files(self) -> List[str]:
+        return glob.glob(os.path.join(self.root, 'month=*', 'bucket=*', 'part-*.parquet'))
+
+    def _discard_uncommitted(self):
+        for path in self._all_files():
+            if self._file_sequence(path) > self.sequence:
+                os.remove(path)
+
+    def _directory(self, month: str, bucket: int) -> str:
+        return os.path.join(self.root, f"month={month}", f"bucket={bucket:02d}")
+
+    def _files(self, month: str, bucket: int) -> List[str]:
+        files = [path for path in glob.glob(os.path.join(self._directory(month, bucket), 'part-*.parquet'))
+                 if self._file_sequence(path) <= self.sequence]
+        return sorted(files, key=self._file_sequence)
+
+    def partitions(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   buckets: Optional[Iterable[int]] = None) -> List[Tuple[str, int]]:
+        """(month, bucket) partitions that can hold rows in the date range and buckets"""
+        first = f"{pd.Timestamp(start):%Y-%m}" if start is not None else None
+        last = f"{pd.Timestamp(end):%Y-%m}" if end is not None else None
+        wanted = None if buckets is None else set(buckets)
+        found = set()
+        for directory in glob.glob(os.path.join(self.root, 'month=*', 'bucket=*')):
+            month = os.path.basename(os.path.dirname(directory))[len('month='):]
+            bucket = int(os.path.basename(directory)[len('bucket='):])
+            if (first and month < first) or (last and month > last) or (wanted is not None and bucket not in wanted):
+                continue
+            found.add((month, bucket))
+        return sorted(found)
+
+    def write(self, frame: pd.DataFrame, sequence: int) -> List[Tuple[str, int]]:
+        """
+        Append rows as files of write `sequence` (visible once committed)
+
+        Returns:
+            Partitions written to
+        """
+        if frame.empty:
+            return []
+        import pyarrow.parquet as pq
+        months = partition_months(frame['date'])
+        buckets = part_buckets(frame['part_id'], self.buckets)
+        # Converted to Arrow once and sliced per partition: a write usually spans many small partitions
+        table = _to_arrow(frame)
+        written = []
+        for (month, bucket), positions in sorted(frame.groupby([months, buckets]).indices.items()):
+            directory = self._directory(month, int(bucket))
+            os.makedirs(directory, exist_ok=True)
+            pq.write_table(table.take(positions), os.path.join(directory, f"part-{sequence:08d}.parquet"))
+            written.append((month, int(bucket)))
+        return written
+
+    def replace(self, month: str, bucket: int, frame: pd.DataFrame, sequence: int) -> List[str]:
+        """
+        Write a partition's complete new contents as write `sequence`
+
+        Returns:
+            The partition's previous files, to pass to `commit` as obsolete
+        """
+        import pyarrow.parquet as pq
+        obsolete = self._files(month, bucket)
+        directory = self._directory(month, bucket)
+        os.makedirs(directory, exist_ok=True)
+        pq.write_table(_to_arrow(frame), os.path.join(directory, f"part-{sequence:08d}.parquet"))
+        return obsolete
+
+    def commit(self, sequence: int, definitions: Optional[Dict[str, str]] = None,
+               columns: Optional[Dict[str, List[str]]] = None, metadata: Optional[Dict] = None,
+               obsolete: Sequence[str] = ()):
+        """Make writes up to `sequence` visible, then delete files they replaced"""
+        manifest = dict(self.manifest, sequence=sequence, committed_at=datetime.now().isoformat())
+        if definitions is not None:
+            manifest['definitions'] = dict(definitions)
+        if columns is not None:
+            manifest['columns'] = {group: list(names) for group, names in columns.items()}
+        if metadata is not None:
+            manifest['metadata'] = dict(metadata)
+
+        path = os.path.join(self.root, MANIFEST_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + '.tmp', path)
+        self.manifest = manifest
+        self._next = max(self._next, sequence)
+
+        for old in obsolete:
+            if os.path.exists(old):
+                os.remove(old)
+
+    def compact(self, partitions: Optional[Iterable[Tuple[str, int]]] = None) -> int:
+        """
+        Merge each partition holding more than MAX_FILES_PER_PARTITION files into one
+
+        Args:
+            partitions: Partitions to check (None = all)
+
+        Returns:
+            Number of partitions compacted
+        """
+        crowded = [(month, bucket) for month, bucket in (partitions or self.partitions())
+                   if len(self._files(month, bucket)) > MAX_FILES_PER_PARTITION]
+        if not crowded:
+            return 0
+        sequence = self.next_sequence()
+        obsolete = []
+        for month, bucket in crowded:
+            obsolete += self.replace(month, bucket, self.read_partition(month, bucket), sequence)
+        self.commit(sequence, obsolete=obsolete)
+        return len(crowded)
+
+    @staticmethod
+    def _read_files(files: List[str], columns: Optional[List[str]] = None,
+                    filters: Optional[List] = None) -> pd.DataFrame:
+        """Rows of `files` read as one dataset, a key's row from the latest file winning"""
+        if not files:
+            return pd.DataFrame(columns=columns or KEY_COLUMNS)
+        import pyarrow.parquet as pq
+        # One scan over all files, not a read per file; the month=/bucket= directories are not columns.
+        # The shared schema also reads files written with narrower category codes (before int32 was fixed).
+        schema = _dictionary_schema(pq.read_schema(files[0]))
+        frame = pq.read_table(files, columns=columns, filters=filters, partitioning=None,
+                              schema=schema).to_pandas()
+        return frame.drop_duplicates(KEY_COLUMNS, keep='last', ignore_index=True)
+
+    def read_partition(self, month: str, bucket: int, columns: Optional[List[str]] = None,
+                        filters: Optional[List] = None) -> pd.DataFrame:
+        return self._read_files(self._files(month, bucket), columns, filters)
+
+    def read(self, columns: Optional[Sequence[str]] = None, start: Optional[datetime] = None,
+             end: Optional[datetime] = None, part_ids: Optional[Iterable[str]] = None,
+             buckets: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """
+        Feature rows, reading only the partitions and columns asked for
+
+        Args:
+            columns: Columns besides date and part_id (None = all)
+            start: First day (None = from the beginning)
+            end: Last day (None = to the end)
+            part_ids: Only these parts (None = all)
+            buckets: Only these part buckets (None = all)
+
+        Returns:
+            One row per (date, part) in date order
+        """
+        if part_ids is not None:
+            part_ids = list(part_ids)
+            selected = set(part_buckets(part_ids, self.buckets).tolist())
+            buckets = selected if buckets is None else selected & set(buckets)
+        wanted = None if columns is None else list(dict.fromkeys(KEY_COLUMNS + list(columns)))
+
+        filters = []
+        if start is not None:
+            filters.append(('date', '>=', pd.Timestamp(start).normalize()))
+        if end is not None:
+            filters.append(('date', '<=', pd.Timestamp(end)))
+        if part_ids is not None:
+            filters.append(('part_id', 'in', part_ids))
+
+        # A (date, part) key lives in one partition, so deduplicating across all of them is exact
+        files = [path for month, bucket in self.partitions(start, end, buckets) for path in self._files(month, bucket)]
+        rows = self._read_files(files, wanted, filters or None)
+        return rows.sort_values(KEY_COLUMNS, kind='stable', ignore_index=True)
+
+    def info(self) -> Dict:
+        """Manifest plus partition and file counts"""
+        partitions = self.partitions()
+        return {**self.manifest, 'root': self.root, 'partitions': len(partitions),
+                'files': sum(len(self._files(month, bucket)) for month, bucket in partitions)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feature store utilities")
+    parser.add_argument('--root', default=os.getenv('FEATURE_STATE_DIR', os.path.join('data', 'feature_state')))
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('info', help="Show the manifest and partitions")
+    export = sub.add_parser('export', help="Write selected feature rows to CSV or Parquet")
+    export.add_argument('--columns', help="Comma-separated columns (default: all)")
+    export.add_argument('--start', help="First day, YYYY-MM-DD")
+    export.add_argument('--end', help="Last day, YYYY-MM-DD")
+    export.add_argument('--parts', help="Comma-separated part ids")
+    export.add_argument('--out', required=True, help="Output .csv or .parquet file")
+    args = parser.parse_args()
+
+    store = FeatureStore(args.root)
+    if args.command == 'info':
+        print(json.dumps(store.info(), indent=2, default=str))
+    else:
+        frame = store.read(columns=args.columns.split(',') if args.columns else None,
+                           start=args.start, end=args.end,
+                           part_ids=args.parts.split(',') if args.parts else None)
+        if args.out.endswith('.parquet'):
+            frame.to_parquet(args.out, index=False)
+        else:
+            frame.to_csv(args.out, index=False)
+        print(f"Wrote {len(frame)} rows x {len(frame.columns)} columns to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
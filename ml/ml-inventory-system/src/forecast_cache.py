@@ -0,0 +1,117 @@
+"""
+Forecast cache for per-part model predictions
+LRU + TTL cache keyed by (part_id, model fingerprint, horizon, as-of date)
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def model_fingerprint(params: Dict[str, Any]) -> str:
+    """
+    Content hash of a fitted model's parameters
+
+    Args:
+        params: Mapping of parameter name -> array-like (e.g. Prophet's model.params)
+
+    Returns:
+        Short hex digest that changes whenever any fitted parameter changes
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for name in sorted(params):
+        digest.update(name.encode('utf-8'))
+        digest.update(np.ascontiguousarray(params[name], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class ForecastCache:
+    """
+    Thread-safe LRU cache with a time-to-live for forecast results
+
+    Keys include the model fingerprint, so a retrained model never serves a stale
+    forecast even before `invalidate` is called; entries also expire after
+    `ttl_seconds` and when the as-of date rolls over.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: Optional[float] = 3600):
+        """
+        Initialize forecast cache
+
+        Args:
+            max_entries: Maximum number of cached forecasts (least recently used evicted first)
+            ttl_seconds: Seconds an entry stays valid (None = no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(part_id: str, fingerprint: str, horizon: Hashable, as_of: Optional[date] = None) -> Tuple:
+        return (part_id, fingerprint, horizon, (as_of or date.today()).isoformat())
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Cached value for `key`, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl_seconds is None or time.monotonic() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, part_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Drop cached forecasts
+
+        Args:
+            part_ids: Parts whose entries to drop (None = everything)
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if part_ids is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+
+            parts = set(part_ids)
+            stale = [key for key in self._entries if key[0] in parts]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Cache size and hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
@@ -9,20 +9,69 @@ from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import joblib
 import os
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+from model_store import LINEAR_STORE_FILE, open_linear_store, save_linear_store, store_exists
+
+def _read_only(array):
+    array = np.ascontiguousarray(array, dtype=float)
+    array.flags.writeable = False
+    return array
+
+@dataclass(frozen=True)
+class CoefficientMatrix:
+    """Immutable stacked scoring state: row i of every array belongs to part_ids[i]
+    
+    Retraining builds a new instance and publishes it with one attribute
+    assignment, so a prediction never pairs one generation's row lookup with
+    another generation's coefficients.
+    """
+    part_ids: Tuple[str, ...]
+    coef: np.ndarray        # parts x features, columns in FEATURE_COLS order
+    intercepts: np.ndarray
+    avg_usage: np.ndarray
+    row: Callable[[str], Optional[int]]
+
+    def rows(self, part_ids):
+        rows = []
+        for part_id in part_ids:
+            row = self.row(part_id)
+            if row is None:
+                raise ValueError(f"Model not trained for part {part_id}")
+            rows.append(row)
+        return np.asarray(rows, dtype=np.int64)
 
 class InventoryForecaster:
+    # Feature columns shared by every per-part model (coefficient order in the model store)
+    FEATURE_COLS = [
+        'day_of_year', 'month', 'day_of_week', 'is_weekend',
+        'usage_lag_1', 'usage_lag_7', 'usage_ma_7', 'usage_ma_30',
+        'seasonal_factor', 'weekly_factor'
+    ]
+
     def __init__(self):
         self.models = {}
         self.part_stats = {}
         self.is_trained = False
+        
+        # Stacked scoring state, replaced as a whole after training or loading
+        self.scoring = CoefficientMatrix((), _read_only(np.zeros((0, len(self.FEATURE_COLS)))),
+                                         _read_only(np.zeros(0)), _read_only(np.zeros(0)), {}.get)
     
     def prepare_data(self, df):
         """Prepare data for training"""
         # Convert date to datetime
         df['date'] = pd.to_datetime(df['date'])
         df = df.sort_values('date')
-        
+
+        if 'usage_rows' in df.columns:
+            # Rows from the feature engine already carry calendar columns, lags and
+            # moving averages; these models only use averages over full windows
+            for window in (7, 30):
+                df[f'usage_ma_{window}'] = df[f'usage_ma_{window}'].where(df['usage_rows'] >= window)
+            return df
+
         # Create time-based features
         df['day_of_year'] = df['date'].dt.dayofyear
         df['month'] = df['date'].dt.month
@@ -30,12 +79,13 @@ class InventoryForecaster:
         df['is_weekend'] = (df['date'].dt.dayofweek >= 5).astype(int)
         
         # Create lag features (previous day usage)
-        df['usage_lag_1'] = df.groupby('part_id')['quantity_used'].shift(1)
-        df['usage_lag_7'] = df.groupby('part_id')['quantity_used'].shift(7)
+        by_part = df.groupby('part_id', observed=True)['quantity_used']
+        df['usage_lag_1'] = by_part.shift(1)
+        df['usage_lag_7'] = by_part.shift(7)
         
         # Rolling averages
-        df['usage_ma_7'] = df.groupby('part_id')['quantity_used'].rolling(7).mean().reset_index(0, drop=True)
-        df['usage_ma_30'] = df.groupby('part_id')['quantity_used'].rolling(30).mean().reset_index(0, drop=True)
+        df['usage_ma_7'] = by_part.rolling(7).mean().reset_index(0, drop=True)
+        df['usage_ma_30'] = by_part.rolling(30).mean().reset_index(0, drop=True)
         
         return df
     
@@ -50,11 +100,7 @@ class InventoryForecaster:
         df_processed = df_processed.dropna()
         
         # Feature columns for training
-        feature_cols = [
-            'day_of_year', 'month', 'day_of_week', 'is_weekend',
-            'usage_lag_1', 'usage_lag_7', 'usage_ma_7', 'usage_ma_30',
-            'seasonal_factor', 'weekly_factor'
-        ]
+        feature_cols = self.FEATURE_COLS
         
         # Train model for each part
         for part_id in df_processed['part_id'].unique():
@@ -86,57 +132,144 @@ class InventoryForecaster:
                 'rmse': rmse,
                 'avg_usage': y.mean(),
                 'std_usage': y.std(),
-                'lead_time': part_data['lead_time_days'].iloc[0],
-                'unit_cost': part_data['unit_cost'].iloc[0],
-                'part_name': part_data['part_name'].iloc[0]
+                # Native scalars: compact columns hold float32/int16 values and categories
+                'lead_time': int(part_data['lead_time_days'].iloc[0]),
+                'unit_cost': float(part_data['unit_cost'].iloc[0]),
+                'part_name': str(part_data['part_name'].iloc[0])
             }
             
             print(f"{part_id}: MAE={mae:.2f}, RMSE={rmse:.2f}, Avg Usage={y.mean():.1f}")
         
         self.is_trained = True
+        self._build_coefficient_matrix()
         print(f"Trained {len(self.models)} models successfully!")
     
+    # Features that are filled with the part's average usage when forecasting
+    PROXY_FEATURES = ['usage_lag_1', 'usage_lag_7', 'usage_ma_7', 'usage_ma_30']
+    
+    def _build_coefficient_matrix(self, store=None):
+        """Stack every model's coef_/intercept_ into one (parts x features) matrix
+        
+        With a model store the memory-mapped arrays are used as-is; otherwise the
+        in-memory models are stacked once here instead of on every prediction.
+        Either way the result is published in a single assignment to self.scoring.
+        """
+        if store is not None:
+            self.scoring = CoefficientMatrix(tuple(store), store.array('coef'), store.array('intercept'),
+                                             store.array('avg_usage'), store.row)
+            return
+        
+        part_ids = tuple(self.models.keys())
+        n_features = len(self.FEATURE_COLS)
+        coef = np.vstack([self.models[p].coef_ for p in part_ids]) if part_ids else np.zeros((0, n_features))
+        self.scoring = CoefficientMatrix(
+            part_ids,
+            _read_only(coef),
+            _read_only([self.models[p].intercept_ for p in part_ids]),
+            _read_only([self.part_stats[p]['avg_usage'] for p in part_ids]),
+            {p: row for row, p in enumerate(part_ids)}.get
+        )
+    
+    def horizon_features(self, days=30, start=None, offsets=None):
+        """Build the calendar part of the feature matrix for future days
+        
+        Covers days 1..N ahead, or only the given day `offsets` (1 = tomorrow).
+        Returns the dates and a (days x features) matrix in FEATURE_COLS order,
+        with the average-usage proxy columns left at zero.
+        """
+        start = start or datetime.now()
+        offsets = range(1, days + 1) if offsets is None else offsets
+        dates = pd.DatetimeIndex([start + timedelta(days=int(i)) for i in offsets])
+        day_of_year = dates.dayofyear.to_numpy()
+        day_of_week = dates.dayofweek.to_numpy()
+        is_weekend = (day_of_week >= 5).astype(int)
+        
+        calendar = {
+            'day_of_year': day_of_year,
+            'month': dates.month.to_numpy(),
+            'day_of_week': day_of_week,
+            'is_weekend': is_weekend,
+            'seasonal_factor': 1 + 0.3 * np.sin(2 * np.pi * day_of_year / 365),
+            'weekly_factor': np.where(is_weekend == 1, 0.7, 1.0)
+        }
+        X = np.zeros((len(dates), len(self.FEATURE_COLS)))
+        for col, name in enumerate(self.FEATURE_COLS):
+            if name in calendar:
+                X[:, col] = calendar[name]
+        return dates, X
+    
+    def predict_matrix(self, part_ids=None, days=30, offsets=None):
+        """Score many parts and horizons against the coefficient matrix in one matmul
+        
+        Args:
+            part_ids: Parts to score (all trained parts if None)
+            days: Horizon length when `offsets` is not given
+            offsets: Specific future day offsets to score (1 = tomorrow)
+        
+        Returns:
+            (part_ids, dates, C-contiguous (parts x horizons) float64 array, clipped at 0)
+        """
+        if not self.is_trained:
+            raise ValueError("Models not trained")
+        # One snapshot for the whole call: a retrain may publish a new one meanwhile
+        scoring = self.scoring
+        part_ids = list(scoring.part_ids) if part_ids is None else list(part_ids)
+        rows = scoring.rows(part_ids)
+        dates, X = self.horizon_features(days, offsets=offsets)
+        
+        coef = scoring.coef[rows]
+        # X_p = X + avg_p * proxy_mask, so X_p @ c_p = X @ c_p + avg_p * sum(c_p[proxy])
+        proxy_cols = [self.FEATURE_COLS.index(name) for name in self.PROXY_FEATURES]
+        offset = scoring.intercepts[rows] + scoring.avg_usage[rows] * coef[:, proxy_cols].sum(axis=1)
+        preds = coef @ X.T
+        preds += offset[:, None]
+        np.maximum(preds, 0, out=preds)  # Ensure non-negative
+        return part_ids, dates, preds
+    
+    def predict_many(self, part_ids, days=30):
+        """Predict the next N days for several parts: (part_ids, dates, parts x days array)"""
+        return self.predict_matrix(part_ids, days)
+    
+    def predict_record_batch(self, part_ids=None, days=30, offsets=None):
+        """Long-format Arrow RecordBatch (part_id, date, predicted_usage); requires pyarrow"""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("pyarrow is required for Arrow output: pip install pyarrow") from e
+        
+        part_ids, dates, preds = self.predict_matrix(part_ids, days, offsets)
+        n_dates = len(dates)
+        return pa.RecordBatch.from_arrays(
+            [
+                pa.DictionaryArray.from_arrays(
+                    pa.array(np.repeat(np.arange(len(part_ids), dtype=np.int32), n_dates)),
+                    pa.array(part_ids, type=pa.string())
+                ),
+                pa.array(np.tile(dates.normalize().values.astype('datetime64[D]'), len(part_ids))),
+                pa.array(preds.ravel())
+            ],
+            names=['part_id', 'date', 'predicted_usage']
+        )
+    
+    def predict_next_days_batch(self, part_ids, days=30):
+        """Predict usage for next N days for several parts: {part_id: [prediction, ...]}"""
+        part_ids, dates, preds = self.predict_many(part_ids, days)
+        date_strings = dates.strftime('%Y-%m-%d').tolist()
+        rounded = np.round(preds, 2).tolist()
+        return {
+            part_id: [
+                {'date': date, 'predicted_usage': value, 'part_id': part_id}
+                for date, value in zip(date_strings, rounded[row])
+            ]
+            for row, part_id in enumerate(part_ids)
+        }
+    
     def predict_next_days(self, part_id, days=30):
         """Predict usage for next N days"""
         if not self.is_trained or part_id not in self.models:
             raise ValueError(f"Model not trained for part {part_id}")
         
-        model = self.models[part_id]
-        stats = self.part_stats[part_id]
-        
-        # Generate future dates
-        last_date = datetime.now()
-        future_dates = [last_date + timedelta(days=i) for i in range(1, days + 1)]
-        
-        predictions = []
-        
-        for i, date in enumerate(future_dates):
-            # Create features for prediction
-            features = {
-                'day_of_year': date.timetuple().tm_yday,
-                'month': date.month,
-                'day_of_week': date.weekday(),
-                'is_weekend': 1 if date.weekday() >= 5 else 0,
-                'usage_lag_1': stats['avg_usage'],  # Use average as proxy
-                'usage_lag_7': stats['avg_usage'],
-                'usage_ma_7': stats['avg_usage'],
-                'usage_ma_30': stats['avg_usage'],
-                'seasonal_factor': 1 + 0.3 * np.sin(2 * np.pi * date.timetuple().tm_yday / 365),
-                'weekly_factor': 0.7 if date.weekday() >= 5 else 1.0
-            }
-            
-            # Make prediction
-            X_pred = pd.DataFrame([features])
-            pred = model.predict(X_pred)[0]
-            pred = max(0, pred)  # Ensure non-negative
-            
-            predictions.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'predicted_usage': round(pred, 2),
-                'part_id': part_id
-            })
-        
-        return predictions
+        return self.predict_next_days_batch([part_id], days)[part_id]
     
     def calculate_reorder_point(self, part_id, service_level=0.95):
         """Calculate optimal reorder point using safety stock formula"""
@@ -190,31 +323,31 @@ class InventoryForecaster:
         }
     
     def save_models(self, models_dir='../models'):
-        """Save trained models to disk"""
+        """Save all trained models to a single model store file"""
         os.makedirs(models_dir, exist_ok=True)
         
-        # Save each model
-        for part_id, model in self.models.items():
-            model_path = os.path.join(models_dir, f'linear_model_{part_id}.pkl')
-            joblib.dump(model, model_path)
+        store_path = save_linear_store(models_dir, self.models, self.part_stats, self.FEATURE_COLS)
         
-        # Save stats
-        stats_path = os.path.join(models_dir, 'part_stats.json')
-        import json
-        with open(stats_path, 'w') as f:
-            json.dump(self.part_stats, f, indent=2, default=str)
-        
-        print(f"Saved {len(self.models)} models to {models_dir}")
+        print(f"Saved {len(self.models)} models to {store_path}")
     
     def load_models(self, models_dir='../models'):
-        """Load trained models from disk"""
+        """Load trained models from disk (memory-mapped store, or legacy per-part pickles)"""
         import json
         
+        if store_exists(os.path.join(models_dir, LINEAR_STORE_FILE)):
+            # Models are rebuilt from the coefficient matrix on first access
+            store, self.models, self.part_stats = open_linear_store(models_dir)
+            self._build_coefficient_matrix(store)
+            self.is_trained = len(self.models) > 0
+            print(f"Loaded {len(self.models)} models from {models_dir}")
+            return
+        
         # Load stats
         stats_path = os.path.join(models_dir, 'part_stats.json')
         if os.path.exists(stats_path):
             with open(stats_path, 'r') as f:
                 self.part_stats = json.load(f)
+            print("Per-part model files found; convert them with: python model_store.py migrate --kind linear")
         
         # Load models
         for part_id in self.part_stats.keys():
@@ -222,6 +355,7 @@ class InventoryForecaster:
             if os.path.exists(model_path):
                 self.models[part_id] = joblib.load(model_path)
         
+        self._build_coefficient_matrix()
         self.is_trained = len(self.models) > 0
         print(f"Loaded {len(self.models)} models from {models_dir}")
 
@@ -0,0 +1,266 @@
+"""
+Single-file Model Store for the ML Inventory System
+Replaces one pickle per part with one versioned, memory-mapped file per model family
+"""
+
+import argparse
+import json
+import logging
+import os
+from collections.abc import MutableMapping
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+# The AEMS file format (header, part index, generations) is the `aems_store` package shared
+# with the baseline service (ml/aems-store, installed by requirements.txt); this module adds
+# the model families of this service
+from aems_store import ModelStore, current_store_path, encode_strings, open_store, store_exists, write_store
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LINEAR_STORE_FILE = 'linear_models.store'
+PROPHET_STORE_FILE = 'prophet_models.store'
+
+# Per-part statistics kept alongside every model family
+STAT_COLUMNS = {
+    'mae': np.float64,
+    'rmse': np.float64,
+    'avg_usage': np.float64,
+    'std_usage': np.float64,
+    'lead_time': np.int32,
+    'unit_cost': np.float64,
+}
+
+
+class StoreBackedMapping(MutableMapping):
+    """
+    Dict-like view over a store that materializes values on first access
+
+    Writes go to an in-memory overlay, so callers can keep treating it as the
+    plain `{part_id: value}` dict the forecasters used before.
+    """
+
+    def __init__(self, store: ModelStore, load_row: Callable[[int], object]):
+        self._store = store
+        self._load_row = load_row
+        self._cache = {}
+        self._removed = set()
+        self._extra = set()
+
+    def __getitem__(self, part_id):
+        if part_id in self._cache:
+            return self._cache[part_id]
+        row = None if part_id in self._removed else self._store.row(part_id)
+        if row is None:
+            raise KeyError(part_id)
+        value = self._load_row(row)
+        self._cache[part_id] = value
+        return value
+
+    def __setitem__(self, part_id, value):
+        if self._store.row(part_id) is None:
+            self._extra.add(part_id)
+        self._removed.discard(part_id)
+        self._cache[part_id] = value
+
+    def __delitem__(self, part_id):
+        if part_id not in self:
+            raise KeyError(part_id)
+        self._cache.pop(part_id, None)
+        self._extra.discard(part_id)
+        if self._store.row(part_id) is not None:
+            self._removed.add(part_id)
+
+    def __contains__(self, part_id):
+        if part_id in self._cache:
+            return True
+        return part_id not in self._removed and self._store.row(part_id) is not None
+
+    def __iter__(self):
+        for part_id in self._store:
+            if part_id not in self._removed:
+                yield part_id
+        yield from (p for p in self._cache if p in self._extra)
+
+    def __len__(self):
+        return len(self._store) - len(self._removed) + len(self._extra)
+
+
+def _stat_arrays(part_ids: List[str], part_stats: Dict) -> Dict[str, np.ndarray]:
+    arrays = {}
+    for name, dtype in STAT_COLUMNS.items():
+        values = [part_stats.get(p, {}).get(name, np.nan if dtype is np.float64 else 0) for p in part_ids]
+        arrays[name] = np.asarray(values, dtype=np.float64).astype(dtype)
+    arrays['part_name'] = encode_strings([part_stats.get(p, {}).get('part_name', 'Unknown') for p in part_ids])
+    return arrays
+
+
+def _stats_loader(store: ModelStore) -> Callable[[int], Dict]:
+    def load(row: int) -> Dict:
+        stats = {name: store.array(name)[row].item() for name in STAT_COLUMNS}
+        stats['part_name'] = store.array('part_name')[row].decode('utf-8')
+        return stats
+    return load
+
+
+def save_linear_store(models_dir: str, models: Dict, part_stats: Dict, feature_cols: List[str]) -> str:
+    """
+    Stack LinearRegression models into one (parts x features) coefficient matrix and save it
+
+    Args:
+        models_dir: Directory to write the store into
+        models: part_id -> fitted LinearRegression
+        part_stats: part_id -> statistics dict
+        feature_cols: Feature order of the coefficient columns
+
+    Returns:
+        Path of the written store
+    """
+    part_ids = list(models.keys())
+    coef = np.zeros((len(part_ids), len(feature_cols)), dtype=np.float64)
+    intercept = np.zeros(len(part_ids), dtype=np.float64)
+    for row, part_id in enumerate(part_ids):
+        coef[row] = models[part_id].coef_
+        intercept[row] = models[part_id].intercept_
+    arrays = {'coef': coef, 'intercept': intercept, **_stat_arrays(part_ids, part_stats)}
+    meta = {'kind': 'linear_regression', 'feature_cols': list(feature_cols)}
+    return str(write_store(os.path.join(models_dir, LINEAR_STORE_FILE), part_ids, arrays, meta))
+
+
+def open_linear_store(models_dir: str):
+    """
+    Open the linear model store
+
+    Returns:
+        (store, models mapping, part_stats mapping); models are rebuilt lazily per part
+    """
+    from sklearn.linear_model import LinearRegression
+
+    store = open_store(os.path.join(models_dir, LINEAR_STORE_FILE))
+    feature_cols = np.asarray(store.meta['feature_cols'], dtype=object)
+
+    def load_model(row: int):
+        model = LinearRegression()
+        model.coef_ = np.array(store.array('coef')[row])
+        model.intercept_ = float(store.array('intercept')[row])
+        model.n_features_in_ = len(feature_cols)
+        model.feature_names_in_ = feature_cols
+        return model
+
+    return store, StoreBackedMapping(store, load_model), StoreBackedMapping(store, _stats_loader(store))
+
+
+def save_prophet_store(models_dir: str, models: Dict, part_stats: Dict) -> str:
+    """
+    Serialize Prophet models (prophet.serialize JSON) back to back into one store
+
+    Args:
+        models_dir: Directory to write the store into
+        models: part_id -> fitted Prophet model
+        part_stats: part_id -> statistics dict
+
+    Returns:
+        Path of the written store
+    """
+    from prophet.serialize import model_to_json
+
+    part_ids = list(models.keys())
+    blobs = [model_to_json(models[p]).encode('utf-8') for p in part_ids]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in blobs])
+    arrays = {'offsets': offsets[:-1], 'lengths': np.diff(offsets),
+              **_stat_arrays(part_ids, part_stats),
+              # Variable-length payload: every model's JSON back to back
+              'blob': np.frombuffer(b''.join(blobs), dtype=np.uint8)}
+    meta = {'kind': 'prophet', 'serialization': 'prophet.serialize.model_to_json'}
+    return str(write_store(os.path.join(models_dir, PROPHET_STORE_FILE), part_ids, arrays, meta))
+
+
+def open_prophet_store(models_dir: str):
+    """
+    Open the Prophet model store
+
+    Returns:
+        (store, models mapping, part_stats mapping); models are deserialized lazily per part
+    """
+    from prophet.serialize import model_from_json
+
+    store = open_store(os.path.join(models_dir, PROPHET_STORE_FILE))
+
+    def load_model(row: int):
+        start = int(store.array('offsets')[row])
+        length = int(store.array('lengths')[row])
+        return model_from_json(store.array('blob')[start:start + length].tobytes().decode('utf-8'))
+
+    return store, StoreBackedMapping(store, load_model), StoreBackedMapping(store, _stats_loader(store))
+
+
+def migrate_linear_dir(models_dir: str) -> Optional[str]:
+    """Convert `linear_model_{id}.pkl` + `part_stats.json` into the linear store"""
+    import joblib
+
+    stats_path = os.path.join(models_dir, 'part_stats.json')
+    if not os.path.exists(stats_path):
+        return None
+    with open(stats_path) as f:
+        part_stats = json.load(f)
+    models = {}
+    for part_id in part_stats:
+        model_path = os.path.join(models_dir, f'linear_model_{part_id}.pkl')
+        if os.path.exists(model_path):
+            models[part_id] = joblib.load(model_path)
+    if not models:
+        return None
+    feature_cols = list(next(iter(models.values())).feature_names_in_)
+    return save_linear_store(models_dir, models, part_stats, feature_cols)
+
+
+def migrate_prophet_dir(models_dir: str) -> Optional[str]:
+    """Convert `prophet_part_{id}.pkl` + `prophet_part_stats.json` into the Prophet store"""
+    import joblib
+
+    stats_path = os.path.join(models_dir, 'prophet_part_stats.json')
+    part_stats = {}
+    if os.path.exists(stats_path):
+        with open(stats_path) as f:
+            part_stats = json.load(f)
+    models = {}
+    for model_file in sorted(os.listdir(models_dir)):
+        if model_file.startswith('prophet_part_') and model_file.endswith('.pkl'):
+            part_id = model_file[len('prophet_part_'):-len('.pkl')]
+            models[part_id] = joblib.load(os.path.join(models_dir, model_file))
+            part_stats.setdefault(part_id, {})
+    if not models:
+        return None
+    return save_prophet_store(models_dir, models, part_stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model store utilities")
+    sub = parser.add_subparsers(dest='command', required=True)
+    migrate = sub.add_parser('migrate', help="Convert per-part pickle files into single-file stores")
+    migrate.add_argument('--models-dir', default='models')
+    migrate.add_argument('--kind', choices=['linear', 'prophet', 'all'], default='all')
+    info = sub.add_parser('info', help="Show a store header")
+    info.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        migrations = {'linear': migrate_linear_dir, 'prophet': migrate_prophet_dir}
+        kinds = list(migrations) if args.kind == 'all' else [args.kind]
+        for kind in kinds:
+            path = migrations[kind](args.models_dir)
+            if path:
+                print(f"{kind}: wrote {len(ModelStore(path))} models to {path}")
+            else:
+                print(f"{kind}: no per-part models found in {args.models_dir}")
+    else:
+        store = open_store(args.path)
+        print(json.dumps({'path': str(store.path), 'format_version': store.format_version, 'parts': len(store),
+                          'arrays': store.array_names, 'meta': store.meta}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,45 +6,326 @@ Connects to your existing MongoDB database to fetch real inventory data
 import os
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional
 import logging
+from bson import ObjectId
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 import numpy as np
+from columnar_reader import DEFAULT_BATCH_SIZE, field, iter_record_batches, projection, read_columnar, ref_id
+from usage_schema import compact_usage_frame
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Inventory fields attached to every usage row, with the value used for parts missing from inventory
+INVENTORY_DEFAULTS = {
+    'current_stock': 0,
+    'min_stock': 0,
+    'lead_time_days': 7
+}
+
+# Column layouts read from each collection (see columnar_reader)
+USAGE_LOG_COLUMNS = [
+    field('date', 'usedAt', dtype='datetime64[ns]'),
+    ref_id('part_id', 'partId'),
+    field('part_name', 'partId', 'name', default='Unknown Part'),
+    field('part_code', 'partId', 'partCode', default=''),
+    field('quantity_used', 'quantityUsed', default=0, dtype=np.float64),
+    field('unit_cost', 'partId', 'unitCost', default=0, dtype=np.float64),
+    field('used_by', 'usedBy', 'name', default='Unknown'),
+    field('note', 'note', default='')
+]
+
+# Usage log columns kept in the local usage store (see usage_store), keyed by log id
+USAGE_SYNC_COLUMNS = [ref_id('log_id', '_id')] + [
+    column for column in USAGE_LOG_COLUMNS if column.name not in ('used_by', 'note')
+]
+
+DAILY_USAGE_COLUMNS = [
+    ref_id('part_id', 'part_id'),
+    field('year', 'year', dtype=np.int64),
+    field('month', 'month', dtype=np.int64),
+    field('day', 'day', dtype=np.int64),
+    field('part_name', 'part_name', default='Unknown Part'),
+    field('part_code', 'part_code', default=''),
+    field('quantity_used', 'quantity_used', default=0, dtype=np.float64),
+    field('unit_cost', 'unit_cost', default=0, dtype=np.float64),
+    field('log_count', 'log_count', default=0, dtype=np.int64)
+]
+
+PART_COLUMNS = [
+    ref_id('part_id', '_id'),
+    field('part_name', 'name', default='Unknown'),
+    field('part_code', 'partCode', default=''),
+    field('current_stock', 'currentStock', default=0, dtype=np.float64),
+    field('min_stock', 'minStock', default=0, dtype=np.float64),
+    field('max_stock', 'maxStock', default=0, dtype=np.float64),
+    field('unit_cost', 'unitCost', default=0, dtype=np.float64),
+    field('supplier', 'supplier', 'name', default='Unknown'),
+    field('category', 'category', default='Unknown'),
+    field('lead_time_days', 'leadTimeDays', default=7, dtype=np.float64),
+    field('is_active', 'isActive', default=True)
+]
+
+# Read after $unwind on items, so each document carries a single `items` entry
+PURCHASE_ORDER_ITEM_COLUMNS = [
+    field('date', 'createdAt', dtype='datetime64[ns]'),
+    ref_id('po_id', '_id'),
+    ref_id('part_id', 'items', 'part', default=''),
+    field('part_name', 'items', 'part', 'name', default='Unknown'),
+    field('quantity_ordered', 'items', 'quantity', default=0, dtype=np.float64),
+    field('unit_cost', 'items', 'unitCost', default=0, dtype=np.float64),
+    field('total_cost', 'items', 'totalCost', default=0, dtype=np.float64),
+    field('supplier', 'supplier', 'name', default='Unknown'),
+    field('status', 'status', default='Unknown')
+]
+
+SUPPLIER_COLUMNS = [
+    ref_id('supplier_id', '_id'),
+    field('name', 'name', default='Unknown'),
+    field('contact_person', 'contactPerson', default=''),
+    field('email', 'email', default=''),
+    field('phone', 'phone', default=''),
+    field('address', 'address', default=''),
+    field('lead_time_days', 'leadTimeDays', default=7, dtype=np.float64),
+    field('is_active', 'isActive', default=True)
+]
+
+
+def database_name(connection_string: str) -> str:
+    """Database to use for a connection string ('automotive' if it names one, else the default)"""
+    if 'automotive' in connection_string.lower():
+        return 'automotive'
+    return 'automotive_service_management'
+
+
+def enrich_with_inventory(daily_usage: pd.DataFrame, inventory_df: pd.DataFrame,
+                          defaults: Dict[str, float] = INVENTORY_DEFAULTS) -> pd.DataFrame:
+    """
+    Attach current inventory fields to each usage row by part_id
+    
+    One hash lookup of every row's part_id against the inventory index, then a
+    gather per field, instead of per-row `.loc` writes. Parts missing from the
+    inventory (or an empty inventory) get `defaults`. Columns are float64, as before.
+    
+    Args:
+        daily_usage: Usage rows with a part_id column (columns are added in place)
+        inventory_df: Parts inventory with part_id and the fields in `defaults`
+        defaults: Field name -> default value
+        
+    Returns:
+        daily_usage with the inventory columns added
+    """
+    if inventory_df.empty or 'part_id' not in inventory_df.columns:
+        lookup = pd.DataFrame(index=pd.Index([], dtype=object))
+    else:
+        # Last record wins for duplicate part ids
+        lookup = inventory_df.drop_duplicates('part_id', keep='last').set_index('part_id')
+    
+    positions = lookup.index.get_indexer(daily_usage['part_id'])
+    found = positions >= 0
+    matched = positions[found]
+    
+    for column, default in defaults.items():
+        values = np.full(len(daily_usage), default, dtype=np.float64)
+        if column in lookup.columns:
+            values[found] = lookup[column].to_numpy(dtype=np.float64, na_value=np.nan)[matched]
+        daily_usage[column] = values
+    
+    return daily_usage
+
+
+DAILY_KEYS = ['date', 'part_id', 'part_name']
+DAILY_AGGREGATIONS = {'quantity_used': 'sum', 'unit_cost': 'first'}
+
+
+def daily_usage_partial(batch: pd.DataFrame) -> pd.DataFrame:
+    """Daily totals of one usage log batch, indexed by DAILY_KEYS (see combine_daily_usage)"""
+    batch = batch.assign(date=batch['date'].dt.normalize())
+    return batch.groupby(DAILY_KEYS, sort=False, observed=True).agg(DAILY_AGGREGATIONS)
+
+
+def combine_daily_usage(partials: List[pd.DataFrame]) -> pd.DataFrame:
+    """Merge per-batch daily totals, in batch order, into one row per (day, part)"""
+    partials = [partial for partial in partials if not partial.empty]
+    if not partials:
+        return pd.DataFrame()
+    return (pd.concat(partials).groupby(level=DAILY_KEYS, sort=False, observed=True)
+            .agg(DAILY_AGGREGATIONS).reset_index())
+
+
+def sum_daily_usage(batches: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Reduce usage log batches to daily totals per part, one batch at a time
+    
+    Args:
+        batches: Usage log frames (date, part_id, part_name, quantity_used, unit_cost)
+                 in usedAt order, so 'first' across batches is the earliest log's cost
+        
+    Returns:
+        DataFrame with date (day), part_id, part_name, quantity_used, unit_cost;
+        empty if there were no rows
+    """
+    return combine_daily_usage([daily_usage_partial(batch) for batch in batches if not batch.empty])
+
+
+def build_ml_training_dataset(usage_df: pd.DataFrame, inventory_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn daily usage and the parts inventory into the ML training dataset
+    
+    The CPU-only half of create_ml_training_dataset, shared with the async connector.
+    
+    Args:
+        usage_df: Usage rows with date, part_id, part_name, quantity_used, unit_cost
+        inventory_df: Parts inventory (may be empty)
+        
+    Returns:
+        One row per (date, part) with inventory, date and seasonal features,
+        in the compact schema of usage_schema
+    """
+    # Create daily usage dataset
+    daily_usage = usage_df.groupby(['date', 'part_id', 'part_name'], observed=True).agg({
+        'quantity_used': 'sum',
+        'unit_cost': 'first'
+    }).reset_index()
+    
+    # Add inventory information (explicit defaults for parts without an inventory record)
+    daily_usage = enrich_with_inventory(daily_usage, inventory_df)
+    
+    # Add date features
+    daily_usage['day_of_week'] = daily_usage['date'].dt.dayofweek
+    daily_usage['day_of_month'] = daily_usage['date'].dt.day
+    daily_usage['month'] = daily_usage['date'].dt.month
+    daily_usage['year'] = daily_usage['date'].dt.year
+    daily_usage['day_of_year'] = daily_usage['date'].dt.dayofyear
+    daily_usage['week_of_year'] = daily_usage['date'].dt.isocalendar().week
+    daily_usage['quarter'] = daily_usage['date'].dt.quarter
+    
+    # Add seasonal features
+    daily_usage['is_month_start'] = daily_usage['date'].dt.is_month_start.astype(int)
+    daily_usage['is_month_end'] = daily_usage['date'].dt.is_month_end.astype(int)
+    daily_usage['is_quarter_start'] = daily_usage['date'].dt.is_quarter_start.astype(int)
+    daily_usage['is_quarter_end'] = daily_usage['date'].dt.is_quarter_end.astype(int)
+    daily_usage['is_year_start'] = daily_usage['date'].dt.is_year_start.astype(int)
+    daily_usage['is_year_end'] = daily_usage['date'].dt.is_year_end.astype(int)
+    daily_usage['is_weekend'] = (daily_usage['day_of_week'] >= 5).astype(int)
+    
+    # Add seasonal factors
+    daily_usage['seasonal_factor'] = np.sin(2 * np.pi * daily_usage['day_of_year'] / 365)
+    daily_usage['weekly_factor'] = np.sin(2 * np.pi * daily_usage['day_of_week'] / 7)
+    
+    return compact_usage_frame(daily_usage, 'ML training dataset')
+
+
+def daily_usage_pipeline(start_date: datetime, end_date: datetime) -> List[Dict]:
+    """
+    Aggregation pipeline that sums partusagelogs into one document per (day, part)
+    
+    Only usedAt, partId and quantityUsed leave the $project stage, and part details
+    are looked up once per daily total rather than carried on every log. partId may
+    be an ObjectId reference or an embedded part document. Days are UTC calendar days.
+    
+    Args:
+        start_date: Inclusive lower bound on usedAt
+        end_date: Inclusive upper bound on usedAt
+        
+    Returns:
+        Pipeline stages for `db.partusagelogs.aggregate`
+    """
+    return [
+        {'$match': {'usedAt': {'$gte': start_date, '$lte': end_date}}},
+        {'$project': {
+            '_id': 0,
+            'usedAt': 1,
+            'quantityUsed': 1,
+            'partId': {'$ifNull': ['$partId._id', '$partId']}
+        }},
+        {'$group': {
+            '_id': {
+                'partId': '$partId',
+                'year': {'$year': '$usedAt'},
+                'month': {'$month': '$usedAt'},
+                'day': {'$dayOfMonth': '$usedAt'}
+            },
+            'quantity_used': {'$sum': '$quantityUsed'},
+            'log_count': {'$sum': 1}
+        }},
+        {'$project': {
+            '_id': 0,
+            'part_id': '$_id.partId',
+            'year': '$_id.year',
+            'month': '$_id.month',
+            'day': '$_id.day',
+            'quantity_used': 1,
+            'log_count': 1
+        }},
+        {'$lookup': {'from': 'parts', 'localField': 'part_id', 'foreignField': '_id', 'as': 'part'}},
+        {'$project': {
+            'part_id': 1,
+            'year': 1,
+            'month': 1,
+            'day': 1,
+            'quantity_used': 1,
+            'log_count': 1,
+            'part_name': {'$arrayElemAt': ['$part.name', 0]},
+            'part_code': {'$arrayElemAt': ['$part.partCode', 0]},
+            'unit_cost': {'$arrayElemAt': ['$part.unitCost', 0]}
+        }},
+        {'$sort': {'year': 1, 'month': 1, 'day': 1, 'part_id': 1}}
+    ]
+
+
+def purchase_order_items_pipeline(start_date: datetime, end_date: datetime) -> List[Dict]:
+    """Purchase orders created in the window, one document per order item (unwound on the server)"""
+    return [
+        {'$match': {'createdAt': {'$gte': start_date, '$lte': end_date}}},
+        {'$sort': {'createdAt': 1}},
+        {'$project': projection(PURCHASE_ORDER_ITEM_COLUMNS)},
+        {'$unwind': '$items'}
+    ]
+
+
 class MongoDBConnector:
     """Connects to MongoDB and fetches real inventory data for ML training"""
     
-    def __init__(self, connection_string: str = None):
+    USAGE_FETCH_MODES = ('aggregate', 'raw')
+    
+    def __init__(self, connection_string: str = None, usage_fetch_mode: str = None,
+                 client: Optional[MongoClient] = None, batch_size: int = None):
         """
         Initialize MongoDB connection
         
         Args:
             connection_string: MongoDB connection string
                               Default: Uses environment variable MONGODB_URI or localhost
+            usage_fetch_mode: How create_ml_training_dataset reads usage logs:
+                              'aggregate' (daily totals grouped on the server) or 'raw'
+                              (every log document). Default: USAGE_FETCH_MODE or 'aggregate'
+            client: Already-connected client to use instead of opening one
+                    (e.g. a mongomock.MongoClient for in-process runs)
+            batch_size: Documents per cursor batch and per columnar record batch
+                        Default: MONGODB_BATCH_SIZE or 10000
         """
         self.connection_string = connection_string or os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
-        self.client = None
+        self.usage_fetch_mode = usage_fetch_mode or os.getenv('USAGE_FETCH_MODE', 'aggregate')
+        if self.usage_fetch_mode not in self.USAGE_FETCH_MODES:
+            raise ValueError(f"usage_fetch_mode must be one of {self.USAGE_FETCH_MODES}, got {self.usage_fetch_mode!r}")
+        self.batch_size = batch_size or int(os.getenv('MONGODB_BATCH_SIZE', str(DEFAULT_BATCH_SIZE)))
+        self.client = client
         self.db = None
         self.connect()
     
     def connect(self):
         """Establish connection to MongoDB"""
         try:
-            self.client = MongoClient(self.connection_string, serverSelectionTimeoutMS=5000)
+            if self.client is None:
+                self.client = MongoClient(self.connection_string, serverSelectionTimeoutMS=5000)
             # Test connection
             self.client.admin.command('ping')
             
-            # Extract database name from connection string or use default
-            if 'automotive' in self.connection_string.lower():
-                db_name = 'automotive'
-            else:
-                db_name = 'automotive_service_management'
-            
+            db_name = database_name(self.connection_string)
             self.db = self.client[db_name]
             logger.info(f"Connected to MongoDB database: {db_name}")
             
@@ -52,6 +333,59 @@ class MongoDBConnector:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
     
+    def iter_parts_usage_batches(self, days_back: int = 365, batch_size: int = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream raw parts usage logs as columnar record batches
+        
+        Args:
+            days_back: Number of days to look back for data
+            batch_size: Rows per batch (default: the connector's batch_size)
+            
+        Yields:
+            DataFrame per batch with the columns of get_parts_usage_data, in usedAt order
+        """
+        batch_size = batch_size or self.batch_size
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days_back)
+        
+        usage_logs = self.db.partusagelogs.find(
+            {'usedAt': {'$gte': start_date, '$lte': end_date}},
+            projection(USAGE_LOG_COLUMNS)
+        ).sort('usedAt', 1).batch_size(batch_size)
+        
+        return iter_record_batches(usage_logs, USAGE_LOG_COLUMNS, batch_size)
+    
+    def iter_usage_logs_after(self, last_id: Optional[str] = None, since: Optional[datetime] = None,
+                              batch_size: int = None, overlap: Optional[timedelta] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream usage logs in _id (insertion) order, past a high-water mark
+        
+        Args:
+            last_id: Only logs with a greater _id (hex ObjectId); None reads from the start
+            since: Only logs used at or after this time
+            batch_size: Rows per batch (default: the connector's batch_size)
+            overlap: Also re-read logs whose _id was created up to this long before last_id's
+                     (ids come from the inserting client, so one below the mark can appear later)
+            
+        Yields:
+            DataFrame per batch with USAGE_SYNC_COLUMNS
+        """
+        batch_size = batch_size or self.batch_size
+        query = {}
+        if last_id:
+            after = ObjectId(last_id)
+            if overlap:
+                after = ObjectId.from_datetime(after.generation_time - overlap)
+            query['_id'] = {'$gt': after}
+        if since is not None:
+            query['usedAt'] = {'$gte': since}
+        
+        usage_logs = self.db.partusagelogs.find(
+            query, projection(USAGE_SYNC_COLUMNS)
+        ).sort('_id', 1).batch_size(batch_size)
+        
+        return iter_record_batches(usage_logs, USAGE_SYNC_COLUMNS, batch_size)
+    
     def get_parts_usage_data(self, days_back: int = 365) -> pd.DataFrame:
         """
         Fetch parts usage data from MongoDB
@@ -63,38 +397,13 @@ class MongoDBConnector:
             DataFrame with parts usage data
         """
         try:
-            # Calculate date range
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
+            batches = list(self.iter_parts_usage_batches(days_back))
             
-            # Fetch from parts usage logs collection
-            usage_logs = self.db.partusagelogs.find({
-                'usedAt': {
-                    '$gte': start_date,
-                    '$lte': end_date
-                }
-            }).sort('usedAt', 1)
-            
-            # Convert to DataFrame
-            data = []
-            for log in usage_logs:
-                data.append({
-                    'date': log['usedAt'],
-                    'part_id': log.get('partId', {}).get('_id', 'unknown'),
-                    'part_name': log.get('partId', {}).get('name', 'Unknown Part'),
-                    'part_code': log.get('partId', {}).get('partCode', ''),
-                    'quantity_used': log.get('quantityUsed', 0),
-                    'unit_cost': log.get('partId', {}).get('unitCost', 0),
-                    'used_by': log.get('usedBy', {}).get('name', 'Unknown'),
-                    'note': log.get('note', '')
-                })
-            
-            if not data:
+            if not batches:
                 logger.warning("No usage data found in MongoDB")
                 return pd.DataFrame()
             
-            df = pd.DataFrame(data)
-            df['date'] = pd.to_datetime(df['date'])
+            df = pd.concat(batches, ignore_index=True)
             
             logger.info(f"Fetched {len(df)} usage records from MongoDB")
             return df
@@ -103,6 +412,66 @@ class MongoDBConnector:
             logger.error(f"Error fetching usage data: {e}")
             return pd.DataFrame()
     
+    def get_daily_usage_from_logs(self, days_back: int = 365) -> pd.DataFrame:
+        """
+        Sum raw usage logs into daily totals per part, one record batch at a time
+        
+        Memory stays bounded by one batch plus the running daily totals, however
+        many logs the window holds.
+        
+        Args:
+            days_back: Number of days to look back for data
+            
+        Returns:
+            DataFrame with date, part_id, part_name, quantity_used, unit_cost
+        """
+        try:
+            daily = sum_daily_usage(self.iter_parts_usage_batches(days_back))
+            
+            if daily.empty:
+                logger.warning("No usage data found in MongoDB")
+                return pd.DataFrame()
+            
+            logger.info(f"Summed usage logs into {len(daily)} daily totals")
+            return daily
+            
+        except Exception as e:
+            logger.error(f"Error fetching usage data: {e}")
+            return pd.DataFrame()
+    
+    def get_daily_usage_data(self, days_back: int = 365) -> pd.DataFrame:
+        """
+        Fetch daily usage totals per part, aggregated on the MongoDB server
+        
+        Args:
+            days_back: Number of days to look back for data
+            
+        Returns:
+            DataFrame with one row per (date, part_id): quantity_used, log_count
+            and the part's name, code and unit cost
+        """
+        try:
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=days_back)
+            
+            totals = self.db.partusagelogs.aggregate(daily_usage_pipeline(start_date, end_date),
+                                                     batchSize=self.batch_size)
+            df = read_columnar(totals, DAILY_USAGE_COLUMNS, self.batch_size)
+            
+            if df.empty:
+                logger.warning("No usage data found in MongoDB")
+                return pd.DataFrame()
+            
+            df['date'] = pd.to_datetime(df[['year', 'month', 'day']])
+            df = df[['date', 'part_id', 'part_name', 'part_code', 'quantity_used', 'unit_cost', 'log_count']]
+            
+            logger.info(f"Fetched {len(df)} daily usage totals ({df['log_count'].sum()} logs) from MongoDB")
+            return df
+            
+        except Exception as e:
+            logger.error(f"Error fetching daily usage data: {e}")
+            return pd.DataFrame()
+    
     def get_parts_inventory_data(self) -> pd.DataFrame:
         """
         Fetch current parts inventory data from MongoDB
@@ -111,30 +480,13 @@ class MongoDBConnector:
             DataFrame with current inventory data
         """
         try:
-            # Fetch from parts collection
-            parts = self.db.parts.find({})
-            
-            data = []
-            for part in parts:
-                data.append({
-                    'part_id': str(part['_id']),
-                    'part_name': part.get('name', 'Unknown'),
-                    'part_code': part.get('partCode', ''),
-                    'current_stock': part.get('currentStock', 0),
-                    'min_stock': part.get('minStock', 0),
-                    'max_stock': part.get('maxStock', 0),
-                    'unit_cost': part.get('unitCost', 0),
-                    'supplier': part.get('supplier', {}).get('name', 'Unknown'),
-                    'category': part.get('category', 'Unknown'),
-                    'lead_time_days': part.get('leadTimeDays', 7),
-                    'is_active': part.get('isActive', True)
-                })
-            
-            if not data:
+            parts = self.db.parts.find({}, projection(PART_COLUMNS)).batch_size(self.batch_size)
+            df = read_columnar(parts, PART_COLUMNS, self.batch_size)
+            
+            if df.empty:
                 logger.warning("No parts data found in MongoDB")
                 return pd.DataFrame()
             
-            df = pd.DataFrame(data)
             logger.info(f"Fetched {len(df)} parts from MongoDB")
             return df
             
@@ -157,37 +509,14 @@ class MongoDBConnector:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days_back)
             
-            # Fetch from purchase orders collection
-            pos = self.db.purchaseorders.find({
-                'createdAt': {
-                    '$gte': start_date,
-                    '$lte': end_date
-                }
-            }).sort('createdAt', 1)
-            
-            data = []
-            for po in pos:
-                # Get items from the purchase order
-                for item in po.get('items', []):
-                    data.append({
-                        'date': po['createdAt'],
-                        'po_id': str(po['_id']),
-                        'part_id': str(item.get('part', {}).get('_id', '')),
-                        'part_name': item.get('part', {}).get('name', 'Unknown'),
-                        'quantity_ordered': item.get('quantity', 0),
-                        'unit_cost': item.get('unitCost', 0),
-                        'total_cost': item.get('totalCost', 0),
-                        'supplier': po.get('supplier', {}).get('name', 'Unknown'),
-                        'status': po.get('status', 'Unknown')
-                    })
-            
-            if not data:
+            items = self.db.purchaseorders.aggregate(purchase_order_items_pipeline(start_date, end_date),
+                                                     batchSize=self.batch_size)
+            df = read_columnar(items, PURCHASE_ORDER_ITEM_COLUMNS, self.batch_size)
+            
+            if df.empty:
                 logger.warning("No purchase orders data found in MongoDB")
                 return pd.DataFrame()
             
-            df = pd.DataFrame(data)
-            df['date'] = pd.to_datetime(df['date'])
-            
             logger.info(f"Fetched {len(df)} purchase order items from MongoDB")
             return df
             
@@ -203,26 +532,13 @@ class MongoDBConnector:
             DataFrame with suppliers data
         """
         try:
-            suppliers = self.db.suppliers.find({})
-            
-            data = []
-            for supplier in suppliers:
-                data.append({
-                    'supplier_id': str(supplier['_id']),
-                    'name': supplier.get('name', 'Unknown'),
-                    'contact_person': supplier.get('contactPerson', ''),
-                    'email': supplier.get('email', ''),
-                    'phone': supplier.get('phone', ''),
-                    'address': supplier.get('address', ''),
-                    'lead_time_days': supplier.get('leadTimeDays', 7),
-                    'is_active': supplier.get('isActive', True)
-                })
-            
-            if not data:
+            suppliers = self.db.suppliers.find({}, projection(SUPPLIER_COLUMNS)).batch_size(self.batch_size)
+            df = read_columnar(suppliers, SUPPLIER_COLUMNS, self.batch_size)
+            
+            if df.empty:
                 logger.warning("No suppliers data found in MongoDB")
                 return pd.DataFrame()
             
-            df = pd.DataFrame(data)
             logger.info(f"Fetched {len(df)} suppliers from MongoDB")
             return df
             
@@ -230,19 +546,27 @@ class MongoDBConnector:
             logger.error(f"Error fetching suppliers data: {e}")
             return pd.DataFrame()
     
-    def create_ml_training_dataset(self, days_back: int = 365) -> pd.DataFrame:
+    def create_ml_training_dataset(self, days_back: int = 365,
+                                   daily_usage: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         """
         Create comprehensive dataset for ML training from MongoDB data
         
         Args:
             days_back: Number of days to look back for data
+            daily_usage: Daily usage totals already at hand (e.g. from the local usage
+                         store); fetched according to usage_fetch_mode when None
             
         Returns:
             DataFrame ready for ML training
         """
         try:
             # Get all data
-            usage_df = self.get_parts_usage_data(days_back)
+            if daily_usage is not None:
+                usage_df = daily_usage
+            elif self.usage_fetch_mode == 'aggregate':
+                usage_df = self.get_daily_usage_data(days_back)
+            else:
+                usage_df = self.get_daily_usage_from_logs(days_back)
             inventory_df = self.get_parts_inventory_data()
             po_df = self.get_purchase_orders_data(days_back)
             
@@ -250,48 +574,7 @@ class MongoDBConnector:
                 logger.warning("No usage data available for ML training")
                 return pd.DataFrame()
             
-            # Create daily usage dataset
-            daily_usage = usage_df.groupby(['date', 'part_id', 'part_name']).agg({
-                'quantity_used': 'sum',
-                'unit_cost': 'first'
-            }).reset_index()
-            
-            # Add inventory information
-            inventory_lookup = inventory_df.set_index('part_id')[['current_stock', 'min_stock', 'lead_time_days']].to_dict('index')
-            
-            # Add inventory data to usage data
-            for idx, row in daily_usage.iterrows():
-                part_id = row['part_id']
-                if part_id in inventory_lookup:
-                    daily_usage.loc[idx, 'current_stock'] = inventory_lookup[part_id]['current_stock']
-                    daily_usage.loc[idx, 'min_stock'] = inventory_lookup[part_id]['min_stock']
-                    daily_usage.loc[idx, 'lead_time_days'] = inventory_lookup[part_id]['lead_time_days']
-                else:
-                    daily_usage.loc[idx, 'current_stock'] = 0
-                    daily_usage.loc[idx, 'min_stock'] = 0
-                    daily_usage.loc[idx, 'lead_time_days'] = 7
-            
-            # Add date features
-            daily_usage['day_of_week'] = daily_usage['date'].dt.dayofweek
-            daily_usage['day_of_month'] = daily_usage['date'].dt.day
-            daily_usage['month'] = daily_usage['date'].dt.month
-            daily_usage['year'] = daily_usage['date'].dt.year
-            daily_usage['day_of_year'] = daily_usage['date'].dt.dayofyear
-            daily_usage['week_of_year'] = daily_usage['date'].dt.isocalendar().week
-            daily_usage['quarter'] = daily_usage['date'].dt.quarter
-            
-            # Add seasonal features
-            daily_usage['is_month_start'] = daily_usage['date'].dt.is_month_start.astype(int)
-            daily_usage['is_month_end'] = daily_usage['date'].dt.is_month_end.astype(int)
-            daily_usage['is_quarter_start'] = daily_usage['date'].dt.is_quarter_start.astype(int)
-            daily_usage['is_quarter_end'] = daily_usage['date'].dt.is_quarter_end.astype(int)
-            daily_usage['is_year_start'] = daily_usage['date'].dt.is_year_start.astype(int)
-            daily_usage['is_year_end'] = daily_usage['date'].dt.is_year_end.astype(int)
-            daily_usage['is_weekend'] = (daily_usage['day_of_week'] >= 5).astype(int)
-            
-            # Add seasonal factors
-            daily_usage['seasonal_factor'] = np.sin(2 * np.pi * daily_usage['day_of_year'] / 365)
-            daily_usage['weekly_factor'] = np.sin(2 * np.pi * daily_usage['day_of_week'] / 7)
+            daily_usage = build_ml_training_dataset(usage_df, inventory_df)
             
             logger.info(f"Created ML training dataset with {len(daily_usage)} records")
             return daily_usage
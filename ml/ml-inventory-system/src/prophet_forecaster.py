@@ -9,33 +9,145 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
 import joblib
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from prophet import Prophet
 from prophet.plot import plot_plotly, plot_components_plotly
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from model_store import PROPHET_STORE_FILE, current_store_path, open_prophet_store, save_prophet_store, store_exists
+from forecast_cache import ForecastCache, model_fingerprint
+from reorder_table import ReorderTable
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Minimum number of daily points needed to fit a part's model
+MIN_TRAINING_POINTS = 30
+
+
+def _fit_part(part_id: str, part_data: pd.DataFrame, prophet_params: Dict) -> Dict:
+    """
+    Fit and evaluate one part's Prophet model
+    
+    Module-level so it can run in a worker process. Failures are returned in the
+    result instead of raised, so one bad part never aborts the whole training run.
+    
+    Returns:
+        Dictionary with part_id, model, stats, seconds and error (None on success)
+    """
+    started = time.perf_counter()
+    try:
+        # Create Prophet model with custom seasonalities and holidays
+        model = Prophet(**prophet_params)
+        model = ProphetInventoryForecaster.add_custom_seasonalities(model, part_data)
+        model.add_country_holidays(country_name='US')
+        
+        # Add business day indicator
+        part_data = part_data.copy()
+        part_data['is_business_day'] = (part_data['ds'].dt.weekday < 5).astype(int)
+        
+        model.fit(part_data)
+        
+        # Calculate model performance on the training dates
+        forecast = model.predict(part_data[['ds', 'is_business_day']])
+        actual = part_data['y'].values
+        predicted = forecast['yhat'].values[:len(actual)]
+        
+        mae = np.mean(np.abs(actual - predicted))
+        rmse = np.sqrt(np.mean((actual - predicted) ** 2))
+        
+        # Native Python scalars so stats serialize directly into API responses
+        stats = {
+            'mae': float(mae),
+            'rmse': float(rmse),
+            'avg_usage': float(actual.mean()),
+            'std_usage': float(actual.std()),
+            'lead_time': int(part_data['lead_time_days'].iloc[0]) if 'lead_time_days' in part_data.columns else 7,
+            'unit_cost': float(part_data['unit_cost'].iloc[0]) if 'unit_cost' in part_data.columns else 0.0,
+            'part_name': str(part_data['part_name'].iloc[0]) if 'part_name' in part_data.columns else 'Unknown'
+        }
+        return {'part_id': part_id, 'model': model, 'stats': stats,
+                'seconds': time.perf_counter() - started, 'error': None}
+    
+    except Exception as e:
+        return {'part_id': part_id, 'model': None, 'stats': None,
+                'seconds': time.perf_counter() - started, 'error': str(e)}
+
+
+def _fit_chunk(chunk: List[Tuple[str, pd.DataFrame]], prophet_params: Dict) -> List[Dict]:
+    """Fit a chunk of parts in one worker task (amortizes process round-trips)"""
+    return [_fit_part(part_id, part_data, prophet_params) for part_id, part_data in chunk]
+
+
+def future_dates_frame(model: Prophet, days: int) -> pd.DataFrame:
+    """
+    Prediction frame for the next N days after the model's history only
+    
+    Unlike `make_future_dataframe`, the training dates are not included, so
+    predicting a 30-day horizon scores 30 rows instead of history + 30.
+    """
+    last_date = model.history['ds'].max()
+    future = pd.DataFrame({'ds': pd.date_range(last_date + timedelta(days=1), periods=days, freq='D')})
+    future['is_business_day'] = (future['ds'].dt.weekday < 5).astype(int)
+    return future
+
+
+def predict_frame(model: Prophet, future: pd.DataFrame, include_intervals: bool = True) -> pd.DataFrame:
+    """
+    Predict `future` with a fitted model, optionally skipping uncertainty sampling
+    
+    Without intervals only trend and seasonal components are evaluated, which
+    avoids simulating `uncertainty_samples` trend paths per row.
+    
+    Returns:
+        DataFrame with ds and yhat (plus yhat_lower / yhat_upper when include_intervals)
+    """
+    if include_intervals:
+        return model.predict(future)
+    
+    df = model.setup_dataframe(future.copy())
+    trend = model.predict_trend(df)
+    components = model.predict_seasonal_components(df)
+    return pd.DataFrame({
+        'ds': df['ds'].values,
+        'yhat': trend * (1 + components['multiplicative_terms'].values) + components['additive_terms'].values
+    })
+
+
 class ProphetInventoryForecaster:
     """
     Advanced inventory forecasting using Facebook Prophet
     Handles seasonality, trends, and holidays for better predictions
     """
     
-    def __init__(self, models_dir: str = "models"):
+    def __init__(self, models_dir: str = "models", n_jobs: Optional[int] = None,
+                 cache_size: int = 2048, cache_ttl: Optional[float] = 3600):
         """
         Initialize Prophet forecaster
         
         Args:
             models_dir: Directory to save/load Prophet models
+            n_jobs: Worker processes used for training (default: PROPHET_N_JOBS or 1; -1 = all cores)
+            cache_size: Maximum number of cached forecasts
+            cache_ttl: Seconds a cached forecast stays valid (None = until the model changes)
         """
         self.models_dir = models_dir
         self.models = {}  # Store trained Prophet models
         self.part_stats = {}  # Store part statistics
+        self.training_report = {}  # part_id -> {'seconds', 'status', 'error'} for the last training run
         self.is_trained = False
+        self.n_jobs = n_jobs if n_jobs is not None else int(os.getenv('PROPHET_N_JOBS', '1'))
+        
+        # Forecasts are cached per (part, model fingerprint, horizon, as-of date)
+        self.forecast_cache = ForecastCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+        self._fingerprints = {}  # part_id -> fingerprint of the model currently in self.models
+        
+        # Recommendations are re-planned only for parts whose model fingerprint or stock changed
+        self.reorder_table = ReorderTable()
         
         # Create models directory if it doesn't exist
         os.makedirs(models_dir, exist_ok=True)
@@ -66,6 +178,7 @@ class ProphetInventoryForecaster:
             # Prophet expects 'ds' (datestamp) and 'y' (value) columns
             prophet_data = df.copy()
             prophet_data = prophet_data.rename(columns={'date': 'ds', 'quantity_used': 'y'})
+            prophet_data['ds'] = pd.to_datetime(prophet_data['ds'])
             
             # Ensure data is sorted by date
             prophet_data = prophet_data.sort_values('ds')
@@ -83,7 +196,8 @@ class ProphetInventoryForecaster:
             logger.error(f"Error preparing data for Prophet: {e}")
             return pd.DataFrame()
     
-    def add_custom_seasonalities(self, model: Prophet, df: pd.DataFrame) -> Prophet:
+    @staticmethod
+    def add_custom_seasonalities(model: Prophet, df: pd.DataFrame) -> Prophet:
         """
         Add custom seasonalities based on business patterns
         
@@ -165,12 +279,19 @@ class ProphetInventoryForecaster:
         
         return pd.DataFrame(holidays)
     
-    def train_model(self, df: pd.DataFrame) -> bool:
+    def train_model(self, df: pd.DataFrame, n_jobs: Optional[int] = None,
+                    chunk_size: Optional[int] = None) -> bool:
         """
         Train Prophet models for each part
         
+        Parts are fitted in parallel worker processes when more than one job is
+        requested. A part that fails to fit is logged and skipped; per-part wall
+        times and failures are kept in `training_report`.
+        
         Args:
             df: DataFrame with usage data
+            n_jobs: Worker processes (default: self.n_jobs; -1 = all cores; 1 = in-process)
+            chunk_size: Parts per worker task (default: spread evenly, ~4 tasks per worker)
             
         Returns:
             True if training successful, False otherwise
@@ -185,77 +306,101 @@ class ProphetInventoryForecaster:
                 logger.error("No data available for training")
                 return False
             
-            # Train model for each part
-            for part_id in df_processed['part_id'].unique():
-                part_data = df_processed[df_processed['part_id'] == part_id].copy()
-                
-                if len(part_data) < 30:  # Need minimum data points
+            # Split once by part instead of filtering the full frame per part
+            parts = []
+            for part_id, part_data in df_processed.groupby('part_id', sort=False, observed=True):
+                if len(part_data) < MIN_TRAINING_POINTS:  # Need minimum data points
                     logger.warning(f"Skipping {part_id}: insufficient data ({len(part_data)} points)")
                     continue
-                
-                # Create Prophet model
-                model = Prophet(**self.prophet_params)
-                
-                # Add custom seasonalities
-                model = self.add_custom_seasonalities(model, part_data)
-                
-                # Add holidays
-                if len(part_data) > 0:
-                    start_date = part_data['ds'].min()
-                    end_date = part_data['ds'].max() + timedelta(days=365)  # Include future dates
-                    holidays_df = self.create_holidays_dataframe(start_date, end_date)
-                    model.add_country_holidays(country_name='US')
-                
-                # Add business day indicator
-                part_data['is_business_day'] = (part_data['ds'].dt.weekday < 5).astype(int)
-                
-                # Fit the model
-                try:
-                    model.fit(part_data)
-                    self.models[part_id] = model
-                    
-                    # Calculate model performance
-                    future = model.make_future_dataframe(periods=0)
-                    forecast = model.predict(future)
-                    
-                    # Calculate metrics
-                    actual = part_data['y'].values
-                    predicted = forecast['yhat'].values[:len(actual)]
-                    
-                    mae = np.mean(np.abs(actual - predicted))
-                    rmse = np.sqrt(np.mean((actual - predicted) ** 2))
-                    
-                    self.part_stats[part_id] = {
-                        'mae': mae,
-                        'rmse': rmse,
-                        'avg_usage': actual.mean(),
-                        'std_usage': actual.std(),
-                        'lead_time': part_data['lead_time_days'].iloc[0] if 'lead_time_days' in part_data.columns else 7,
-                        'unit_cost': part_data['unit_cost'].iloc[0] if 'unit_cost' in part_data.columns else 0,
-                        'part_name': part_data['part_name'].iloc[0] if 'part_name' in part_data.columns else 'Unknown'
-                    }
-                    
-                    logger.info(f"{part_id}: MAE={mae:.2f}, RMSE={rmse:.2f}, Avg Usage={actual.mean():.1f}")
-                    
-                except Exception as e:
-                    logger.error(f"Error training model for {part_id}: {e}")
+                parts.append((part_id, part_data))
+            
+            n_jobs = self.n_jobs if n_jobs is None else n_jobs
+            if n_jobs is None or n_jobs < 1:
+                n_jobs = os.cpu_count() or 1
+            n_jobs = min(n_jobs, max(len(parts), 1))
+            
+            started = time.perf_counter()
+            results = []
+            if n_jobs == 1:
+                for part_id, part_data in parts:
+                    results.append(_fit_part(part_id, part_data, self.prophet_params))
+            else:
+                chunk_size = chunk_size or max(1, len(parts) // (n_jobs * 4))
+                chunks = [parts[i:i + chunk_size] for i in range(0, len(parts), chunk_size)]
+                logger.info(f"Fitting {len(parts)} parts on {n_jobs} workers ({len(chunks)} chunks)")
+                # Spawned, not forked: training runs inside the threaded API service (event
+                # loop, thread pool, MongoDB clients), and forking live threads can deadlock workers
+                with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn')) as executor:
+                    futures = {executor.submit(_fit_chunk, chunk, self.prophet_params): chunk for chunk in chunks}
+                    for future in as_completed(futures):
+                        try:
+                            results.extend(future.result())
+                        except Exception as e:
+                            # Worker crashed (e.g. killed): mark the whole chunk as failed
+                            results.extend({'part_id': part_id, 'model': None, 'stats': None,
+                                            'seconds': 0.0, 'error': str(e)} for part_id, _ in futures[future])
+            
+            self.training_report = {}
+            for result in results:
+                part_id = result['part_id']
+                self.training_report[part_id] = {
+                    'seconds': round(result['seconds'], 3),
+                    'status': 'failed' if result['error'] else 'trained',
+                    'error': result['error']
+                }
+                if result['error']:
+                    logger.error(f"Error training model for {part_id}: {result['error']}")
                     continue
-            
+                
+                self.models[part_id] = result['model']
+                self.part_stats[part_id] = result['stats']
+                self._forget_forecasts(part_id)
+                stats = result['stats']
+                logger.info(f"{part_id}: MAE={stats['mae']:.2f}, RMSE={stats['rmse']:.2f}, "
+                            f"Avg Usage={stats['avg_usage']:.1f} ({result['seconds']:.1f}s)")
+            
+            failed = sum(1 for r in results if r['error'])
             self.is_trained = True
-            logger.info(f"Trained {len(self.models)} Prophet models successfully!")
+            logger.info(f"Trained {len(results) - failed} Prophet models successfully "
+                        f"({failed} failed) in {time.perf_counter() - started:.1f}s")
             return True
             
         except Exception as e:
             logger.error(f"Error training Prophet models: {e}")
             return False
     
-    def predict(self, part_id: str, days: int = 30) -> Dict:
+    def _model_fingerprint(self, part_id: str) -> str:
+        """Fingerprint of the part's current model (computed once per loaded/trained model)"""
+        fingerprint = self._fingerprints.get(part_id)
+        if fingerprint is None:
+            fingerprint = model_fingerprint(self.models[part_id].params)
+            self._fingerprints[part_id] = fingerprint
+        return fingerprint
+    
+    def _forget_forecasts(self, part_id: Optional[str] = None):
+        """Invalidate cached forecasts for one part (or all parts) after its model changed"""
+        if part_id is None:
+            self._fingerprints.clear()
+            self.forecast_cache.invalidate()
+        else:
+            self._fingerprints.pop(part_id, None)
+            self.forecast_cache.invalidate([part_id])
+    
+    def predict(self, part_id: str, days: int = 30, include_intervals: bool = True,
+                columnar: bool = False) -> Dict:
         """
         Make predictions for a specific part
         
+        Only the future dates are scored (not the training history). Results are
+        served from `forecast_cache` until the part's model is replaced, the entry
+        expires, or the date changes; treat the returned dict as read-only.
+        
         Args:
             part_id: Part ID to predict
             days: Number of days to predict ahead
+            include_intervals: Compute lower/upper bounds (skipping them avoids uncertainty sampling)
+            columnar: Return `predictions` as parallel arrays ({'date': [...], 'predicted_usage': [...], ...})
+                instead of one dict per day
             
         Returns:
             Dictionary with predictions and confidence intervals
@@ -266,22 +411,18 @@ class ProphetInventoryForecaster:
             
             model = self.models[part_id]
             
-            # Create future dataframe
-            future = model.make_future_dataframe(periods=days)
+            cache_key = ForecastCache.make_key(part_id, self._model_fingerprint(part_id), (days, include_intervals, columnar))
+            cached = self.forecast_cache.get(cache_key)
+            if cached is not None:
+                return cached
             
-            # Add business day indicator for future dates
-            future['is_business_day'] = (future['ds'].dt.weekday < 5).astype(int)
-            
-            # Make predictions
-            forecast = model.predict(future)
-            
-            # Get only future predictions
-            future_forecast = forecast.tail(days)
+            # Predict the future dates only (with business day indicator)
+            future_forecast = predict_frame(model, future_dates_frame(model, days), include_intervals)
             
             # Calculate reorder point and safety stock
             recent_usage = future_forecast['yhat'].mean()
             usage_std = future_forecast['yhat'].std()
-            lead_time = self.part_stats[part_id]['lead_time_days']
+            lead_time = self.part_stats[part_id]['lead_time']
             
             # Safety stock calculation (using service level of 95%)
             safety_stock = 1.96 * usage_std * np.sqrt(lead_time)
@@ -294,19 +435,11 @@ class ProphetInventoryForecaster:
             holding_cost_rate = 0.2  # 20% annual holding cost
             eoq = np.sqrt(2 * annual_usage * ordering_cost / (unit_cost * holding_cost_rate))
             
-            return {
+            result = {
                 'part_id': part_id,
                 'part_name': self.part_stats[part_id]['part_name'],
-                'predictions': [
-                    {
-                        'date': row['ds'].strftime('%Y-%m-%d'),
-                        'predicted_usage': max(0, row['yhat']),
-                        'lower_bound': max(0, row['yhat_lower']),
-                        'upper_bound': max(0, row['yhat_upper']),
-                        'confidence': row['yhat_upper'] - row['yhat_lower']
-                    }
-                    for _, row in future_forecast.iterrows()
-                ],
+                'predictions': (self._prediction_columns(future_forecast, include_intervals) if columnar
+                                else self._prediction_rows(future_forecast, include_intervals)),
                 'reorder_info': {
                     'reorder_point': max(0, int(reorder_point)),
                     'safety_stock': max(0, int(safety_stock)),
@@ -324,76 +457,79 @@ class ProphetInventoryForecaster:
                     'avg_usage': self.part_stats[part_id]['avg_usage']
                 }
             }
+            self.forecast_cache.put(cache_key, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error making predictions for {part_id}: {e}")
             return {}
     
-    def get_reorder_recommendations(self, current_stock: Dict[str, int]) -> List[Dict]:
+    @staticmethod
+    def _prediction_columns(forecast: pd.DataFrame, include_intervals: bool) -> Dict[str, List]:
+        """Parallel per-day arrays from a forecast frame (vectorized formatting and clipping)"""
+        columns = {
+            'date': np.datetime_as_string(forecast['ds'].values, unit='D').tolist(),
+            'predicted_usage': np.maximum(forecast['yhat'].to_numpy(dtype=float), 0).tolist()
+        }
+        if include_intervals:
+            lower = forecast['yhat_lower'].to_numpy(dtype=float)
+            upper = forecast['yhat_upper'].to_numpy(dtype=float)
+            columns['lower_bound'] = np.maximum(lower, 0).tolist()
+            columns['upper_bound'] = np.maximum(upper, 0).tolist()
+            columns['confidence'] = (upper - lower).tolist()
+        return columns
+    
+    @classmethod
+    def _prediction_rows(cls, forecast: pd.DataFrame, include_intervals: bool) -> List[Dict]:
+        """Per-day prediction dicts from a forecast frame"""
+        columns = cls._prediction_columns(forecast, include_intervals)
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
+    
+    def get_reorder_recommendations(self, current_stock: Dict[str, int], priority: Optional[str] = None,
+                                    offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
         """
         Get reorder recommendations for all parts
         
+        Served from `reorder_table`, which re-forecasts only parts whose model
+        changed and re-ranks only parts whose stock changed since the last call.
+        
         Args:
             current_stock: Dictionary with part_id -> current_stock mapping
+            priority: Only recommendations of this priority ('HIGH', 'MEDIUM', 'LOW')
+            offset: Recommendations to skip (paging)
+            limit: Most recommendations to return (None = all)
             
         Returns:
-            List of reorder recommendations
+            List of reorder recommendations, by priority then days until reorder
         """
         try:
-            recommendations = []
-            
-            for part_id in self.models.keys():
-                if part_id not in current_stock:
-                    continue
-                
-                # Get predictions
-                prediction = self.predict(part_id, 30)
-                if not prediction:
-                    continue
-                
-                current = current_stock[part_id]
-                reorder_point = prediction['reorder_info']['reorder_point']
-                safety_stock = prediction['reorder_info']['safety_stock']
-                lead_time = prediction['reorder_info']['lead_time_days']
-                eoq = prediction['eoq_info']['eoq']
-                
-                # Calculate days until reorder
-                daily_usage = prediction['model_performance']['avg_usage']
-                days_until_reorder = max(0, (current - reorder_point) / daily_usage) if daily_usage > 0 else 999
-                
-                # Determine priority
-                if current <= safety_stock:
-                    priority = 'HIGH'
-                elif current <= reorder_point:
-                    priority = 'MEDIUM'
-                elif days_until_reorder <= lead_time:
-                    priority = 'LOW'
-                else:
-                    continue  # No reorder needed
-                
-                recommendations.append({
-                    'part_id': part_id,
-                    'part_name': prediction['part_name'],
-                    'current_stock': current,
-                    'reorder_point': reorder_point,
-                    'safety_stock': safety_stock,
-                    'recommended_order_quantity': eoq,
-                    'days_until_reorder': int(days_until_reorder),
-                    'lead_time_days': lead_time,
-                    'unit_cost': self.part_stats[part_id]['unit_cost'],
-                    'priority': priority
-                })
-            
-            # Sort by priority
-            priority_order = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
-            recommendations.sort(key=lambda x: priority_order.get(x['priority'], 3))
-            
-            return recommendations
+            versions = {part_id: self._model_fingerprint(part_id)
+                        for part_id in self.models.keys() if part_id in current_stock}
+            self.reorder_table.refresh(current_stock, versions, self._reorder_plan)
+            return self.reorder_table.query(priority, offset, limit)
             
         except Exception as e:
             logger.error(f"Error getting reorder recommendations: {e}")
             return []
     
+    def _reorder_plan(self, part_id: str) -> Optional[Dict]:
+        """Planning values for the reorder table, from the part's 30-day point forecast"""
+        # Only point forecasts are needed here, so skip interval sampling
+        prediction = self.predict(part_id, 30, include_intervals=False)
+        if not prediction:
+            return None
+        
+        return {
+            'part_name': prediction['part_name'],
+            'reorder_point': prediction['reorder_info']['reorder_point'],
+            'safety_stock': prediction['reorder_info']['safety_stock'],
+            'lead_time_days': prediction['reorder_info']['lead_time_days'],
+            'eoq': prediction['eoq_info']['eoq'],
+            'avg_usage': prediction['model_performance']['avg_usage'],
+            'unit_cost': self.part_stats[part_id]['unit_cost']
+        }
+    
     def save_models(self) -> bool:
         """
         Save trained models to disk
@@ -402,15 +538,8 @@ class ProphetInventoryForecaster:
             True if successful, False otherwise
         """
         try:
-            for part_id, model in self.models.items():
-                model_path = os.path.join(self.models_dir, f'prophet_part_{part_id}.pkl')
-                joblib.dump(model, model_path)
-            
-            # Save part statistics
-            stats_path = os.path.join(self.models_dir, 'prophet_part_stats.json')
-            import json
-            with open(stats_path, 'w') as f:
-                json.dump(self.part_stats, f, indent=2)
+            # One store file for all models instead of one pickle per part
+            save_prophet_store(self.models_dir, self.models, self.part_stats)
             
             logger.info(f"Saved {len(self.models)} Prophet models to {self.models_dir}")
             return True
@@ -429,6 +558,16 @@ class ProphetInventoryForecaster:
         try:
             import json
             
+            # Every model may be replaced below
+            self._forget_forecasts()
+            
+            if store_exists(os.path.join(self.models_dir, PROPHET_STORE_FILE)):
+                # Models are deserialized from the memory-mapped store on first access
+                _, self.models, self.part_stats = open_prophet_store(self.models_dir)
+                self.is_trained = len(self.models) > 0
+                logger.info(f"Loaded {len(self.models)} Prophet models from {self.models_dir}")
+                return True
+            
             # Load part statistics
             stats_path = os.path.join(self.models_dir, 'prophet_part_stats.json')
             if os.path.exists(stats_path):
@@ -437,6 +576,8 @@ class ProphetInventoryForecaster:
             
             # Load models
             model_files = [f for f in os.listdir(self.models_dir) if f.startswith('prophet_part_') and f.endswith('.pkl')]
+            if model_files:
+                logger.info("Per-part Prophet pickles found; convert them with: python model_store.py migrate --kind prophet")
             
             for model_file in model_files:
                 part_id = model_file.replace('prophet_part_', '').replace('.pkl', '')
@@ -476,7 +617,7 @@ class ProphetInventoryForecaster:
                     'mae': stats['mae'],
                     'rmse': stats['rmse'],
                     'avg_usage': stats['avg_usage'],
-                    'lead_time_days': stats['lead_time_days'],
+                    'lead_time_days': stats['lead_time'],
                     'unit_cost': stats['unit_cost']
                 })
             
@@ -489,6 +630,57 @@ class ProphetInventoryForecaster:
             logger.error(f"Error getting model statistics: {e}")
             return {'total_models': 0, 'models': []}
 
+
+# Forecaster of a prediction worker process, with the model store version it was loaded from
+_worker_forecaster = None
+_worker_store_version = None
+
+
+def _store_version(models_dir: str) -> Optional[Tuple[str, int, int]]:
+    path = current_store_path(os.path.join(models_dir, PROPHET_STORE_FILE))
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+        return path.name, st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def worker_forecaster(models_dir: str) -> ProphetInventoryForecaster:
+    """
+    This process's forecaster for `models_dir`, loaded from the saved models
+
+    Prediction worker processes keep their models and forecast cache between
+    tasks and reload only when a retrain writes a new model store generation.
+    """
+    global _worker_forecaster, _worker_store_version
+    version = _store_version(models_dir)
+    if (_worker_forecaster is None or _worker_forecaster.models_dir != models_dir
+            or version != _worker_store_version):
+        forecaster = ProphetInventoryForecaster(models_dir)
+        forecaster.load_models()
+        _worker_forecaster, _worker_store_version = forecaster, version
+    return _worker_forecaster
+
+
+def predict_parts(models_dir: str, part_ids: List[str], days: int = 30, columnar: bool = False) -> List[Dict]:
+    """Prophet predictions for the parts that have a saved model (runs in a worker process)"""
+    forecaster = worker_forecaster(models_dir)
+    predictions = []
+    for part_id in part_ids:
+        if part_id in forecaster.models:
+            prediction = forecaster.predict(part_id, days, columnar=columnar)
+            if prediction:
+                predictions.append(prediction)
+    return predictions
+
+
+def reorder_recommendations(models_dir: str, current_stock: Dict[str, int], priority: Optional[str] = None,
+                            offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+    """Reorder recommendations from the saved Prophet models (runs in a worker process)"""
+    return worker_forecaster(models_dir).get_reorder_recommendations(current_stock, priority, offset, limit)
+
 # Example usage
 if __name__ == "__main__":
     # Initialize forecaster
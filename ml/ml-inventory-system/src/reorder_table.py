@@ -0,0 +1,262 @@
+"""
+Materialized Reorder Recommendations for the ML Inventory System
+Columnar table sorted by (priority, days until reorder), rebuilt only for parts whose model or stock changed
+"""
+
+import threading
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+PRIORITIES = ('HIGH', 'MEDIUM', 'LOW')
+
+# Rank of parts that need no reorder: kept in the table (a stock change can move
+# them back in) but sorted after every priority and never returned
+NO_REORDER = len(PRIORITIES)
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+
+# part_id, plan, current stock -> (priority rank, days until reorder, recommendation row)
+PriorityRule = Callable[[str, Dict, int], Tuple[int, float, Dict]]
+
+
+def forecast_priority(part_id: str, plan: Dict, current: int) -> Tuple[int, float, Dict]:
+    """
+    Priority from forecast-based planning values (ProphetInventoryForecaster)
+
+    HIGH at or below safety stock, MEDIUM at or below the reorder point, LOW when
+    the reorder point is reached within the lead time; otherwise no reorder.
+
+    Args:
+        plan: part_name, reorder_point, safety_stock, lead_time_days, eoq, avg_usage, unit_cost
+    """
+    reorder_point = plan['reorder_point']
+    daily_usage = plan['avg_usage']
+    days_until_reorder = max(0, (current - reorder_point) / daily_usage) if daily_usage > 0 else 999
+
+    if current <= plan['safety_stock']:
+        priority = 'HIGH'
+    elif current <= reorder_point:
+        priority = 'MEDIUM'
+    elif days_until_reorder <= plan['lead_time_days']:
+        priority = 'LOW'
+    else:
+        return NO_REORDER, float(days_until_reorder), None
+
+    return PRIORITY_RANK[priority], float(days_until_reorder), {
+        'part_id': part_id,
+        'part_name': plan['part_name'],
+        'current_stock': current,
+        'reorder_point': reorder_point,
+        'safety_stock': plan['safety_stock'],
+        'recommended_order_quantity': plan['eoq'],
+        'days_until_reorder': int(days_until_reorder),
+        'lead_time_days': plan['lead_time_days'],
+        'unit_cost': plan['unit_cost'],
+        'priority': priority
+    }
+
+
+def select_recommendations(recommendations: List[Dict], priority: Optional[str] = None,
+                           offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+    """Filter and page an already sorted recommendation list (for sources without a table)"""
+    if priority is not None:
+        recommendations = [r for r in recommendations if r.get('priority') == priority]
+    return recommendations[offset:None if limit is None else offset + limit]
+
+
+class ReorderTable:
+    """
+    Reorder recommendations kept sorted by (priority, days until reorder)
+
+    Each part's planning values (reorder point, safety stock, EOQ, ...) are
+    recomputed only when its model version changes, and its priority only when
+    that or its stock changes; other rows stay where they are. The rows live in
+    parallel arrays (part_id, rank, days, row), so a priority filter or page is two
+    binary searches plus a slice. Planning runs outside the table lock, which is
+    held only to splice rows in, so stock updates and queries never wait for a
+    refresh's forecasts; refreshes are serialized among themselves.
+    """
+
+    def __init__(self, priority_rule: PriorityRule = forecast_priority):
+        """
+        Initialize an empty table
+
+        Args:
+            priority_rule: Maps (part_id, plan, current stock) to (rank, days until reorder, row)
+        """
+        self.priority_rule = priority_rule
+        self.part_ids = np.empty(0, dtype=object)
+        self.ranks = np.empty(0, dtype=np.int8)
+        self.days = np.empty(0, dtype=np.float64)
+        self.rows = np.empty(0, dtype=object)
+        self._plans: Dict[str, Tuple[Hashable, Optional[Dict]]] = {}  # part_id -> (model version, plan)
+        self._stock: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # Stock updates received while a refresh is planning; newer than its current_stock
+        self._moved: Optional[Dict[str, Optional[int]]] = None
+        self.replanned = 0
+        self.reranked = 0
+
+    def refresh(self, current_stock: Dict[str, int], versions: Dict[str, Hashable],
+                plan: Callable[[str], Optional[Dict]]) -> int:
+        """
+        Bring the table up to date with the current models and stock
+
+        Args:
+            current_stock: part_id -> units on hand (parts missing here are dropped)
+            versions: part_id -> model version for every part with a model (e.g. a fingerprint)
+            plan: Computes a part's planning values; called only when its version changed
+                  (None = no recommendation possible)
+
+        Returns:
+            Number of parts whose row was recomputed
+        """
+        with self._refresh_lock:
+            with self._lock:
+                stale = [part_id for part_id, version in versions.items()
+                         if part_id in current_stock and not self._planned(part_id, version)]
+                self._moved = {}
+            try:
+                # The slow part (forecasting) runs without the table lock
+                plans = {part_id: (versions[part_id], plan(part_id)) for part_id in stale}
+            except BaseException:
+                with self._lock:
+                    self._moved = None
+                raise
+            with self._lock:
+                moved, self._moved = self._moved, None
+                current_stock = {**current_stock, **moved}
+                current_stock = {part_id: level for part_id, level in current_stock.items() if level is not None}
+                return self._refresh(current_stock, versions, plans)
+
+    def _planned(self, part_id: str, version: Hashable) -> bool:
+        known = self._plans.get(part_id)
+        return known is not None and known[0] == version
+
+    def _refresh(self, current_stock: Dict[str, int], versions: Dict[str, Hashable],
+                 plans: Dict[str, Tuple[Hashable, Optional[Dict]]]) -> int:
+        changed = []
+        for part_id, version in versions.items():
+            if part_id not in current_stock:
+                continue
+            current = current_stock[part_id]
+            if part_id in plans:
+                self._plans[part_id] = plans[part_id]
+                self.replanned += 1
+            elif not self._planned(part_id, version):
+                continue  # removed by a stock update while planning; the next refresh plans it
+            elif self._stock.get(part_id) == current:
+                continue
+            self._stock[part_id] = current
+            changed.append(part_id)
+
+        gone = [part_id for part_id in self._stock if part_id not in versions or part_id not in current_stock]
+        for part_id in gone:
+            del self._stock[part_id]
+            self._plans.pop(part_id, None)
+
+        if changed or gone:
+            self._reposition(changed, gone)
+        return len(changed)
+
+    def update_stock(self, changes: Dict[str, Optional[int]]) -> int:
+        """
+        Re-rank only the parts whose stock changed (e.g. from a StockMonitor)
+
+        Parts not planned yet are left for the next `refresh`.
+
+        Args:
+            changes: part_id -> new units on hand (None = part removed)
+
+        Returns:
+            Number of parts re-ranked or removed
+        """
+        with self._lock:
+            if self._moved is not None:
+                self._moved.update(changes)
+            changed = [part_id for part_id, level in changes.items()
+                       if level is not None and part_id in self._plans and self._stock.get(part_id) != level]
+            gone = [part_id for part_id, level in changes.items() if level is None and part_id in self._stock]
+            for part_id in changed:
+                self._stock[part_id] = changes[part_id]
+            for part_id in gone:
+                del self._stock[part_id]
+                self._plans.pop(part_id, None)
+            if changed or gone:
+                self._reposition(changed, gone)
+            return len(changed) + len(gone)
+
+    def _reposition(self, changed: List[str], gone: Iterable[str]):
+        """Drop the rows of changed/removed parts, then insert the changed ones at their sorted positions"""
+        keep = ~np.isin(self.part_ids, np.array(changed + list(gone), dtype=object))
+        part_ids, ranks, days, rows = self.part_ids[keep], self.ranks[keep], self.days[keep], self.rows[keep]
+
+        new = []
+        for part_id in changed:
+            plan = self._plans[part_id][1]
+            if plan is None:
+                continue
+            rank, until, row = self.priority_rule(part_id, plan, self._stock[part_id])
+            new.append((rank, until, part_id, row))
+        self.reranked += len(new)
+        new.sort(key=lambda entry: entry[:2])
+
+        # Insertion points in the kept rows: after equal keys, so the new rows stay in key order
+        positions = np.empty(len(new), dtype=np.int64)
+        for i, (rank, until, _, _) in enumerate(new):
+            lo = np.searchsorted(ranks, rank, side='left')
+            hi = np.searchsorted(ranks, rank, side='right')
+            positions[i] = lo + np.searchsorted(days[lo:hi], until, side='right')
+
+        new_rows = np.empty(len(new), dtype=object)
+        new_rows[:] = [entry[3] for entry in new]
+        self.part_ids = np.insert(part_ids, positions, np.array([entry[2] for entry in new], dtype=object))
+        self.ranks = np.insert(ranks, positions, np.array([entry[0] for entry in new], dtype=np.int8))
+        self.days = np.insert(days, positions, np.array([entry[1] for entry in new], dtype=np.float64))
+        self.rows = np.insert(rows, positions, new_rows)
+
+    def _span(self, priority: Optional[str]) -> Tuple[int, int]:
+        if priority is None:
+            return 0, int(np.searchsorted(self.ranks, NO_REORDER, side='left'))
+        rank = PRIORITY_RANK[priority]
+        return (int(np.searchsorted(self.ranks, rank, side='left')),
+                int(np.searchsorted(self.ranks, rank, side='right')))
+
+    def query(self, priority: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Recommendations in (priority, days until reorder) order
+
+        Args:
+            priority: 'HIGH', 'MEDIUM' or 'LOW' (None = every part that needs a reorder)
+            offset: Rows to skip
+            limit: Most rows to return (None = all)
+
+        Returns:
+            List of recommendation dictionaries (shared; treat as read-only)
+
+        Raises:
+            KeyError: If priority is not one of PRIORITIES
+        """
+        with self._lock:
+            lo, hi = self._span(priority)
+            start = min(lo + offset, hi)
+            stop = hi if limit is None else min(start + limit, hi)
+            return self.rows[start:stop].tolist()
+
+    def top(self, n: int) -> List[Dict]:
+        """The n most urgent recommendations"""
+        return self.query(limit=n)
+
+    def counts(self) -> Dict[str, int]:
+        """Recommendations per priority"""
+        return {priority: hi - lo for priority in PRIORITIES for lo, hi in [self._span(priority)]}
+
+    def __len__(self) -> int:
+        lo, hi = self._span(None)
+        return hi - lo
+
+    def stats(self) -> Dict:
+        """Table size and how much work refreshes have done"""
+        return {'parts': len(self.part_ids), 'recommendations': len(self), **self.counts(),
+                'replanned': self.replanned, 'reranked': self.reranked}
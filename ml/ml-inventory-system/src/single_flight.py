@@ -0,0 +1,152 @@
+"""
+Single-flight response cache for the ML Inventory Services
+Concurrent identical requests share one computation; results are served from a short-TTL cache with stale-while-revalidate
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightCache:
+    """
+    Async cache where each key has at most one computation in flight
+
+    A value younger than `ttl_seconds` is served as is (hit). Up to
+    `stale_seconds` after that it is still served (stale hit) while a single
+    background refresh replaces it. Older or missing values are computed by the
+    first caller (miss); callers arriving meanwhile await that same computation
+    (coalesced). A failed computation is not cached: its callers get the error and
+    the next request tries again, and a failed background refresh leaves the
+    stale value in place.
+
+    Every key has a generation that invalidate() bumps. A value from an older
+    generation is never served as fresh, and a computation started before the
+    bump neither stores its result nor absorbs callers arriving after it.
+
+    All methods must be called from the event loop thread.
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, stale_seconds: float = 30.0):
+        """
+        Initialize the cache
+
+        Args:
+            ttl_seconds: Seconds a value is served without refreshing it
+            stale_seconds: Further seconds a value is served while it is refreshed (0 = no stale serving)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._values: Dict[Hashable, Tuple[float, Tuple[int, int], Any]] = {}
+        self._in_flight: Dict[Hashable, Tuple[Tuple[int, int], asyncio.Task]] = {}
+        # invalidate(None) bumps the epoch, invalidate(key) the key's own counter
+        self._epoch = 0
+        self._generations: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Value for `key`, computing it with `compute()` only when no usable one exists
+
+        Args:
+            key: Cache key (requests with the same key share results)
+            compute: Coroutine function producing the value
+
+        Returns:
+            Cached, shared or freshly computed value
+        """
+        generation = self._generation(key)
+        entry = self._values.get(key)
+        if entry is not None:
+            stored_at, stored_generation, value = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl_seconds and stored_generation == generation:
+                self.hits += 1
+                return value
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                if self._current_task(key) is None:
+                    self.refreshes += 1
+                    self._start(key, compute)
+                return value
+
+        task = self._current_task(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._start(key, compute)
+        # Shielded: one caller disconnecting must not cancel the computation the others await
+        return await asyncio.shield(task)
+
+    def _generation(self, key: Hashable) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(key, 0)
+
+    def _current_task(self, key: Hashable) -> Optional[asyncio.Task]:
+        """The in-flight computation for `key`, if it started in the key's current generation"""
+        flight = self._in_flight.get(key)
+        if flight is None or flight[0] != self._generation(key):
+            return None
+        return flight[1]
+
+    def _start(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        generation = self._generation(key)
+        task = asyncio.ensure_future(compute())
+        self._in_flight[key] = (generation, task)
+        task.add_done_callback(lambda done: self._finish(key, generation, done))
+        return task
+
+    def _finish(self, key: Hashable, generation: Tuple[int, int], task: asyncio.Task):
+        flight = self._in_flight.get(key)
+        if flight is not None and flight[1] is task:
+            del self._in_flight[key]
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.errors += 1
+            logger.warning(f"Computing {key!r} failed: {error}")
+            return
+        # Computed from data older than an invalidate() since it started: keep it out of the cache
+        if generation != self._generation(key):
+            return
+        self._values[key] = (time.monotonic(), generation, task.result())
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """
+        Mark the value for `key` (None = every key) stale
+
+        The value is still served within the stale window while a refresh runs,
+        but never as fresh again; computations already in flight are not cached.
+        """
+        if key is None:
+            self._epoch += 1
+        else:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def stats(self) -> Dict:
+        """Entry count and hit/stale/miss/coalesced counters"""
+        served = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._values),
+            'in_flight': len(self._in_flight),
+            'ttl_seconds': self.ttl_seconds,
+            'stale_seconds': self.stale_seconds,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'hit_rate': round((self.hits + self.stale_hits + self.coalesced) / served, 3) if served else 0.0
+        }
@@ -0,0 +1,198 @@
+"""
+Live Stock Levels for the ML Inventory Services
+In-memory part -> units on hand, kept current from MongoDB change streams (or polling where they are unavailable)
+"""
+
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STOCK_WATCH_MODES = ('auto', 'change_stream', 'poll')
+
+# part_id -> new units on hand (None = part removed)
+StockListener = Callable[[Dict[str, Optional[int]]], None]
+
+
+def stock_level(doc: Dict) -> int:
+    """Units on hand of a parts document (`stock.onHand`, or the flat `currentStock` field)"""
+    stock = doc.get('stock')
+    if isinstance(stock, dict) and stock.get('onHand') is not None:
+        return int(stock['onHand'])
+    return int(doc.get('currentStock') or 0)
+
+
+class StockMonitor:
+    """
+    Current stock of every part, updated as the `parts` collection changes
+
+    After one full read, a change stream delivers inserts, updates, replaces and
+    deletes as they happen. Servers without change streams (standalone mongod,
+    mongomock) are polled instead: every `poll_interval` seconds the stock fields
+    are re-read and compared. Listeners receive only the parts whose level changed,
+    so consumers such as ReorderTable.update_stock re-rank just those parts.
+
+    Must be started and used from the event loop that owns the Motor client.
+    """
+
+    def __init__(self, collection, key_field: str = '_id', mode: Optional[str] = None,
+                 poll_interval: Optional[float] = None):
+        """
+        Initialize the monitor (call `start` to load and follow the collection)
+
+        Args:
+            collection: Motor collection of parts
+            key_field: Field identifying a part in `levels` ('_id' or e.g. 'partCode')
+            mode: 'auto' (change stream, polling if unsupported), 'change_stream' or 'poll'
+                  Default: STOCK_WATCH_MODE or 'auto'
+            poll_interval: Seconds between polls, and before reconnecting a broken stream
+                           Default: STOCK_POLL_INTERVAL or 5
+        """
+        self.collection = collection
+        self.key_field = key_field
+        self.mode = mode or os.getenv('STOCK_WATCH_MODE', 'auto')
+        if self.mode not in STOCK_WATCH_MODES:
+            raise ValueError(f"mode must be one of {STOCK_WATCH_MODES}, got {self.mode!r}")
+        self.poll_interval = poll_interval or float(os.getenv('STOCK_POLL_INTERVAL', '5'))
+
+        self.levels: Dict[str, int] = {}
+        self.version = 0  # incremented whenever any level changes
+        self.watching = None  # 'change_stream' or 'poll' once started
+        self._keys: Dict[str, str] = {}  # str(_id) -> key, to resolve deletes when key_field is not _id
+        self._listeners: List[StockListener] = []
+        self._task: Optional[asyncio.Task] = None
+        self.events = 0
+        self.polls = 0
+        self.changes = 0
+
+    def subscribe(self, listener: StockListener):
+        """Call `listener(changes)` after every batch of stock changes"""
+        self._listeners.append(listener)
+
+    def _key(self, doc: Dict) -> Optional[str]:
+        value = doc.get(self.key_field)
+        return None if value is None else str(value)
+
+    def _projection(self) -> Dict:
+        return {self.key_field: 1, 'stock.onHand': 1, 'currentStock': 1}
+
+    def _apply(self, changes: Dict[str, Optional[int]]):
+        changes = {key: level for key, level in changes.items() if self.levels.get(key) != level}
+        if not changes:
+            return
+        for key, level in changes.items():
+            if level is None:
+                self.levels.pop(key, None)
+            else:
+                self.levels[key] = level
+        self.version += 1
+        self.changes += len(changes)
+        for listener in self._listeners:
+            try:
+                listener(changes)
+            except Exception as e:
+                logger.error(f"Stock listener failed: {e}")
+
+    async def load(self) -> int:
+        """
+        Re-read every part's stock and apply the differences
+
+        Returns:
+            Number of parts whose level changed
+        """
+        levels, keys = {}, {}
+        async for doc in self.collection.find({}, self._projection()):
+            key = self._key(doc)
+            if key is not None:
+                levels[key] = stock_level(doc)
+                keys[str(doc['_id'])] = key
+
+        changes = {key: level for key, level in levels.items() if self.levels.get(key) != level}
+        changes.update({key: None for key in self.levels if key not in levels})
+        self._keys = keys
+        self._apply(changes)
+        return len(changes)
+
+    async def start(self):
+        """Load current stock, then follow changes in a background task (which retries if MongoDB is down)"""
+        try:
+            await self.load()
+        except Exception as e:
+            logger.warning(f"Could not load stock levels yet: {e}")
+        self._task = asyncio.ensure_future(self._run())
+        logger.info(f"Tracking stock of {len(self.levels)} parts")
+
+    async def _run(self):
+        use_stream = self.mode != 'poll'
+        while True:
+            try:
+                if use_stream:
+                    await self._watch()
+                else:
+                    self.watching = 'poll'
+                    await asyncio.sleep(self.poll_interval)
+                    self.polls += 1
+                    await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A stream that never opened is unsupported here; one that broke is reopened
+                if use_stream and self.watching is None and self.mode == 'auto':
+                    logger.info(f"Change streams unavailable ({e}); polling parts every {self.poll_interval:g}s")
+                    use_stream = False
+                    continue
+                logger.warning(f"Stock {'stream' if use_stream else 'poll'} failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+                if use_stream:
+                    # Changes made while disconnected are picked up by a full re-read
+                    await self._reload_quietly()
+
+    async def _reload_quietly(self):
+        try:
+            await self.load()
+        except Exception as e:
+            logger.warning(f"Stock reload failed: {e}")
+
+    async def _watch(self):
+        """Apply change stream events until the stream ends"""
+        async with self.collection.watch(full_document='updateLookup') as stream:
+            self.watching = 'change_stream'
+            # Catch changes made between the initial load and the stream opening
+            await self.load()
+            async for change in stream:
+                self.events += 1
+                operation = change['operationType']
+                if operation in ('insert', 'update', 'replace'):
+                    doc = change.get('fullDocument')
+                    if doc is None:  # deleted before the lookup
+                        continue
+                    key = self._key(doc)
+                    if key is not None:
+                        self._keys[str(doc['_id'])] = key
+                        self._apply({key: stock_level(doc)})
+                elif operation == 'delete':
+                    key = self._keys.pop(str(change['documentKey']['_id']), None)
+                    if key is not None:
+                        self._apply({key: None})
+                elif operation in ('drop', 'rename', 'dropDatabase', 'invalidate'):
+                    await self.load()
+                    return
+
+    async def stop(self):
+        """Stop following changes"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        """Tracked parts, how changes arrive and how many were applied"""
+        return {'parts': len(self.levels), 'watching': self.watching, 'version': self.version,
+                'events': self.events, 'polls': self.polls, 'changes': self.changes}
@@ -0,0 +1,102 @@
+"""
+Rolling Trend Features for the ML Inventory System
+Moving averages, least-squares trend and volatility per part, computed in closed form from rolling sums
+"""
+
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+MA_WINDOWS = (7, 14, 30)
+TREND_WINDOW = 7
+VOLATILITY_WINDOW = 14
+
+
+def _part_positions(codes: np.ndarray) -> np.ndarray:
+    """Position of each row within its part's block (codes must be grouped, e.g. stably sorted)"""
+    index = np.arange(len(codes))
+    block_start = np.ones(len(codes), dtype=bool)
+    block_start[1:] = codes[1:] != codes[:-1]
+    return index - np.maximum.accumulate(np.where(block_start, index, 0))
+
+
+class _RollingSums:
+    """Trailing-window sums over part blocks from one cumulative sum per series"""
+
+    def __init__(self, positions: np.ndarray):
+        self.positions = positions
+        self.index = np.arange(len(positions))
+        self._cumulative = {}
+        self._counts = {}
+
+    def count(self, window: int) -> np.ndarray:
+        """Rows in each trailing window (fewer than `window` at the start of a part)"""
+        counts = self._counts.get(window)
+        if counts is None:
+            counts = self._counts[window] = np.minimum(self.positions + 1, window)
+        return counts
+
+    def sum(self, name: str, values: np.ndarray, window: int) -> np.ndarray:
+        """Sum of `values` over each row's trailing window, never crossing into the previous part"""
+        cumulative = self._cumulative.get(name)
+        if cumulative is None:
+            cumulative = self._cumulative[name] = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+        return cumulative[self.index + 1] - cumulative[self.index + 1 - self.count(window)]
+
+
+def rolling_trend_features(part_ids, quantities, ma_windows: Iterable[int] = MA_WINDOWS,
+                           trend_window: int = TREND_WINDOW,
+                           volatility_window: int = VOLATILITY_WINDOW) -> Dict[str, np.ndarray]:
+    """
+    Trend features of a long-format usage frame, in one pass over its rows
+
+    Equivalent to the per-part pandas rolling windows (min_periods=1) taken over
+    each part's rows in their given order: rolling mean, the slope of
+    np.polyfit(range(n), window, 1) (0 for a single row), and the rolling sample
+    std (NaN for a single row). Every window's sums of y, t*y and y*y come from
+    cumulative sums, so no window is fitted individually.
+
+    Args:
+        part_ids: Part of each row
+        quantities: Usage of each row (finite; missing values filled beforehand)
+        ma_windows: Moving-average windows
+        trend_window: Window of the least-squares trend
+        volatility_window: Window of the standard deviation
+
+    Returns:
+        Dictionary of column name -> array aligned with the input rows
+        (usage_ma_<window>, usage_trend_<trend_window>d, usage_volatility)
+    """
+    codes, _ = pd.factorize(np.asarray(part_ids))
+    order = np.argsort(codes, kind='stable')
+    y = np.asarray(quantities, dtype=np.float64)[order]
+    positions = _part_positions(codes[order])
+    sums = _RollingSums(positions)
+
+    features = {}
+    for window in ma_windows:
+        features[f'usage_ma_{window}'] = sums.sum('y', y, window) / sums.count(window)
+
+    # Slope over t = 0..n-1: (n*sum(t*y) - sum(t)*sum(y)) / (n*sum(t^2) - sum(t)^2).
+    # t*y is built from the part position p: t = p - (first position of the window)
+    n = sums.count(trend_window).astype(np.float64)
+    sum_y = sums.sum('y', y, trend_window)
+    sum_ty = sums.sum('py', positions * y, trend_window) - (positions + 1 - n) * sum_y
+    sum_t = n * (n - 1) / 2
+    denominator = n * n * (n * n - 1) / 12
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (n * sum_ty - sum_t * sum_y) / denominator
+    features[f'usage_trend_{trend_window}d'] = np.where(n > 1, slope, 0.0)
+
+    n = sums.count(volatility_window).astype(np.float64)
+    sum_y = sums.sum('y', y, volatility_window)
+    squares = sums.sum('yy', y * y, volatility_window) - sum_y * sum_y / n
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(np.maximum(squares, 0.0) / (n - 1))
+    features['usage_volatility'] = np.where(n > 1, std, np.nan)
+
+    # Back to the caller's row order
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    return {name: values[inverse] for name, values in features.items()}
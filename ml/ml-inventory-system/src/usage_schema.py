@@ -0,0 +1,163 @@
+"""
+Compact Usage Schema for the ML Inventory System
+Canonical in-memory dtypes for daily usage frames, applied where data enters the system
+"""
+
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Identifiers repeated on every daily row: one copy of each value plus small integer codes
+CATEGORY_COLUMNS = ['part_id', 'part_name', 'part_code', 'category']
+
+# Per-part attributes that belong in the part dimension table rather than on daily rows
+PART_ATTRIBUTES = ['part_name', 'part_code', 'category']
+
+# Calendar indices derived from the date
+DAY_INDEX_COLUMNS = ['day_of_week', 'day_of_month', 'month', 'year', 'day_of_year', 'week_of_year', 'quarter']
+DAY_INDEX_DTYPE = np.int32
+
+# 0/1 indicator columns (is_weekend, is_month_start, ...)
+FLAG_PREFIX = 'is_'
+FLAG_DTYPE = np.int8
+
+# Whole-unit quantities and counts are stored in the smallest of these that holds them
+SMALL_INT_DTYPES = (np.int16, np.int32, np.int64)
+
+# Every other numeric column (costs, factors, rolling features)
+FLOAT_DTYPE = np.float32
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """Memory held by a frame, including the contents of string columns"""
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def small_int(values: pd.Series) -> pd.Series:
+    """
+    Whole numbers in the smallest integer dtype that holds their range
+
+    Columns with missing or fractional values become FLOAT_DTYPE instead.
+    """
+    array = values.to_numpy()
+    if values.dtype.kind == 'f':
+        if values.isna().any() or not np.array_equal(array, np.floor(array)):
+            return values.astype(FLOAT_DTYPE)
+    elif values.dtype.kind not in 'iub':
+        return values
+    if len(array) == 0:
+        return values.astype(SMALL_INT_DTYPES[0])
+    low, high = array.min(), array.max()
+    for dtype in SMALL_INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def compact_usage_frame(df: pd.DataFrame, label: Optional[str] = 'usage rows') -> pd.DataFrame:
+    """
+    Cast a usage frame to the compact schema
+
+    Part identifiers become categories, string dates datetimes, calendar indices
+    int32, indicator flags int8, whole-unit quantities the smallest integer type
+    that holds them, and every other numeric column float32. Columns the schema
+    does not know keep their dtype; the input frame is not modified.
+
+    Args:
+        df: Usage rows (raw, daily or featured)
+        label: Name for the memory report logged before/after (None = no report)
+
+    Returns:
+        The same rows with compact dtypes
+    """
+    if df.empty:
+        return df
+    before = memory_mb(df) if label else None
+    df = df.copy(deep=False)
+
+    for column in df.columns:
+        values = df[column]
+        kind = values.dtype.kind
+        if column == 'date':
+            if kind != 'M':
+                df[column] = pd.to_datetime(values)
+        elif column in CATEGORY_COLUMNS:
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                df[column] = values.astype('category')
+        elif column in DAY_INDEX_COLUMNS:
+            if not values.isna().any():
+                df[column] = values.astype(DAY_INDEX_DTYPE)
+        elif column.startswith(FLAG_PREFIX) and kind in 'iub':
+            df[column] = values.astype(FLAG_DTYPE)
+        elif kind in 'iu':
+            df[column] = small_int(values)
+        elif kind == 'f':
+            # Quantities recorded as floats (e.g. MongoDB sums) stay exact as integers
+            df[column] = small_int(values) if column in ('quantity_used', 'log_count') else values.astype(FLOAT_DTYPE)
+
+    if label:
+        logger.info(f"Compacted {label}: {len(df):,} rows, {before:.1f} MB -> {memory_mb(df):.1f} MB")
+    return df
+
+
+def split_part_dimension(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Move per-part attributes (PART_ATTRIBUTES) off the daily rows into a part table
+
+    Args:
+        df: Usage rows with a part_id column
+
+    Returns:
+        (rows without the part attributes, one row per part with part_id and its attributes);
+        the part table's row i is category code i of the rows' part_id
+    """
+    attributes = [column for column in PART_ATTRIBUTES if column in df.columns]
+    part_ids = df['part_id']
+    if not isinstance(part_ids.dtype, pd.CategoricalDtype):
+        part_ids = part_ids.astype('category')
+    categories = part_ids.cat.categories
+
+    first = pd.Series(np.arange(len(df))).groupby(part_ids.cat.codes.to_numpy()).first()
+    positions = np.full(len(categories), -1, dtype=np.int64)
+    positions[first.index.to_numpy()] = first.to_numpy()
+    parts = pd.DataFrame({'part_id': pd.Categorical(categories, categories=categories)})
+    for column in attributes:
+        values = df[column].iloc[np.maximum(positions, 0)].reset_index(drop=True)
+        parts[column] = values.where(positions >= 0)
+
+    rows = df.drop(columns=attributes).assign(part_id=part_ids)
+    return rows, parts
+
+
+def join_part_dimension(rows: pd.DataFrame, parts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Put part attributes back on usage rows (inverse of split_part_dimension)
+
+    Args:
+        rows: Usage rows with a part_id column
+        parts: Part table with part_id and attribute columns
+
+    Returns:
+        Rows with the part table's attributes added; parts missing from the table get NaN
+    """
+    part_ids = rows['part_id']
+    if not isinstance(part_ids.dtype, pd.CategoricalDtype):
+        part_ids = part_ids.astype('category')
+    # Look up each distinct part once; rows follow their category code (-1 = missing id)
+    table = pd.Index(np.asarray(parts['part_id'], dtype=object))
+    by_code = np.append(table.get_indexer(np.asarray(part_ids.cat.categories, dtype=object)), -1)
+    positions = by_code[part_ids.cat.codes.to_numpy()]
+    found = positions >= 0
+    joined = rows.copy(deep=False)
+    for column in parts.columns.drop('part_id'):
+        values = parts[column].iloc[np.maximum(positions, 0)].reset_index(drop=True)
+        values.index = rows.index
+        joined[column] = values.where(found) if not found.all() else values
+    return joined
@@ -0,0 +1,249 @@
+"""
+Local Usage Store for the ML Inventory System
+Month-partitioned Parquet copy of partusagelogs, kept current by fetching only logs past a high-water mark
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from mongodb_connector import MongoDBConnector, sum_daily_usage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+WATERMARK_FILE = '_watermark.json'
+DEFAULT_STORE_DIR = os.path.join('data', 'usage_store')
+
+# How far before the watermark's id time each incremental sync starts reading again
+SYNC_LAG = timedelta(minutes=5)
+
+# Part files a month may collect from incremental syncs before it is compacted into one
+MAX_PARTS_PER_MONTH = 32
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("pyarrow is required for the usage store: pip install pyarrow") from e
+
+
+def _id_seconds(log_id: str) -> int:
+    """Creation time of a hex ObjectId, in seconds since the epoch (its first four bytes)"""
+    return int(log_id[:8], 16)
+
+
+class UsageStore:
+    """
+    Local columnar copy of the usage logs, partitioned by month of usedAt
+
+    Layout: <root>/month=YYYY-MM/part-<first log id>.parquet plus a watermark file
+    holding the greatest log _id synced so far. ObjectIds grow with insertion time,
+    so `sync` fetches only logs inserted since the last sync, including back-dated
+    ones. ObjectIds are made by the inserting client, though (a one-second timestamp
+    plus a per-process value): a log from another backend instance, or an insert
+    still in flight, can carry an id below the watermark and become visible only
+    after a sync has read past it. Each sync therefore re-reads the logs created
+    from SYNC_LAG (5 minutes) before the watermark's id time on, skipping the ones
+    it already has (the watermark lists the ids synced within that lag). A log
+    that becomes visible later than that is missed, as are edits and deletions of
+    synced logs; `sync(full=True)` rebuilds the store from MongoDB to repair them.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        _require_pyarrow()
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @property
+    def watermark(self) -> Optional[Dict]:
+        """Last sync state (last_id, recent_ids, last_used_at, synced_at, rows), or None before the first sync"""
+        path = os.path.join(self.root, WATERMARK_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            watermark = json.load(f)
+        if watermark.get('format_version') != FORMAT_VERSION:
+            logger.warning(f"Ignoring usage store watermark with format {watermark.get('format_version')}")
+            return None
+        return watermark
+
+    def sync(self, connector: MongoDBConnector, full: bool = False, days_back: int = 365) -> int:
+        """
+        Bring the store up to date with MongoDB
+
+        Args:
+            connector: Connected MongoDBConnector
+            full: Rebuild from scratch instead of fetching past the watermark
+            days_back: History to load on a full (or first) sync
+
+        Returns:
+            Number of logs fetched
+        """
+        watermark = None if full else self.watermark
+        if watermark is None:
+            return self._resync(connector, days_back)
+
+        logs = connector.iter_usage_logs_after(last_id=watermark['last_id'], overlap=SYNC_LAG)
+        written = self._write(logs, self.root, watermark)
+        logger.info(f"Synced {written['fetched']} new usage logs (watermark {written['last_id']})")
+        return written['fetched']
+
+    def _resync(self, connector: MongoDBConnector, days_back: int) -> int:
+        """Build a complete store next to the live one, then swap it in"""
+        staging = self.root.rstrip(os.sep) + '.resync'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        since = datetime.now() - timedelta(days=days_back)
+        written = self._write(connector.iter_usage_logs_after(since=since), staging, None)
+        self._compact(staging, self._months(staging))
+
+        retired = self.root.rstrip(os.sep) + '.old'
+        shutil.rmtree(retired, ignore_errors=True)
+        os.replace(self.root, retired)
+        os.replace(staging, self.root)
+        shutil.rmtree(retired, ignore_errors=True)
+
+        logger.info(f"Full usage store resync: {written['fetched']} logs since {since:%Y-%m-%d}")
+        return written['fetched']
+
+    def _write(self, batches: Iterable[pd.DataFrame], root: str, watermark: Optional[Dict]) -> Dict:
+        """
+        Append batches as per-month part files, then advance the watermark
+
+        Returns:
+            Logs written ('fetched', re-read ones already in the store excluded) and the new 'last_id'
+        """
+        state = dict(watermark or {'format_version': FORMAT_VERSION, 'last_id': None,
+                                   'last_used_at': None, 'rows': 0})
+        recent = list(state.get('recent_ids', []))
+        known = set(recent)
+        fetched = 0
+        touched = set()
+        for batch in batches:
+            if known:
+                batch = batch[~batch['log_id'].isin(known)]
+            if batch.empty:
+                continue
+            for month, rows in batch.groupby(batch['date'].dt.strftime('%Y-%m'), sort=False):
+                directory = os.path.join(root, f"month={month}")
+                os.makedirs(directory, exist_ok=True)
+                rows.to_parquet(os.path.join(directory, f"part-{rows['log_id'].iloc[0]}.parquet"), index=False)
+                touched.add(month)
+            fetched += len(batch)
+            # Batches come in _id order, so the last row holds the new high-water mark, unless the
+            # batch only held late logs below it (hex ObjectIds compare as strings as the ids do)
+            state['last_id'] = max(state['last_id'] or '', batch['log_id'].iloc[-1])
+            # Ids the next sync re-reads: those created within SYNC_LAG of the high-water mark
+            cutoff = f"{_id_seconds(state['last_id']) - int(SYNC_LAG.total_seconds()):08x}"
+            recent = [log_id for log_id in recent if log_id >= cutoff] + \
+                batch.loc[batch['log_id'] >= cutoff, 'log_id'].tolist()
+            latest = batch['date'].max()
+            if state['last_used_at'] is None or latest.isoformat() > state['last_used_at']:
+                state['last_used_at'] = latest.isoformat()
+
+        state['rows'] += fetched
+        state['recent_ids'] = recent
+        state['synced_at'] = datetime.now().isoformat()
+        self._compact(root, [m for m in touched if len(self._parts(root, m)) > MAX_PARTS_PER_MONTH])
+
+        # Written last: a sync interrupted before this point is re-fetched next time,
+        # and reads drop the duplicate log ids
+        path = os.path.join(root, WATERMARK_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+        return {'fetched': fetched, 'last_id': state['last_id']}
+
+    @staticmethod
+    def _months(root: str) -> List[str]:
+        return sorted(os.path.basename(d)[len('month='):] for d in glob.glob(os.path.join(root, 'month=*')))
+
+    @staticmethod
+    def _parts(root: str, month: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(root, f"month={month}", 'part-*.parquet')))
+
+    def _compact(self, root: str, months: Iterable[str]):
+        """Merge each month's part files into one, dropping duplicate log ids"""
+        for month in months:
+            parts = self._parts(root, month)
+            if len(parts) <= 1:
+                continue
+            merged = self._read_parts(parts)
+            target = os.path.join(root, f"month={month}", f"part-{merged['log_id'].iloc[0]}.parquet")
+            merged.to_parquet(target + '.tmp', index=False)
+            for part in parts:
+                os.remove(part)
+            os.replace(target + '.tmp', target)
+
+    @staticmethod
+    def _read_parts(parts: List[str]) -> pd.DataFrame:
+        frame = pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True)
+        return frame.drop_duplicates('log_id', keep='last').sort_values(['date', 'log_id'], ignore_index=True)
+
+    def iter_months(self, start_date: datetime, end_date: datetime) -> Iterator[pd.DataFrame]:
+        """
+        Stored usage logs with start_date <= date <= end_date, one month at a time
+
+        Yields:
+            DataFrame per month in date order (USAGE_SYNC_COLUMNS)
+        """
+        first, last = f"{start_date:%Y-%m}", f"{end_date:%Y-%m}"
+        for month in self._months(self.root):
+            if not first <= month <= last:
+                continue
+            parts = self._parts(self.root, month)
+            if not parts:
+                continue
+            logs = self._read_parts(parts)
+            yield logs[(logs['date'] >= start_date) & (logs['date'] <= end_date)]
+
+    def daily_usage(self, days_back: int = 365) -> pd.DataFrame:
+        """
+        Daily usage totals per part over the last `days_back` days, read from the store
+
+        Returns:
+            DataFrame in the shape of MongoDBConnector.get_daily_usage_from_logs
+        """
+        end_date = datetime.now()
+        return sum_daily_usage(self.iter_months(end_date - timedelta(days=days_back), end_date))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local usage store utilities")
+    parser.add_argument('--root', default=os.getenv('USAGE_STORE_DIR', DEFAULT_STORE_DIR))
+    sub = parser.add_subparsers(dest='command', required=True)
+    sync = sub.add_parser('sync', help="Fetch usage logs past the watermark")
+    sync.add_argument('--full', action='store_true', help="Rebuild the store from MongoDB (repairs edits/deletes)")
+    sync.add_argument('--days-back', type=int, default=365)
+    sub.add_parser('info', help="Show the watermark and partitions")
+    args = parser.parse_args()
+
+    store = UsageStore(args.root)
+    if args.command == 'sync':
+        connector = MongoDBConnector()
+        try:
+            fetched = store.sync(connector, full=args.full, days_back=args.days_back)
+        finally:
+            connector.close()
+        print(f"Fetched {fetched} usage logs into {store.root}")
+    else:
+        print(json.dumps({'root': store.root, 'watermark': store.watermark,
+                          'months': {m: len(store._parts(store.root, m)) for m in store._months(store.root)}},
+                         indent=2))
+
+
+if __name__ == "__main__":
+    main()
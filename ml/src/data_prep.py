@@ -1,21 +1,60 @@
 """Data loading & preparation utilities."""
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import Optional
 
 REQUIRED_COLUMNS = {"date", "part_id", "quantity_used"}
 
+# Compact schema: repeated identifiers as categories, whole units in the smallest
+# integer type that holds them (int16 upwards), every other number as float32
+CATEGORY_COLUMNS = ['part_id', 'part_name']
+SMALL_INT_DTYPES = (np.int16, np.int32, np.int64)
 
-def load_dataset(path: str | Path) -> pd.DataFrame:
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """Memory held by a frame, including the contents of string columns."""
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def _small_int(values: pd.Series) -> pd.Series:
+    array = values.to_numpy()
+    if len(array) == 0:
+        return values.astype(SMALL_INT_DTYPES[0])
+    low, high = array.min(), array.max()
+    for dtype in SMALL_INT_DTYPES:
+        if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+            return values.astype(dtype)
+    return values
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast a usage frame's columns to the compact schema (other dtypes are kept)."""
+    df = df.copy(deep=False)
+    for column in df.columns:
+        kind = df[column].dtype.kind
+        if column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype('category')
+        elif kind in 'iu':
+            df[column] = _small_int(df[column])
+        elif kind == 'f':
+            df[column] = df[column].astype(np.float32)
+    return df
+
+
+def load_dataset(path: str | Path, compact: bool = True) -> pd.DataFrame:
+    """Read the usage CSV; with `compact`, ids are parsed straight into categories and numbers downcast."""
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"Dataset not found: {path}")
-    df = pd.read_csv(path)
+    df = pd.read_csv(path, dtype={column: 'category' for column in CATEGORY_COLUMNS} if compact else None)
     missing = REQUIRED_COLUMNS - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
     df['date'] = pd.to_datetime(df['date'])
+    if compact:
+        df = compact_frame(df)
     df = df.sort_values('date')
     return df
 
@@ -23,7 +62,7 @@ def load_dataset(path: str | Path) -> pd.DataFrame:
 def aggregate_daily_to_monthly(df: pd.DataFrame) -> pd.DataFrame:
     """Aggregate daily usage to monthly totals per part."""
     df['year_month'] = df['date'].dt.to_period('M')
-    monthly = (df.groupby(['part_id', 'year_month'])['quantity_used']
+    monthly = (df.groupby(['part_id', 'year_month'], observed=True)['quantity_used']
                  .sum()
                  .reset_index())
     monthly['month_start'] = monthly['year_month'].dt.to_timestamp()
@@ -33,7 +72,7 @@ def aggregate_daily_to_monthly(df: pd.DataFrame) -> pd.DataFrame:
 
 def compute_daily_stats(df: pd.DataFrame) -> pd.DataFrame:
     """Compute average & std daily usage per part."""
-    stats = (df.groupby('part_id')['quantity_used']
+    stats = (df.groupby('part_id', observed=True)['quantity_used']
                .agg(['mean', 'std', 'count'])
                .reset_index()
                .rename(columns={'mean': 'avg_daily_usage', 'std': 'std_daily_usage', 'count': 'days_observed'}))
@@ -44,7 +83,7 @@ def compute_daily_stats(df: pd.DataFrame) -> pd.DataFrame:
 
 def prepare_model_frame(monthly: pd.DataFrame) -> pd.DataFrame:
     """Add a time index per part for simple regression (t=0..n-1)."""
-    monthly['t'] = monthly.groupby('part_id').cumcount()
+    monthly['t'] = monthly.groupby('part_id', observed=True).cumcount()
     return monthly
 
 
@@ -52,7 +91,7 @@ def get_lead_time_map(df: pd.DataFrame) -> dict:
     if 'lead_time_days' in df.columns:
         # Take latest or mode
         latest = (df.sort_values('date')
-                    .groupby('part_id')['lead_time_days']
+                    .groupby('part_id', observed=True)['lead_time_days']
                     .last()
                     .to_dict())
         return latest
@@ -0,0 +1,111 @@
+"""Process-wide forecast state built once and swapped atomically after retraining.
+
+`/forecast` used to reload metadata, every per-part model and the full CSV on each
+request. A `ForecastState` is an immutable snapshot holding the precomputed forecast
+row for every part; `ForecastStateHolder` owns the current snapshot and replaces it
+in one reference assignment, so readers never see a half-built state.
+"""
+from __future__ import annotations
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import joblib
+from aems_store import open_store, store_exists
+
+from .data_prep import load_dataset
+from .forecast_engine import compute_forecast_table, forecast_table_to_rows, model_coefficients
+from .model_store import BASELINE_STORE_FILE, read_baseline_coefficients
+
+
+@dataclass(frozen=True)
+class InventoryParams:
+    service_level_z: float = 1.65
+    ordering_cost: float = 25.0
+    holding_rate: float = 0.20  # % of unit cost / year
+    default_lead_time: int = 7
+
+
+@dataclass(frozen=True)
+class ForecastState:
+    """Immutable snapshot answering `/forecast` without touching disk."""
+    generation: int
+    built_at: str
+    strategy: str
+    rows: Dict[str, dict]  # part_id -> forecast row, in metadata order
+
+    def results(self, part_ids: Optional[List[str]] = None) -> List[dict]:
+        if not part_ids:
+            return list(self.rows.values())
+        wanted = set(part_ids)
+        return [row for part_id, row in self.rows.items() if part_id in wanted]
+
+
+def load_models_metadata(models_dir: Path) -> dict:
+    md_path = models_dir / 'model_metadata.json'
+    if not md_path.exists():
+        raise FileNotFoundError("Model metadata not found. Train models first.")
+    with open(md_path) as f:
+        return json.load(f)
+
+
+def load_models(metadata: dict, models_dir: Path) -> dict:
+    models = {}
+    for m in metadata['models']:
+        part_id = m['part_id']
+        if m['method'] == 'linear':
+            models[part_id] = joblib.load(models_dir / f"linear_part_{part_id}.pkl")
+        else:
+            with open(models_dir / f"fallback_part_{part_id}.json") as f:
+                models[part_id] = json.load(f)  # dict
+    return models
+
+
+def load_coefficient_frame(metadata: dict, models_dir: Path):
+    """Coefficients from the memory-mapped model store; legacy model dirs fall back to per-part files."""
+    if store_exists(models_dir / BASELINE_STORE_FILE):
+        return read_baseline_coefficients(open_store(models_dir / BASELINE_STORE_FILE))
+    print("[ML-SERVICE][INFO] No model store found; loading per-part pickles (run: python -m src.model_store migrate).")
+    return model_coefficients(metadata, load_models(metadata, models_dir))
+
+
+def build_forecast_state(data_path: str, models_dir: Path, params: InventoryParams, generation: int) -> ForecastState:
+    metadata = load_models_metadata(models_dir)
+    coefficients = load_coefficient_frame(metadata, models_dir)
+    raw = load_dataset(data_path)
+    table = compute_forecast_table(coefficients, raw, params)
+    rows = {row['part_id']: row for row in forecast_table_to_rows(table)}
+    return ForecastState(
+        generation=generation,
+        built_at=datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        strategy=metadata.get('strategy', 'unknown'),
+        rows=rows,
+    )
+
+
+class ForecastStateHolder:
+    """Owns the live `ForecastState`; rebuilds are serialised, reads are lock-free."""
+
+    def __init__(self):
+        self._state: Optional[ForecastState] = None
+        self._generation = 0
+        self._rebuild_lock = threading.Lock()
+
+    @property
+    def state(self) -> Optional[ForecastState]:
+        return self._state
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def rebuild(self, builder: Callable[[int], ForecastState]) -> ForecastState:
+        """Build the next generation off to the side, then publish it in one assignment."""
+        with self._rebuild_lock:
+            state = builder(self._generation + 1)
+            self._generation = state.generation
+            self._state = state
+            return state
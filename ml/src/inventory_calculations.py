@@ -1,7 +1,14 @@
-"""Inventory related calculation utilities: ROP, Safety Stock, EOQ."""
+"""Inventory related calculation utilities: ROP, Safety Stock, EOQ.
+
+Each scalar function has an `*_array` counterpart that takes NumPy arrays (or
+scalars, broadcast together) and computes a whole catalog in one call with the
+same edge-case branches. NaN inputs propagate exactly as in the scalar code.
+"""
 from math import sqrt
 from typing import Optional
 
+import numpy as np
+
 
 def safety_stock(std_daily_usage: float, lead_time_days: float, service_level_z: float = 1.65) -> float:
     if lead_time_days <= 0 or std_daily_usage <= 0:
@@ -30,3 +37,45 @@ def next_reorder_date_projection(current_stock: float, avg_daily_usage: float, r
     if delta <= 0:
         return 0
     return max(0, delta / avg_daily_usage)
+
+
+def _floats(*values):
+    return np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in values))
+
+
+def safety_stock_array(std_daily_usage, lead_time_days, service_level_z: float = 1.65) -> np.ndarray:
+    """`safety_stock` over arrays: 0 where lead time or std is <= 0."""
+    std, lead = _floats(std_daily_usage, lead_time_days)
+    with np.errstate(invalid='ignore'):
+        return np.where((lead <= 0) | (std <= 0), 0.0, service_level_z * std * np.sqrt(lead))
+
+
+def reorder_point_array(avg_daily_usage, lead_time_days, safety_stock_val) -> np.ndarray:
+    """`reorder_point` over arrays: just the safety stock where lead time <= 0 or usage < 0."""
+    avg, lead, ss = _floats(avg_daily_usage, lead_time_days, safety_stock_val)
+    with np.errstate(invalid='ignore'):
+        return np.where((lead <= 0) | (avg < 0), ss, avg * lead + ss)
+
+
+def eoq_invalid_mask(annual_demand, ordering_cost, holding_cost_per_unit) -> np.ndarray:
+    """True where `eoq` returns None (a non-positive input; NaN inputs are not invalid)."""
+    demand, ordering, holding = _floats(annual_demand, ordering_cost, holding_cost_per_unit)
+    return (demand <= 0) | (ordering <= 0) | (holding <= 0)
+
+
+def eoq_array(annual_demand, ordering_cost, holding_cost_per_unit) -> np.ndarray:
+    """`eoq` over arrays: NaN where the scalar returns None (see `eoq_invalid_mask`)."""
+    demand, ordering, holding = _floats(annual_demand, ordering_cost, holding_cost_per_unit)
+    invalid = eoq_invalid_mask(demand, ordering, holding)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(invalid, np.nan, np.sqrt((2 * demand * ordering) / holding))
+
+
+def next_reorder_date_projection_array(current_stock, avg_daily_usage, rop) -> np.ndarray:
+    """`next_reorder_date_projection` over arrays: days until stock falls to ROP, 0 if already there."""
+    stock, avg, rop = _floats(current_stock, avg_daily_usage, rop)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        delta = stock - rop
+        days = delta / avg
+    # max(0, nan) is 0 in the scalar version (e.g. inf / inf), so NaN days become 0 as well
+    return np.where((avg > 0) & (delta > 0) & ~np.isnan(days), days, 0.0)
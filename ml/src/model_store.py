@@ -0,0 +1,99 @@
+"""Baseline model store: the baseline service's models in one memory-mapped file.
+
+The file format (header, in-file part index, generations) is the shared `aems_store`
+package in ml/aems-store, installed by requirements.txt; this module adds the
+baseline model family on top of it.
+
+Migrate an existing per-part pickle directory:
+python -m src.model_store migrate --models-dir models
+"""
+from __future__ import annotations
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+from aems_store import ModelStore, open_store, write_store
+
+BASELINE_STORE_FILE = 'baseline_models.store'
+BASELINE_METHODS = ('linear', 'avg')
+
+
+def write_baseline_store(models_dir: Path, fits) -> Path:
+    """Persist `train_baseline.fit_linear_trends` output (indexed by part_id)."""
+    method_code = np.array([BASELINE_METHODS.index(m) for m in fits['method']], dtype=np.int8)
+    return write_store(models_dir / BASELINE_STORE_FILE, fits.index, {
+        'method': method_code,
+        'slope': fits['slope'].to_numpy(dtype=np.float64),
+        'intercept': fits['intercept'].to_numpy(dtype=np.float64),
+        'avg_usage': fits['avg_usage'].to_numpy(dtype=np.float64),
+        'n_months': fits['n_months'].to_numpy(dtype=np.int32),
+    }, meta={'kind': 'baseline_linear', 'methods': list(BASELINE_METHODS)})
+
+
+def read_baseline_coefficients(store: ModelStore):
+    """Baseline store as the forecast engine's part_id/method/slope/intercept/avg_usage frame."""
+    import pandas as pd
+    methods = np.asarray(store.meta.get('methods', BASELINE_METHODS))
+    return pd.DataFrame({
+        'part_id': store.part_ids(),
+        'method': methods[store.array('method')],
+        'slope': store.array('slope'),
+        'intercept': store.array('intercept'),
+        'avg_usage': store.array('avg_usage'),
+    })
+
+
+def migrate_baseline_dir(models_dir: Path) -> Path:
+    """Convert per-part `linear_part_*.pkl` / `fallback_part_*.json` files into one store."""
+    import joblib
+    import pandas as pd
+
+    with open(models_dir / 'model_metadata.json') as f:
+        metadata = json.load(f)
+    rows = []
+    for m in metadata['models']:
+        part_id = m['part_id']
+        if m['method'] == 'linear':
+            model = joblib.load(models_dir / f"linear_part_{part_id}.pkl")
+            rows.append((part_id, 'linear', float(model.coef_[0]), float(model.intercept_), np.nan, m.get('n_months', 0)))
+        else:
+            with open(models_dir / f"fallback_part_{part_id}.json") as f:
+                fallback = json.load(f)
+            rows.append((part_id, 'avg', np.nan, np.nan, float(fallback['avg_usage']), fallback.get('points', 0)))
+    fits = pd.DataFrame(rows, columns=['part_id', 'method', 'slope', 'intercept', 'avg_usage', 'n_months']).set_index('part_id')
+    path = write_baseline_store(models_dir, fits)
+    metadata['artifact'] = BASELINE_STORE_FILE
+    with open(models_dir / 'model_metadata.json', 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Model store utilities')
+    sub = ap.add_subparsers(dest='command', required=True)
+    mig = sub.add_parser('migrate', help='Convert a per-part pickle directory into a single store file')
+    mig.add_argument('--models-dir', default=str(Path(__file__).resolve().parent.parent / 'models'))
+    mig.add_argument('--remove-legacy', action='store_true', help='Delete the per-part files after converting')
+    info = sub.add_parser('info', help='Print a store header summary')
+    info.add_argument('path')
+    args = ap.parse_args()
+
+    if args.command == 'migrate':
+        models_dir = Path(args.models_dir)
+        path = migrate_baseline_dir(models_dir)
+        store = open_store(path)
+        print(f"Wrote {len(store)} part models to {path}")
+        if args.remove_legacy:
+            legacy = list(models_dir.glob('linear_part_*.pkl')) + list(models_dir.glob('fallback_part_*.json'))
+            for p in legacy:
+                p.unlink()
+            print(f"Removed {len(legacy)} legacy per-part files")
+    else:
+        store = open_store(args.path)
+        print(json.dumps({'path': str(store.path), 'format_version': store.format_version, 'parts': len(store),
+                          'arrays': store.array_names, 'meta': store.meta}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
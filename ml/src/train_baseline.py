@@ -1,63 +1,83 @@
 """Train per-part simple linear regression models forecasting next month's total usage.
 
 If a part has <3 months of history, fallback to moving average.
+
+The regression is 1-D on the month index `t`, so every part is fitted at once in closed
+form from grouped sums (n, Σt, Σy, Σty, Σt²); all coefficients and averages are written
+to one memory-mappable model store (see `model_store`) instead of one pickle per part.
 """
 from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
-import joblib
+import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
 
 from .data_prep import load_dataset, aggregate_daily_to_monthly, prepare_model_frame, compute_daily_stats, get_lead_time_map
+from .model_store import BASELINE_STORE_FILE, write_baseline_store
 
 MODELS_DIR = Path(__file__).resolve().parent.parent / 'models'
 MODELS_DIR.mkdir(exist_ok=True, parents=True)
 
 
-def train_models(data_path: str, min_points: int = 3):
-    raw = load_dataset(data_path)
+def fit_linear_trends(monthly: pd.DataFrame, min_points: int = 3) -> pd.DataFrame:
+    """Least-squares slope/intercept of quantity_used on t for every part, indexed by part_id."""
+    t = monthly['t'].to_numpy(dtype=float)
+    y = monthly['quantity_used'].to_numpy(dtype=float)
+    sums = (pd.DataFrame({'n': 1, 't': t, 'y': y, 'ty': t * y, 'tt': t * t}, index=monthly.index)
+              .groupby(monthly['part_id'].to_numpy())
+              .sum())
+    n, st, sy, sty, stt = (sums[c].to_numpy(dtype=float) for c in ('n', 't', 'y', 'ty', 'tt'))
+    denom = n * stt - st * st
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # A single point has no trend: flat line through it (matches LinearRegression)
+        slope = np.where(denom != 0, (n * sty - st * sy) / denom, 0.0)
+    intercept = (sy - slope * st) / n
+    linear = n >= min_points
+    return pd.DataFrame({
+        'method': np.where(linear, 'linear', 'avg'),
+        'slope': np.where(linear, slope, np.nan),
+        'intercept': np.where(linear, intercept, np.nan),
+        'avg_usage': np.where(linear, np.nan, sy / n),
+        'n_months': n.astype(np.int64),
+    }, index=sums.index.rename('part_id'))
+
+
+def train_from_frame(raw: pd.DataFrame, min_points: int = 3, models_dir: Path = MODELS_DIR) -> dict:
     monthly = aggregate_daily_to_monthly(raw)
     monthly = prepare_model_frame(monthly)
-    stats = compute_daily_stats(raw)
+    stats = compute_daily_stats(raw).set_index('part_id')
     lead_time_map = get_lead_time_map(raw)
 
-    metadata = {"models": [], "strategy": "linear_regression_fallback_avg"}
-    for part_id, grp in monthly.groupby('part_id'):
-        if len(grp) >= min_points:
-            # Convert to numpy arrays explicitly for type checkers / sklearn
-            X = grp[['t']].to_numpy(dtype=float)
-            y = grp['quantity_used'].to_numpy(dtype=float)
-            model = LinearRegression()
-            model.fit(X, y)
-            joblib.dump(model, MODELS_DIR / f"linear_part_{part_id}.pkl")
-            method = 'linear'
-        else:
-            # Store fallback data (last average) as JSON
-            avg_usage = grp['quantity_used'].mean()
-            payload = {"avg_usage": avg_usage, "points": len(grp)}
-            with open(MODELS_DIR / f"fallback_part_{part_id}.json", 'w') as f:
-                json.dump(payload, f)
-            method = 'avg'
-
-        part_stats = stats[stats.part_id == part_id].iloc[0].to_dict()
+    fits = fit_linear_trends(monthly, min_points)
+    write_baseline_store(models_dir, fits)
+
+    latest_month = monthly.groupby('part_id', observed=True)['month_start'].max().dt.strftime('%Y-%m-%d')
+    summary = fits[['method', 'n_months']].join(latest_month).join(stats)
+    summary['lead_time_days'] = [int(lead_time_map.get(p, 7)) for p in summary.index]
+
+    metadata = {"models": [], "strategy": "linear_regression_fallback_avg", "artifact": BASELINE_STORE_FILE}
+    for part_id, row in zip(summary.index, summary.itertuples(index=False)):
         metadata['models'].append({
             'part_id': part_id,
-            'method': method,
-            'n_months': int(len(grp)),
-            'latest_month': grp['month_start'].max().strftime('%Y-%m-%d'),
-            'avg_daily_usage': part_stats['avg_daily_usage'],
-            'std_daily_usage': part_stats['std_daily_usage'],
-            'days_observed': int(part_stats['days_observed']),
-            'lead_time_days': int(lead_time_map.get(part_id, 7))
+            'method': row.method,
+            'n_months': int(row.n_months),
+            'latest_month': row.month_start,
+            'avg_daily_usage': float(row.avg_daily_usage),
+            'std_daily_usage': float(row.std_daily_usage),
+            'days_observed': int(row.days_observed),
+            'lead_time_days': row.lead_time_days
         })
 
-    with open(MODELS_DIR / 'model_metadata.json', 'w') as f:
+    with open(models_dir / 'model_metadata.json', 'w') as f:
         json.dump(metadata, f, indent=2)
     return metadata
 
 
+def train_models(data_path: str, min_points: int = 3):
+    return train_from_frame(load_dataset(data_path), min_points)
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--data', default='data/dataset.csv')
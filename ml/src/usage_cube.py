@@ -0,0 +1,445 @@
+"""Dense parts x days usage cube in a memory-mapped file.
+
+Layout of a cube directory:
+
+    cube.json          header: format version, parts, part capacity, days, data and index files
+    parts-<gen>.npy    part id of each row
+    dates-<gen>.npy    day of each column (consecutive calendar days)
+    usage-<gen>.i32    int32 cells in column-major order: each day is one contiguous block
+
+A cell holds a part's total usage for the day; MISSING (-1) marks part-days without a
+usage record, so statistics count observed days exactly as the long-format code does.
+Because days are contiguous, new days extend the file in place, and new parts take
+spare rows (part capacity) until the file is rewritten with more. The header is
+written last and names the files it goes with; a rebuild or regrow writes files of
+a new generation and deletes the previous ones only after the header swap, so an
+interrupted write leaves the previous cube readable. Statistics
+run along axis 1 on cumulative sums, one block of parts at a time. Part ids are kept
+as strings; every lookup converts the ids it is given the same way (see `part_keys`).
+
+Build from a usage CSV, add days, inspect (`--root` goes before the command):
+python -m src.usage_cube --root data/usage_cube build --data data/dataset.csv
+python -m src.usage_cube --root data/usage_cube append --data data/new_days.csv
+python -m src.usage_cube --root data/usage_cube info
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .data_prep import load_dataset
+
+FORMAT_VERSION = 2
+HEADER_FILE = 'cube.json'
+# Index files of version 1 cubes, which the header did not name
+V1_FILES = {'parts_file': 'parts.npy', 'dates_file': 'dates.npy'}
+CELL_DTYPE = np.int32
+MISSING = -1
+
+# Spare rows reserved for parts that appear later (fraction of the part count, at least MIN_SPARE_PARTS)
+PART_HEADROOM = 0.25
+MIN_SPARE_PARTS = 64
+
+# Parts per block when computing statistics (bounds the float64 temporaries)
+ROW_BLOCK = 4096
+
+STATS = ('sum', 'count', 'mean', 'std')
+
+
+def _day(value) -> np.datetime64:
+    return pd.Timestamp(value).to_datetime64().astype('datetime64[D]')
+
+
+def _capacity(parts: int) -> int:
+    return parts + max(MIN_SPARE_PARTS, int(parts * PART_HEADROOM))
+
+
+def part_keys(part_ids) -> np.ndarray:
+    """Part ids as the strings the cube stores (whole-number floats such as 12.0 become '12')."""
+    values = np.asarray(part_ids)
+    if values.dtype.kind == 'f' and np.isfinite(values).all() and np.array_equal(values, np.round(values)):
+        values = values.astype(np.int64)
+    return values.astype(object).astype(str)
+
+
+def daily_totals(frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Total usage of every (part, day) in a long usage frame; missing quantities count as 0.
+
+    Returns the sorted distinct part ids (as `part_keys`), then per total: its part
+    (position in those ids), its day and the total.
+    """
+    codes, uniques = pd.factorize(frame['part_id'])
+    # Ids equal once converted (e.g. 1 and '1') become one part
+    part_ids, remap = np.unique(part_keys(uniques), return_inverse=True)
+    known = codes >= 0
+    codes = remap.ravel()[codes[known]].astype(np.int64)
+    days = pd.to_datetime(frame['date']).to_numpy()[known].astype('datetime64[D]').astype(np.int64)
+    quantities = frame['quantity_used'].to_numpy(dtype=np.float64, na_value=0.0)[known]
+    if not len(codes):
+        return part_ids, codes, days.astype('datetime64[D]'), np.zeros(0, dtype=CELL_DTYPE)
+
+    first, span = days.min(), days.max() - days.min() + 1
+    keys, cell = np.unique(codes * span + (days - first), return_inverse=True)
+    values = np.bincount(cell.ravel(), weights=quantities, minlength=len(keys))
+    if not np.array_equal(values, np.round(values)):
+        raise ValueError("The usage cube stores whole units; quantity_used has fractional daily totals")
+    if values.min() < 0 or values.max() > np.iinfo(CELL_DTYPE).max:
+        raise ValueError("Daily totals must be between 0 and the int32 maximum")
+    return part_ids, keys // span, (keys % span + first).astype('datetime64[D]'), values.astype(CELL_DTYPE)
+
+
+def _trailing(values: np.ndarray, window: int, lead: int) -> np.ndarray:
+    """Sum over each column's trailing `window` columns (fewer at the left edge), dropping `lead` columns."""
+    cumulative = np.zeros((values.shape[0], values.shape[1] + 1), dtype=np.float64)
+    np.cumsum(values, axis=1, out=cumulative[:, 1:])
+    upper = np.arange(1, values.shape[1] + 1)
+    lower = np.maximum(upper - window, 0)
+    return (cumulative[:, upper] - cumulative[:, lower])[:, lead:]
+
+
+def _count(rows: np.ndarray | slice) -> int:
+    return rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+
+
+def _generation_files(generation: int) -> Dict[str, str]:
+    return {'data_file': f"usage-{generation:06d}.i32", 'parts_file': f"parts-{generation:06d}.npy",
+            'dates_file': f"dates-{generation:06d}.npy"}
+
+
+def _remove_superseded(root: Path, previous: Optional[dict], header: dict):
+    """Delete the files of the `previous` header that the committed `header` no longer names."""
+    if not previous:
+        return
+    previous = {**V1_FILES, **previous}
+    for key in ('data_file', 'parts_file', 'dates_file'):
+        if previous[key] != header[key]:
+            (root / previous[key]).unlink(missing_ok=True)
+
+
+def _save_array(path: Path, values: np.ndarray):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+
+class UsageCube:
+    """Memory-mapped (parts x days) usage matrix with part and date indexes."""
+
+    def __init__(self, root: str | Path, writable: bool = False):
+        self.root = Path(root)
+        self.writable = writable
+        self._open()
+
+    def _open(self):
+        header = json.loads((self.root / HEADER_FILE).read_text())
+        if header['format_version'] > FORMAT_VERSION:
+            raise ValueError(f"Usage cube format v{header['format_version']} is newer than supported v{FORMAT_VERSION}")
+        self.header = header = {**V1_FILES, **header}
+        # The header is authoritative: index entries past its counts are from an unfinished append
+        self._part_ids = np.load(self.root / header['parts_file'])[:header['parts']]
+        self._dates = np.load(self.root / header['dates_file'])[:header['days']]
+        self._index = pd.Index(self._part_ids.astype(object))
+        self._cells = np.memmap(self.root / header['data_file'], dtype=CELL_DTYPE, mode='r+' if self.writable else 'r',
+                                shape=(header['part_capacity'], header['days']), order='F')
+
+    @classmethod
+    def build(cls, root: str | Path, frame: pd.DataFrame, part_capacity: Optional[int] = None) -> 'UsageCube':
+        """Write a new cube (replacing any at `root`) from long rows: date, part_id, quantity_used."""
+        part_ids, part_codes, days, totals = daily_totals(frame)
+        if not len(totals):
+            raise ValueError("No usage rows to build a usage cube from")
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        previous = json.loads((root / HEADER_FILE).read_text()) if (root / HEADER_FILE).exists() else None
+
+        ids, rows = part_ids, part_codes
+        first = days.min()
+        dates = np.arange(first, days.max() + 1, dtype='datetime64[D]')
+        capacity = max(part_capacity or 0, _capacity(len(ids)))
+        generation = previous['generation'] + 1 if previous else 1
+        files = _generation_files(generation)
+
+        cells = np.memmap(root / files['data_file'], dtype=CELL_DTYPE, mode='w+', shape=(capacity, len(dates)), order='F')
+        cells[:] = MISSING
+        cells[rows, (days - first).astype(np.int64)] = totals
+        cells.flush()
+        del cells
+
+        _save_array(root / files['parts_file'], ids)
+        _save_array(root / files['dates_file'], dates)
+        header = {'format_version': FORMAT_VERSION, 'generation': generation, **files,
+                  'parts': int(len(ids)), 'part_capacity': int(capacity), 'days': int(len(dates))}
+        cls._write_header(root, header)
+        _remove_superseded(root, previous, header)
+        return cls(root, writable=True)
+
+    @staticmethod
+    def _write_header(root: Path, header: dict):
+        tmp_path = root / (HEADER_FILE + '.tmp')
+        tmp_path.write_text(json.dumps(header, indent=2))
+        os.replace(tmp_path, root / HEADER_FILE)
+
+    @property
+    def part_ids(self) -> np.ndarray:
+        return self._part_ids
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self._dates.astype('datetime64[ns]'))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self._part_ids), len(self._dates)
+
+    @property
+    def values(self) -> np.ndarray:
+        """All cells as a (parts, days) memory-mapped view (MISSING where a part-day has no record)."""
+        return self._cells[:len(self._part_ids)]
+
+    def rows(self, part_ids) -> np.ndarray:
+        """Row of each part id (KeyError for ids not in the cube)."""
+        rows = self._index.get_indexer(part_keys(list(part_ids)).astype(object))
+        if (rows < 0).any():
+            raise KeyError(f"{int((rows < 0).sum())} part ids are not in the usage cube")
+        return rows
+
+    def columns(self, start=None, end=None) -> slice:
+        """Columns of the days from `start` to `end` (inclusive), clipped to the cube."""
+        first = 0 if start is None else int(np.searchsorted(self._dates, _day(start)))
+        last = len(self._dates) if end is None else int(np.searchsorted(self._dates, _day(end), side='right'))
+        return slice(first, max(first, last))
+
+    def _select(self, parts) -> np.ndarray | slice:
+        """`parts` as rows: None = all, a slice = that row range, otherwise part ids."""
+        if parts is None:
+            return slice(0, len(self._part_ids))
+        if isinstance(parts, slice):
+            selected = range(*parts.indices(len(self._part_ids)))
+            return slice(selected.start, selected.stop) if selected.step == 1 else np.asarray(selected)
+        return self.rows(parts)
+
+    def _blocks(self, rows: np.ndarray | slice) -> Iterator[Tuple[slice, np.ndarray | slice]]:
+        """(output rows, cube rows) in blocks of ROW_BLOCK; row ranges stay slices (views, no gather)."""
+        for offset in range(0, _count(rows), ROW_BLOCK):
+            out = slice(offset, min(offset + ROW_BLOCK, _count(rows)))
+            yield out, slice(rows.start + out.start, rows.start + out.stop) if isinstance(rows, slice) else rows[out]
+
+    def window(self, parts=None, start=None, end=None) -> np.ndarray:
+        """Cells of a part selection (ids or a row slice) and date window; a memory-mapped view for row slices."""
+        return self.values[self._select(parts), self.columns(start, end)]
+
+    def to_frame(self, parts=None, start=None, end=None) -> pd.DataFrame:
+        """Observed cells of a selection as long rows: date, part_id, quantity_used."""
+        rows = self._select(parts)
+        columns = self.columns(start, end)
+        cells = self.values[rows, columns]
+        part_rows, day_columns = np.nonzero(cells != MISSING)
+        return pd.DataFrame({
+            'date': self.dates[columns][day_columns],
+            'part_id': self._part_ids[rows][part_rows],
+            'quantity_used': cells[part_rows, day_columns],
+        }).sort_values(['date', 'part_id'], kind='stable', ignore_index=True)
+
+    def rolling(self, window: int, parts=None, start=None, end=None, min_periods: int = 1,
+                stats: Sequence[str] = ('mean', 'std')) -> Dict[str, np.ndarray]:
+        """Trailing `window`-day statistics along the day axis, per part.
+
+        Each (part, day) covers the observed cells among that day and the `window` - 1
+        days before it (read from before `start` where the cube has them), matching a
+        per-part pandas `rolling(f'{window}D')` over the long rows. 'count' is the
+        number of observed days; the others are NaN below `min_periods` ('std' is the
+        sample std, NaN below two days). Returns stat -> (parts, days) float64 array.
+        """
+        unknown = set(stats) - set(STATS)
+        if unknown:
+            raise ValueError(f"Unknown rolling stats {sorted(unknown)}; choose from {STATS}")
+        rows = self._select(parts)
+        columns = self.columns(start, end)
+        lead = min(window - 1, columns.start)
+        width = columns.stop - columns.start
+        result = {stat: np.empty((_count(rows), width), dtype=np.float64) for stat in stats}
+
+        for out, block_rows in self._blocks(rows):
+            cells = self._cells[block_rows, columns.start - lead:columns.stop]
+            observed = cells != MISSING
+            usage = np.where(observed, cells, 0).astype(np.float64)
+            count = _trailing(observed, window, lead)
+            total = _trailing(usage, window, lead)
+            enough = count >= max(min_periods, 1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                if 'count' in stats:
+                    result['count'][out] = count
+                if 'sum' in stats:
+                    result['sum'][out] = np.where(enough, total, np.nan)
+                if 'mean' in stats:
+                    result['mean'][out] = np.where(enough, total / count, np.nan)
+                if 'std' in stats:
+                    squares = _trailing(usage * usage, window, lead) - total * total / count
+                    std = np.sqrt(np.maximum(squares, 0.0) / (count - 1))
+                    result['std'][out] = np.where(enough & (count > 1), std, np.nan)
+        return result
+
+    def daily_stats(self, parts=None, start=None, end=None) -> pd.DataFrame:
+        """Average & std daily usage over observed days per part (as data_prep.compute_daily_stats)."""
+        rows = self._select(parts)
+        columns = self.columns(start, end)
+        row_ids = self._part_ids[rows]
+        count = np.zeros(len(row_ids), dtype=np.int64)
+        total = np.zeros(len(row_ids), dtype=np.float64)
+        squares = np.zeros(len(row_ids), dtype=np.float64)
+        for out, block_rows in self._blocks(rows):
+            cells = self._cells[block_rows, columns]
+            observed = cells != MISSING
+            usage = np.where(observed, cells, 0).astype(np.float64)
+            count[out] = observed.sum(axis=1)
+            total[out] = usage.sum(axis=1)
+            squares[out] = (usage * usage).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            std = np.sqrt(np.maximum(squares - total * mean, 0.0) / (count - 1))
+        seen = count > 0
+        return pd.DataFrame({
+            'part_id': row_ids[seen],
+            'avg_daily_usage': mean[seen],
+            'std_daily_usage': np.where(count[seen] > 1, std[seen], 0.0),
+            'days_observed': count[seen],
+        })
+
+    def monthly_totals(self, parts=None, start=None, end=None) -> pd.DataFrame:
+        """Usage per part and month with any observed day (as data_prep.aggregate_daily_to_monthly)."""
+        rows = self._select(parts)
+        columns = self.columns(start, end)
+        months = pd.PeriodIndex(self.dates[columns], freq='M')
+        if not len(months):
+            return pd.DataFrame(columns=['part_id', 'year_month', 'quantity_used', 'month_start'])
+        boundaries = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        row_ids = self._part_ids[rows]
+        totals = np.zeros((len(row_ids), len(boundaries)), dtype=np.int64)
+        observed = np.zeros((len(row_ids), len(boundaries)), dtype=bool)
+        for out, block_rows in self._blocks(rows):
+            cells = self._cells[block_rows, columns]
+            seen = cells != MISSING
+            totals[out] = np.add.reduceat(np.where(seen, cells, 0).astype(np.int64), boundaries, axis=1)
+            observed[out] = np.logical_or.reduceat(seen, boundaries, axis=1)
+
+        order = np.argsort(row_ids, kind='stable')
+        part_rows, month_columns = np.nonzero(observed[order])
+        year_month = months[boundaries][month_columns]
+        return pd.DataFrame({
+            'part_id': row_ids[order][part_rows],
+            'year_month': year_month,
+            'quantity_used': totals[order][part_rows, month_columns],
+            'month_start': year_month.to_timestamp(),
+        })
+
+    def append(self, frame: pd.DataFrame) -> Tuple[int, int]:
+        """Write daily totals into the cube in place.
+
+        Days after the last one extend the file; totals for days already in the cube
+        replace those cells; parts not in the cube take spare rows (the file is
+        rewritten with more capacity only when they run out). Days before the first
+        day need a rebuild. Returns (days added, parts added).
+        """
+        if not self.writable:
+            raise PermissionError("Usage cube opened read-only; open it with writable=True to append")
+        part_ids, part_codes, days, totals = daily_totals(frame)
+        if not len(totals):
+            return 0, 0
+        first = self._dates[0]
+        if days.min() < first:
+            raise ValueError(f"Usage before the cube's first day ({first}) needs a rebuild")
+
+        previous = self.header
+        header = dict(previous)
+        known = self._index.get_indexer(part_ids.astype(object))
+        new_ids = part_ids[known < 0]
+        part_count = len(self._part_ids) + len(new_ids)
+        if part_count > header['part_capacity']:
+            header.update(self._grow(_capacity(part_count)))
+
+        previous_days = len(self._dates)
+        new_days = int((days.max() - first).astype(np.int64)) + 1 - previous_days
+        dates = np.arange(first, max(days.max(), self._dates[-1]) + 1, dtype='datetime64[D]')
+        part_index = self._index.append(pd.Index(new_ids.astype(object)))
+        # The file is resized under no open mapping; whatever happens, reopen at the committed header
+        self._cells = None
+        try:
+            if new_days > 0:
+                with open(self.root / header['data_file'], 'r+b') as f:
+                    f.truncate(header['part_capacity'] * len(dates) * np.dtype(CELL_DTYPE).itemsize)
+            cells = np.memmap(self.root / header['data_file'], dtype=CELL_DTYPE, mode='r+',
+                              shape=(header['part_capacity'], len(dates)), order='F')
+            if new_days > 0:
+                cells[:, previous_days:] = MISSING
+            cells[part_index.get_indexer(part_ids.astype(object))[part_codes], (days - first).astype(np.int64)] = totals
+            cells.flush()
+            del cells
+
+            # Rewritten in place within a generation: the committed header's counts still
+            # select the entries it had, as new parts and days only go after them
+            _save_array(self.root / header['parts_file'], np.concatenate([self._part_ids, new_ids]).astype(str))
+            _save_array(self.root / header['dates_file'], dates)
+            header.update(parts=int(part_count), days=int(len(dates)), format_version=FORMAT_VERSION)
+            self._write_header(self.root, header)
+        finally:
+            self._open()
+        _remove_superseded(self.root, previous, self.header)
+        return max(new_days, 0), len(new_ids)
+
+    def _grow(self, capacity: int) -> dict:
+        """Copy the cells into a new generation's data file with `capacity` rows; returns the header fields to commit."""
+        generation = self.header['generation'] + 1
+        files = _generation_files(generation)
+        days = len(self._dates)
+        grown = np.memmap(self.root / files['data_file'], dtype=CELL_DTYPE, mode='w+', shape=(capacity, days), order='F')
+        step = max(1, (64 << 20) // (capacity * np.dtype(CELL_DTYPE).itemsize))
+        for column in range(0, days, step):
+            block = slice(column, min(column + step, days))
+            grown[:self._cells.shape[0], block] = self._cells[:, block]
+            grown[self._cells.shape[0]:, block] = MISSING
+        grown.flush()
+        del grown
+        return {'generation': generation, **files, 'part_capacity': int(capacity)}
+
+    def info(self) -> dict:
+        parts, days = self.shape
+        return {**self.header, 'root': str(self.root),
+                'first_day': str(self._dates[0]) if days else None, 'last_day': str(self._dates[-1]) if days else None,
+                'observed_cells': int(sum((self._cells[block] != MISSING).sum() for _, block in
+                                          self._blocks(slice(0, parts)))),
+                'file_mb': round((self.root / self.header['data_file']).stat().st_size / 2 ** 20, 1)}
+
+
+def open_cube(root: str | Path, writable: bool = False) -> UsageCube:
+    return UsageCube(root, writable)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Usage cube utilities')
+    ap.add_argument('--root', default=os.environ.get('USAGE_CUBE_DIR', 'data/usage_cube'))
+    sub = ap.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='Build the cube from a usage CSV')
+    build.add_argument('--data', default=os.environ.get('DATA_PATH', 'data/dataset.csv'))
+    append = sub.add_parser('append', help='Add or replace days from a usage CSV in place')
+    append.add_argument('--data', required=True)
+    sub.add_parser('info', help='Print the cube header and size')
+    args = ap.parse_args()
+
+    if args.command == 'build':
+        cube = UsageCube.build(args.root, load_dataset(args.data))
+        print(f"Built {cube.shape[0]} parts x {cube.shape[1]} days in {args.root}")
+    elif args.command == 'append':
+        added_days, added_parts = open_cube(args.root, writable=True).append(load_dataset(args.data))
+        print(f"Added {added_days} days and {added_parts} parts")
+    else:
+        print(json.dumps(open_cube(args.root).info(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
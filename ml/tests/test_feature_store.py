@@ -0,0 +1,56 @@
+"""Feature store: files written as the part catalog grows stay readable together."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'ml-inventory-system', 'src'))
+
+from feature_engine import IncrementalFeatureEngine  # noqa: E402
+from feature_store import FeatureStore  # noqa: E402
+from mongodb_connector import build_ml_training_dataset  # noqa: E402
+
+
+def dataset(parts: int, dates) -> pd.DataFrame:
+    rng = np.random.default_rng(parts)
+    dates = pd.DatetimeIndex(dates)
+    usage = pd.DataFrame({'date': np.repeat(dates.values, parts),
+                          'part_id': np.tile([f"PART-{i:04d}" for i in range(parts)], len(dates)),
+                          'part_name': np.tile([f"Part {i}" for i in range(parts)], len(dates)),
+                          'quantity_used': rng.poisson(5, parts * len(dates)).astype(float),
+                          'unit_cost': 10.0})
+    inventory = pd.DataFrame({'part_id': usage['part_id'].unique(), 'current_stock': 50.0,
+                              'min_stock': 5.0, 'lead_time_days': 7.0})
+    return build_ml_training_dataset(usage, inventory)
+
+
+def test_update_after_catalog_grows_past_int8_codes(tmp_path):
+    engine = IncrementalFeatureEngine(str(tmp_path / 'features'), buckets=1)
+    engine.rebuild(dataset(100, pd.date_range('2025-01-01', periods=20, freq='D')))
+    engine.update(dataset(300, [engine.through + pd.Timedelta(days=1)]))
+
+    features = engine.features()
+    assert len(features) == 100 * 20 + 300
+    assert features['part_id'].nunique() == 300
+    assert engine.recompute(['trend', 'lags', 'seasonal']) == len(features)
+    pd.testing.assert_frame_equal(engine.features()[features.columns], features, check_categorical=False)
+
+
+def test_reads_files_written_with_narrower_category_codes(tmp_path):
+    store = FeatureStore(str(tmp_path / 'features'), buckets=1)
+    rows = dataset(300, ['2025-01-01', '2025-01-02'])[['date', 'part_id', 'quantity_used']]
+    old, new = rows[rows['date'] == '2025-01-01'].head(100), rows[rows['date'] == '2025-01-02']
+    # As stores written before category codes were fixed at int32: pandas' own int8 codes
+    directory = os.path.join(store.root, 'month=2025-01', 'bucket=00')
+    os.makedirs(directory)
+    old.assign(part_id=old['part_id'].cat.remove_unused_categories()).to_parquet(
+        os.path.join(directory, 'part-00000001.parquet'), index=False)
+    store.write(new, 2)
+    store.commit(2)
+
+    got = store.read()
+    assert len(got) == 400
+    assert set(got['part_id']) == set(new['part_id'])
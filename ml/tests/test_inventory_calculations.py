@@ -0,0 +1,103 @@
+"""Property tests: every `*_array` calculation equals its scalar version elementwise.
+
+Inputs are drawn at random from a mix of positive values, zeros, negatives and NaN,
+so each run covers the lead time <= 0, std = 0 and invalid-EOQ branches.
+"""
+import math
+
+import numpy as np
+import pytest
+
+from src import inventory_calculations as ic
+
+SEEDS = range(20)
+N = 500
+
+
+def mixed(rng: np.random.Generator, n: int = N, high: float = 50.0) -> np.ndarray:
+    """Positive values with zeros, negatives, tiny values and NaN mixed in."""
+    values = rng.uniform(0, high, n)
+    kind = rng.integers(0, 6, n)
+    values[kind == 0] = 0.0
+    values[kind == 1] = -rng.uniform(0, high, (kind == 1).sum())
+    values[kind == 2] = np.nan
+    values[kind == 3] = rng.uniform(0, 1e-6, (kind == 3).sum())
+    return values
+
+
+def scalar_results(fn, *columns) -> np.ndarray:
+    """Scalar function applied row by row; None becomes NaN."""
+    out = [fn(*(float(c[i]) for c in columns)) for i in range(len(columns[0]))]
+    return np.array([np.nan if v is None else v for v in out], dtype=float)
+
+
+def assert_same(got: np.ndarray, expected: np.ndarray):
+    assert got.shape == expected.shape
+    np.testing.assert_array_equal(np.isnan(got), np.isnan(expected))
+    np.testing.assert_allclose(got, expected, rtol=1e-12, atol=0, equal_nan=True)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_safety_stock_array_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    std, lead = mixed(rng), mixed(rng, high=30)
+    for z in (1.65, 1.28):
+        expected = scalar_results(lambda s, l: ic.safety_stock(s, l, z), std, lead)
+        assert_same(ic.safety_stock_array(std, lead, z), expected)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_reorder_point_array_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    avg, lead, ss = mixed(rng), mixed(rng, high=30), mixed(rng)
+    assert_same(ic.reorder_point_array(avg, lead, ss), scalar_results(ic.reorder_point, avg, lead, ss))
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_eoq_array_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    demand, ordering, holding = mixed(rng, high=5000), mixed(rng, high=100), mixed(rng, high=80)
+    expected = scalar_results(ic.eoq, demand, ordering, holding)
+    assert_same(ic.eoq_array(demand, ordering, holding), expected)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_eoq_invalid_mask_marks_exactly_the_none_results(seed):
+    rng = np.random.default_rng(seed)
+    demand, ordering, holding = mixed(rng, high=5000), mixed(rng, high=100), mixed(rng, high=80)
+    is_none = np.array([ic.eoq(d, o, h) is None for d, o, h in zip(demand, ordering, holding)])
+    mask = ic.eoq_invalid_mask(demand, ordering, holding)
+    np.testing.assert_array_equal(mask, is_none)
+    # NaN inputs are not invalid: they give NaN from both versions, outside the mask
+    nan_input = np.isnan(demand) | np.isnan(ordering) | np.isnan(holding)
+    assert np.isnan(ic.eoq_array(demand, ordering, holding)[nan_input & ~mask]).all()
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_next_reorder_date_projection_array_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    stock, avg, rop = mixed(rng, high=500), mixed(rng, high=20), mixed(rng, high=500)
+    expected = scalar_results(ic.next_reorder_date_projection, stock, avg, rop)
+    assert_same(ic.next_reorder_date_projection_array(stock, avg, rop), expected)
+
+
+def test_edge_cases():
+    # Lead time <= 0 or std = 0: no safety stock
+    np.testing.assert_array_equal(ic.safety_stock_array([2.0, 0.0, 2.0, 2.0], [0.0, 7.0, -3.0, 4.0]),
+                                  [0.0, 0.0, 0.0, 1.65 * 2.0 * 2.0])
+    # Lead time <= 0 or negative usage: the ROP is just the safety stock
+    np.testing.assert_array_equal(ic.reorder_point_array([5.0, -1.0, 5.0], [0.0, 7.0, 2.0], 3.0), [3.0, 3.0, 13.0])
+    # Any EOQ input <= 0 is invalid (scalar None); NaN inputs give NaN but are not invalid
+    demand, ordering, holding = [0.0, 100.0, 100.0, np.nan, 100.0], [25.0, -1.0, 25.0, 25.0, 25.0], [5.0, 5.0, 0.0, 5.0, 5.0]
+    np.testing.assert_array_equal(ic.eoq_invalid_mask(demand, ordering, holding), [True, True, True, False, False])
+    got = ic.eoq_array(demand, ordering, holding)
+    assert np.isnan(got[:4]).all() and got[4] == ic.eoq(100.0, 25.0, 5.0)
+    assert math.isnan(ic.eoq(math.nan, 25.0, 5.0))
+
+
+def test_scalar_arguments_broadcast():
+    std = np.array([1.0, 2.0, 0.0])
+    assert_same(ic.safety_stock_array(std, 9.0), scalar_results(ic.safety_stock, std, np.full(3, 9.0)))
+    assert_same(ic.eoq_array(1000.0, 25.0, np.array([5.0, -5.0])),
+                scalar_results(ic.eoq, np.full(2, 1000.0), np.full(2, 25.0), np.array([5.0, -5.0])))
+    assert ic.reorder_point_array(2.0, 3.0, 1.0).shape == ()
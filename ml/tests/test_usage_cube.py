@@ -0,0 +1,105 @@
+"""Usage cube: part id handling, appends and parity with the long-format data_prep code."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_prep import aggregate_daily_to_monthly, compute_daily_stats
+from src.usage_cube import UsageCube
+
+
+def usage(dates, part_ids, quantities) -> pd.DataFrame:
+    return pd.DataFrame({'date': pd.to_datetime(dates), 'part_id': part_ids, 'quantity_used': quantities})
+
+
+def random_usage(seed: int = 3, parts: int = 40, days: int = 75) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-12-01', periods=days, freq='D')
+    frame = usage(np.repeat(dates, parts), np.tile([f"P{i:03d}" for i in range(parts)], days),
+                  rng.poisson(6, parts * days))
+    return frame[rng.random(len(frame)) > 0.3].reset_index(drop=True)
+
+
+@pytest.mark.parametrize('part_ids', [[1, 2, 1], np.array([1.0, 2.0, 1.0]), ['1', '2', '1']])
+def test_part_ids_are_looked_up_as_stored(tmp_path, part_ids):
+    cube = UsageCube.build(tmp_path, usage(['2025-01-01', '2025-01-01', '2025-01-02'], part_ids, [3, 4, 5]))
+    assert list(cube.part_ids) == ['1', '2']
+    assert list(cube.rows([1, '2'])) == [0, 1]
+    assert list(cube.window(parts=[1])[0]) == [3, 5]
+    with pytest.raises(KeyError):
+        cube.rows([3])
+
+
+def test_append_with_integer_ids(tmp_path):
+    cube = UsageCube.build(tmp_path, usage(['2025-01-01', '2025-01-01'], [1, 2], [3, 4]))
+    assert cube.append(usage(['2025-01-02', '2025-01-02'], [1, 3], [7, 8])) == (1, 1)
+    assert cube.append(usage(['2025-01-01'], [2], [9])) == (0, 0)  # a re-sent day replaces its cell
+    assert list(cube.part_ids) == ['1', '2', '3']
+    np.testing.assert_array_equal(cube.values, [[3, 7], [9, -1], [-1, 8]])
+    # Reopened from disk, the same cells
+    np.testing.assert_array_equal(UsageCube(tmp_path).values, cube.values)
+
+
+def test_growing_past_the_spare_rows(tmp_path):
+    cube = UsageCube.build(tmp_path, usage(['2025-01-01'], ['A'], [1]), part_capacity=2)
+    new_parts = [f"N{i}" for i in range(cube.header['part_capacity'] + 5)]
+    assert cube.append(usage(['2025-01-02'] * len(new_parts), new_parts, 1)) == (1, len(new_parts))
+    assert cube.header['generation'] == 2
+    assert sorted(p.name for p in tmp_path.glob('usage-*.i32')) == ['usage-000002.i32']
+    assert cube.window(parts=['A'])[0].tolist() == [1, -1]
+
+
+def test_stats_match_data_prep(tmp_path):
+    raw = random_usage()
+    cube = UsageCube.build(tmp_path, raw)
+
+    stats = cube.daily_stats()
+    expected = compute_daily_stats(raw.copy()).sort_values('part_id', ignore_index=True)
+    assert list(stats['part_id']) == list(expected['part_id'])
+    for column in ('avg_daily_usage', 'std_daily_usage', 'days_observed'):
+        np.testing.assert_allclose(stats[column], expected[column].to_numpy(float), rtol=1e-12)
+
+    monthly = cube.monthly_totals()
+    expected = aggregate_daily_to_monthly(raw.copy())
+    assert list(monthly['part_id']) == list(expected['part_id'])
+    np.testing.assert_array_equal(monthly['quantity_used'], expected['quantity_used'])
+
+
+@pytest.mark.parametrize('window', [1, 7, 30])
+def test_rolling_matches_pandas(tmp_path, window):
+    raw = random_usage().sort_values(['part_id', 'date'], ignore_index=True)
+    cube = UsageCube.build(tmp_path, raw)
+    rolled = cube.rolling(window, stats=('mean', 'std', 'count'))
+    rolling = raw.set_index('date').groupby('part_id', sort=True)['quantity_used'].rolling(f'{window}D')
+    rows = cube.rows(raw['part_id'])
+    columns = (raw['date'] - cube.dates[0]).dt.days.to_numpy()
+    np.testing.assert_allclose(rolled['mean'][rows, columns], rolling.mean().to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(rolled['std'][rows, columns], rolling.std().to_numpy(), atol=1e-6)
+    np.testing.assert_array_equal(rolled['count'][rows, columns], rolling.count().to_numpy())
+
+
+def test_interrupted_rebuild_leaves_the_previous_cube(tmp_path, monkeypatch):
+    old = UsageCube.build(tmp_path, usage(['2025-01-01', '2025-01-02'], ['A', 'B'], [1, 2]))
+    expected = (old.part_ids.copy(), old.dates.copy(), np.array(old.values))
+    del old
+
+    def crash(root, header):
+        raise OSError("killed before the header swap")
+    monkeypatch.setattr(UsageCube, '_write_header', staticmethod(crash))
+    with pytest.raises(OSError):
+        UsageCube.build(tmp_path, usage(['2024-12-01', '2025-01-05', '2025-01-05'], ['C', 'D', 'A'], [5, 6, 7]))
+    monkeypatch.undo()
+
+    cube = UsageCube(tmp_path)
+    np.testing.assert_array_equal(cube.part_ids, expected[0])
+    assert cube.dates.equals(expected[1])
+    np.testing.assert_array_equal(cube.values, expected[2])
+
+
+def test_rebuild_and_growth_remove_superseded_files(tmp_path):
+    UsageCube.build(tmp_path, usage(['2025-01-01'], ['A'], [1]))
+    cube = UsageCube.build(tmp_path, usage(['2025-01-01'], ['B'], [2]))
+    new_parts = [f"N{i:03d}" for i in range(cube.header['part_capacity'])]
+    cube.append(usage(['2025-01-02'] * len(new_parts), new_parts, 3))
+    assert sorted(p.name for p in tmp_path.iterdir()) == \
+        ['cube.json', 'dates-000003.npy', 'parts-000003.npy', 'usage-000003.i32']
+    assert list(UsageCube(tmp_path).part_ids) == ['B'] + new_parts
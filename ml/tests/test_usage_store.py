@@ -0,0 +1,68 @@
+"""Usage store sync: logs that become visible below the watermark are still picked up."""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip('pyarrow')
+mongomock = pytest.importorskip('mongomock')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'ml-inventory-system', 'src'))
+
+from bson import ObjectId  # noqa: E402
+
+from mongodb_connector import MongoDBConnector  # noqa: E402
+from usage_store import SYNC_LAG, UsageStore  # noqa: E402
+
+
+def log(part_id, quantity, used_at, created=None):
+    document = {'partId': part_id, 'quantityUsed': quantity, 'usedBy': ObjectId(), 'usedAt': used_at}
+    if created is not None:
+        document['_id'] = ObjectId.from_datetime(created)
+    return document
+
+
+@pytest.fixture
+def connector():
+    return MongoDBConnector(client=mongomock.MongoClient(), usage_fetch_mode='raw')
+
+
+def test_sync_rereads_logs_inserted_below_the_watermark(tmp_path, connector):
+    part = ObjectId()
+    today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    logs = connector.db.partusagelogs
+    logs.insert_many([log(part, 2, today), log(part, 3, today)])
+
+    store = UsageStore(str(tmp_path / 'usage'))
+    assert store.sync(connector) == 2
+    mark = ObjectId(store.watermark['last_id']).generation_time
+
+    # Another backend instance's insert, made a minute before the mark but visible only now
+    logs.insert_one(log(part, 5, today, created=mark - timedelta(minutes=1)))
+    assert store.sync(connector) == 1
+    # Older than the lag: out of reach of an incremental sync
+    logs.insert_one(log(part, 7, today, created=mark - SYNC_LAG - timedelta(minutes=1)))
+    assert store.sync(connector) == 0
+
+    daily = store.daily_usage(7)
+    assert daily['quantity_used'].sum() == 2 + 3 + 5
+    assert store.watermark['rows'] == 3
+    assert ObjectId(store.watermark['last_id']).generation_time == mark
+
+    store.sync(connector, full=True, days_back=7)
+    assert store.daily_usage(7)['quantity_used'].sum() == 2 + 3 + 5 + 7
+
+
+def test_watermark_never_moves_back(tmp_path, connector):
+    part = ObjectId()
+    used_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=1)
+    connector.db.partusagelogs.insert_one(log(part, 1, used_at))
+    store = UsageStore(str(tmp_path / 'usage'))
+    store.sync(connector)
+    last_id = store.watermark['last_id']
+
+    connector.db.partusagelogs.insert_one(
+        log(part, 1, used_at, created=ObjectId(last_id).generation_time - timedelta(seconds=30)))
+    assert store.sync(connector) == 1
+    assert store.watermark['last_id'] == last_id
+    assert store.daily_usage(7)['quantity_used'].sum() == 2